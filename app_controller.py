@@ -3,6 +3,7 @@ import tkinter as tk
 import os
 import time
 import threading
+import queue
 
 from rules.rules_controller import RulesController
 from character.character_controller import CharacterController
@@ -22,7 +23,19 @@ from main_menu_view import MainMenuView, NewCampaignDialog
 from custom_dialogs import MessageBox
 from rules.rules_editor_window import RulesEditorWindow
 from rules.rules_model import RulesModel
-from database import Database
+from database import Database, open_campaign_session, close_campaign_session, get_campaign_session, WAL_CHECKPOINT_INTERVAL_MS
+from entity_cache import EntityCache
+from database_writer import DatabaseWriter
+from serialization import forget_serializer
+from stat_engine import StatEngine
+from item.item_catalog import ItemCatalog, CATALOG_RELOADED, CATALOG_SAVED, CATALOG_DELETED
+from rules.formula_engine import get_formula_engine
+import stat_table
+from prefix_index import PrefixIndex, DEFAULT_MATCH_LIMIT
+from fuzzy_index import FuzzyIndex
+
+# How often the editor checks whether another process changed campaign.db
+EXTERNAL_CHANGE_POLL_MS = 2000
 
 class AppController:
     def __init__(self, root):
@@ -39,6 +52,28 @@ class AppController:
         self.last_active_pane = "right"
         self.is_map_fullscreen = False
         self.data_cache = {}
+        # Incrementally refreshed model lists, keyed like data_cache (their lists live there too)
+        self.entity_caches = {}
+        self._entity_cache_lock = threading.RLock()
+        self._last_data_version = None
+        # The change_log revision seen by the last external change poll
+        self._last_poll_revision = None
+        # Background thread that performs all saves while a campaign is open
+        self.db_writer = None
+        # Effective stats (base stats plus equipped item modifiers) shared by sheets and combat
+        self.stat_engine = StatEngine()
+        # Compiled formulas of the loaded ruleset (derived stats such as "Dodge Chance")
+        self.formula_engine = None
+        # Column store for bulk stat queries, built on first use (needs numpy)
+        self.stat_table = None
+        # The campaign's items with id/name/type indexes, shared by every feature
+        self.item_catalog = None
+        # Type-ahead name lookup shared by the pickers, keyed by character/NPC/item id and map name
+        self.name_indexes = {kind: PrefixIndex() for kind in ("character", "npc", "item", "map")}
+        # Fuzzy search over item names, types and descriptions for the item dialogs, built in the background
+        self.item_search = None
+        # Running build of item_search: (result queue, catalog deltas to replay), or None
+        self._item_search_build = None
         
         self.feature_cache = {}
         self.left_pane_feature_name = "Characters"
@@ -60,6 +95,15 @@ class AppController:
 
     def clear_data_cache(self):
         self.data_cache.clear()
+        self.entity_caches.clear()
+        self.stat_table = None
+        self.item_catalog = None
+        self.item_search = None
+        self._item_search_build = None
+        for index in self.name_indexes.values():
+            index.reset(())
+        self._last_data_version = None
+        self._last_poll_revision = None
 
     def run(self):
         self.root.mainloop()
@@ -76,13 +120,30 @@ class AppController:
         # This function is now fast because views lazy-load their most complex parts.
         self.is_editor_active = False # Stop the background thread if it's running
 
+        # Background jobs (e.g. NPC batch generation) must not save into the session being closed
+        for feature in self.feature_cache.values():
+            controller = feature['controller']
+            if controller and hasattr(controller, 'stop_background_work'):
+                controller.stop_background_work()
+
+        # Write out anything still queued before the widgets go, so no save callback reaches a destroyed view
+        if self.db_writer:
+            self.db_writer.stop()
+            self.db_writer = None
+
         if self.editor_frame:
             # We don't need to iterate the cache; destroying the parent frame does it all.
             self.editor_frame.destroy()
             self.editor_frame = None
 
+        # Release the campaign's database connections and its cached serializer (codec dictionary)
+        close_campaign_session()
+        if self.current_campaign_path:
+            forget_serializer(self.current_campaign_path)
+
         # Reset all state variables
         self.ruleset_data = None
+        self.formula_engine = None
         self.current_campaign_path = None
         self.left_pane_pinned = False
         self.right_pane_pinned = False
@@ -183,22 +244,42 @@ class AppController:
             rules_model = RulesModel()
             self.ruleset_data = rules_model.load_rule_set(ruleset_name)
             if self.ruleset_data:
+                self.formula_engine = get_formula_engine(self.ruleset_data)
                 campaign_name = os.path.basename(self.current_campaign_path)
-                self.header_label.configure(text=f"{campaign_name}  |  Ruleset: {ruleset_name}")
+                header_text = f"{campaign_name}  |  Ruleset: {ruleset_name}"
+                if self.is_read_only():
+                    header_text += "  |  Read-only"
+                self.header_label.configure(text=header_text)
             else:
                 MessageBox.showerror("Error", f"Failed to load required ruleset '{ruleset_name}'.", self.root)
                 self.show_main_menu()
                 return
         
         self.root.after(100, lambda: self.paned_window.sash_place(0, self.paned_window.winfo_width() // 2, 0))
+
+        # Fill the handle caches (and their name indexes) before any picker is shown
+        self._refresh_character_cache()
+        self._refresh_npc_cache()
         
         self._redisplay_panes(None, None)
         
         loader_thread = threading.Thread(target=self._background_preload_controllers, daemon=True)
         loader_thread.start()
 
+        self.root.after(WAL_CHECKPOINT_INTERVAL_MS, self._periodic_wal_checkpoint)
+        self.root.after(EXTERNAL_CHANGE_POLL_MS, self._poll_external_changes)
+
         print(f"Deferred rendering done in {time.time() - startTime:.4f} seconds")
 
+    def _periodic_wal_checkpoint(self):
+        """Keeps the WAL file small while a campaign is open."""
+        if not self.is_editor_active or not self.current_campaign_path:
+            return
+        session = get_campaign_session(self.current_campaign_path)
+        if session:
+            session.checkpoint()
+        self.root.after(WAL_CHECKPOINT_INTERVAL_MS, self._periodic_wal_checkpoint)
+
     def _background_preload_controllers(self):
         print("\n--- Starting background controller pre-loading ---")
         time.sleep(0.5)
@@ -264,17 +345,198 @@ class AppController:
         
         return feature
 
-    def _reload_character_cache(self):
-        if not self.ruleset_data: return
-        char_cache_key = f"characters_models_{self.ruleset_data['name']}"
-        char_models = CharacterModel.get_all_for_ruleset(self.current_campaign_path, self.ruleset_data['name'])
-        self.set_cached_data(char_cache_key, sorted(char_models, key=lambda m: m.name))
-
-    def _reload_npc_cache(self):
-        if not self.ruleset_data: return
-        npc_cache_key = f"npcs_models_{self.ruleset_data['name']}"
-        npc_models = NpcModel.get_all_for_ruleset(self.current_campaign_path, self.ruleset_data['name'])
-        self.set_cached_data(npc_cache_key, sorted(npc_models, key=lambda m: m.name))
+    def _refresh_character_cache(self):
+        """Brings the cached character list up to date. Returns True if it changed."""
+        if not self.ruleset_data: return False
+        return self._refresh_entity_cache(f"characters_models_{self.ruleset_data['name']}", CharacterModel, "character")
+
+    def _refresh_npc_cache(self):
+        """Brings the cached NPC list up to date. Returns True if it changed."""
+        if not self.ruleset_data: return False
+        return self._refresh_entity_cache(f"npcs_models_{self.ruleset_data['name']}", NpcModel, "npc")
+
+    def _refresh_entity_cache(self, cache_key, model_class, kind):
+        """
+        Loads a ruleset's (id, name, rule_set) handles once, then only re-reads the rows
+        recorded in the change log since the cache's last revision. The kind's name index
+        follows the same deltas.
+        """
+        name_index = self.name_indexes[kind]
+        rule_set_name = self.ruleset_data['name']
+        with self._entity_cache_lock:
+            cache = self.entity_caches.get(cache_key)
+            if cache is None:
+                cache = EntityCache(id_key=lambda handle: handle.id, sort_key=lambda handle: handle.name)
+                revision = self._current_db_revision()
+                cache.reset(model_class.get_handles_for_ruleset(self.current_campaign_path, rule_set_name), revision)
+                name_index.reset((handle.id, handle.name) for handle in cache.items)
+                self.entity_caches[cache_key] = cache
+                self.set_cached_data(cache_key, cache.items)
+                return True
+            changed_ids, handles, revision = model_class.get_handle_changes_since(
+                self.current_campaign_path, rule_set_name, cache.revision
+            )
+            # Instances shared through the identity map are updated in place, except ones being edited
+            model_class.refresh_loaded(self.current_campaign_path, changed_ids, keep=self._open_sheet_models())
+            for handle in handles:
+                previous = cache.get(handle.id)
+                if previous is not None:
+                    handle.keep_model_of(previous)
+            # A rename shows up as a delete of the old id plus a write of the new one
+            for entity_id in changed_ids:
+                name_index.remove(entity_id)
+            for handle in handles:
+                name_index.add(handle.id, handle.name)
+            return cache.apply(changed_ids, handles, revision)
+
+    def _open_sheet_models(self):
+        """The character and NPC currently shown on a sheet, whose in-progress edits a refresh must not overwrite."""
+        models = []
+        for controller_class, attribute in ((CharacterController, "current_character"), (NpcController, "current_npc")):
+            controller = self.get_loaded_controller(controller_class)
+            model = getattr(controller, attribute, None) if controller else None
+            if model is not None:
+                models.append(model)
+        return models
+
+    def get_stat_table(self):
+        """
+        The ruleset's StatTable, built on first use and brought up to date with the change
+        log on every call. None without a ruleset or if numpy is not installed.
+        """
+        if stat_table.np is None or not self.ruleset_data or not self.current_campaign_path:
+            return None
+        if self.stat_table is None:
+            self.stat_table = stat_table.StatTable.build(
+                self.current_campaign_path, self.ruleset_data, self._current_db_revision()
+            )
+        else:
+            self.stat_table.sync()
+        return self.stat_table
+
+    def search_names(self, kind, text, limit=DEFAULT_MATCH_LIMIT):
+        """Type-ahead lookup: up to `limit` names of a kind ("character", "npc", "item", "map") matching `text`."""
+        return [name for key, name in self.name_indexes[kind].search(text, limit)]
+
+    def get_entity_handle(self, cache_key, entity_id):
+        """Returns the cached handle for a character/NPC id, or None if it is not cached."""
+        cache = self.entity_caches.get(cache_key)
+        return cache.get(entity_id) if cache else None
+
+    def get_item_catalog(self):
+        """The campaign's ItemCatalog, loaded on first use (whether or not the Items feature is open)."""
+        if self.item_catalog is None:
+            self.item_catalog = ItemCatalog(self.current_campaign_path)
+            self.item_catalog.subscribe(self._on_item_catalog_changed)
+            self.item_catalog.load()
+        return self.item_catalog
+
+    def get_item_search(self):
+        """
+        The FuzzyIndex over the catalog's items, kept in step with it. It is built on a background
+        thread once the catalog loads; until then the item PrefixIndex (same `search`) is returned.
+        """
+        self.get_item_catalog()
+        if self.item_search is None and self._item_search_build:
+            results, deltas = self._item_search_build
+            try:
+                index = results.get_nowait()
+            except queue.Empty:
+                return self.name_indexes["item"]
+            for event, payload in deltas:
+                self._apply_item_search_delta(index, event, payload)
+            self.item_search, self._item_search_build = index, None
+        return self.item_search if self.item_search is not None else self.name_indexes["item"]
+
+    def search_items(self, text, limit=DEFAULT_MATCH_LIMIT):
+        """Item search for the dialogs: fuzzy once the background index is ready, by name prefix until then."""
+        return self.get_item_search().search(text, limit)
+
+    def _start_item_search_build(self):
+        """Indexes a snapshot of the catalog off the Tk thread (a large catalog takes seconds)."""
+        entries = [(item_id, item['name'], self._item_search_text(item)) for item_id, item in self.item_catalog.items_by_id.items()]
+        results = queue.Queue(maxsize=1)
+        # A newer build, or the session closing, replaces this tuple, so a stale result is never used
+        self._item_search_build = (results, [])
+        threading.Thread(target=lambda: results.put(FuzzyIndex(entries)), name="ItemSearchBuild", daemon=True).start()
+
+    @staticmethod
+    def _item_search_text(item):
+        return f"{item.get('type') or ''} {item.get('description') or ''}"
+
+    def _on_item_catalog_changed(self, event, payload):
+        """Keeps the item name index and fuzzy search in step with the catalog's deltas."""
+        name_index = self.name_indexes["item"]
+        if event == CATALOG_RELOADED:
+            name_index.reset((item_id, item['name']) for item_id, item in self.item_catalog.items_by_id.items())
+            self.item_search = None
+            self._start_item_search_build()
+            return
+        if event == CATALOG_SAVED:
+            for item in payload:
+                name_index.add(item['id'], item['name'])
+        elif event == CATALOG_DELETED:
+            for item_id in payload:
+                name_index.remove(item_id)
+        if self.item_search is not None:
+            self._apply_item_search_delta(self.item_search, event, payload)
+        elif self._item_search_build:
+            # The index being built is a snapshot from before this change
+            self._item_search_build[1].append((event, list(payload)))
+
+    def _apply_item_search_delta(self, index, event, payload):
+        if event == CATALOG_SAVED:
+            for item in payload:
+                index.add(item['id'], item['name'], self._item_search_text(item))
+        elif event == CATALOG_DELETED:
+            for item_id in payload:
+                index.remove(item_id)
+
+    def get_effective_stats(self, entity):
+        """A character's or NPC's stats with its equipped items and derived stats applied, cached by the stat engine."""
+        catalog = self.get_item_catalog()
+        return self.stat_engine.effective_stats(entity, catalog.items_by_id, catalog.revision, self.formula_engine)
+
+    def set_item_equipped(self, entity, inv_entry, equipped):
+        """Equips or unequips one inventory entry, updating the cached effective stats incrementally."""
+        catalog = self.get_item_catalog()
+        self.stat_engine.set_equipped(entity, inv_entry, equipped, catalog.items_by_id, catalog.revision, self.formula_engine)
+
+    def _current_db_revision(self):
+        db = Database(self.current_campaign_path)
+        db.connect()
+        try:
+            return db.current_revision()
+        finally:
+            db.close()
+
+    def _poll_external_changes(self):
+        """Picks up characters/NPCs and items written by other connections (e.g. a migration script)."""
+        if not self.is_editor_active or not self.current_campaign_path:
+            return
+        if get_campaign_session(self.current_campaign_path):
+            db = Database(self.current_campaign_path)
+            db.connect()
+            try:
+                data_version = db.data_version()
+                revision = db.current_revision()
+            finally:
+                db.close()
+            # data_version also moves when our own writer commits; those saves are already applied
+            external = (
+                self._last_data_version is not None and data_version != self._last_data_version
+                and not (self.db_writer and self.db_writer.wrote_changes(self._last_poll_revision, revision))
+            )
+            if external:
+                characters_changed = self._refresh_character_cache()
+                npcs_changed = self._refresh_npc_cache()
+                if characters_changed or npcs_changed:
+                    self._update_character_and_npc_lists()
+                if self.item_catalog:
+                    self.item_catalog.sync()
+            self._last_data_version = data_version
+            self._last_poll_revision = revision
+        self.root.after(EXTERNAL_CHANGE_POLL_MS, self._poll_external_changes)
 
     def toggle_pin(self, pane):
         if pane == "left":
@@ -403,6 +665,7 @@ class AppController:
         self.unsaved_changes = is_dirty
 
     def confirm_exit_to_main_menu(self):
+        self.flush_writes()
         if not self.unsaved_changes:
             self.show_main_menu()
             return
@@ -424,11 +687,13 @@ class AppController:
         dialog = NewCampaignDialog(parent=self.root, rulesets=rulesets)
         result = dialog.get_input()
         if not result: return
-        campaign_name, ruleset_name = result
+        campaign_name, ruleset_name, db_profile = result
         self._cleanup_editor_session()
-        path = self.campaign_model.create_campaign(campaign_name, ruleset_name)
+        path = self.campaign_model.create_campaign(campaign_name, ruleset_name, db_profile)
         if path:
             self.current_campaign_path = path
+            open_campaign_session(path, self.campaign_model.get_campaign_db_pragmas(campaign_name), self._report_migration_progress)
+            self._start_db_writer()
             self._show_editor()
         else:
             MessageBox.showerror("Error", f"A campaign named '{campaign_name}' already exists.", self.root)
@@ -443,11 +708,49 @@ class AppController:
         self.current_campaign_path = os.path.join(self.campaign_model.base_dir, campaign_name)
         
         if os.path.exists(self.current_campaign_path):
+            # Open the campaign database once; models borrow its connections for the whole session
+            open_campaign_session(
+                self.current_campaign_path, self.campaign_model.get_campaign_db_pragmas(campaign_name),
+                self._report_migration_progress
+            )
+            self._start_db_writer()
             self._show_editor()
         else:
             MessageBox.showerror("Error", f"Could not find campaign data for '{campaign_name}'.", self.root)
             self.current_campaign_path = None
 
+    def _start_db_writer(self):
+        self.db_writer = DatabaseWriter(self.root, self.current_campaign_path, on_error=self._show_write_error)
+        self.db_writer.start()
+
+    def _show_write_error(self, error):
+        MessageBox.showerror("Save Failed", f"Your changes could not be written to the campaign database:\n{error}", self.root)
+
+    def is_read_only(self):
+        """True if the open campaign uses the read-only viewer profile."""
+        session = get_campaign_session(self.current_campaign_path) if self.current_campaign_path else None
+        return bool(session and session.is_read_only)
+
+    def ensure_writable(self, parent=None):
+        """
+        Returns True if the campaign may be changed. In the read-only viewer profile, says so
+        and returns False, so save/delete/generate actions stop before queueing a doomed write.
+        """
+        if not self.is_read_only():
+            return True
+        MessageBox.showinfo("Read-only", "This campaign was opened with the read-only viewer profile; changes cannot be saved.", parent or self.root)
+        return False
+
+    def flush_writes(self):
+        """Waits for every queued save to reach the database (used before reads that must see them)."""
+        if self.db_writer:
+            self.db_writer.flush()
+
+    def _report_migration_progress(self, message, done, total):
+        """Shows schema migration progress while an older campaign is upgraded on load."""
+        print(f"  - {message}: {done}/{total}")
+        self.root.update_idletasks()
+
     def show_ruleset_creator_standalone(self):
         ruleset_window = RulesEditorWindow(self.root)
         standalone_rules_controller = RulesController(self)
@@ -458,14 +761,17 @@ class AppController:
         MessageBox.showinfo("Not Implemented", "This feature is not yet available.", self.root)
 
     def exit_app(self):
+        self.flush_writes()
         self._cleanup_editor_session()
         self.root.quit()
         self.root.destroy()
         
     def on_character_or_npc_list_changed(self):
-        self._reload_character_cache()
-        self._reload_npc_cache()
+        self._refresh_character_cache()
+        self._refresh_npc_cache()
+        self._update_character_and_npc_lists()
 
+    def _update_character_and_npc_lists(self):
         for feature in self.feature_cache.values():
             if feature['controller']:
                 content = feature['controller']
@@ -0,0 +1,80 @@
+"""
+Measures the in-memory footprint of NPC models, built the way loading from the database
+builds them (from decoded JSON dicts), against the previous plain-attribute layout.
+
+Usage (from the project root): python benchmarks/entity_memory_benchmark.py [npc count]
+"""
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from npc.npc_model import NpcModel
+from rules.rules_model import RulesModel
+
+RULESET_NAME = "D&D 5e"
+CAMPAIGN_PATH = os.path.join("campaigns", "benchmark")
+
+
+class DictNpc:
+    """The pre-slots NpcModel layout: an instance __dict__ and stats kept as decoded strings."""
+    def __init__(self, campaign_path, data):
+        self.campaign_path = campaign_path
+        self.name = data['name']
+        self.rule_set_name = data['rule_set']
+        self.attributes = data.get('attributes', {})
+        self.skills = data.get('skills', {})
+        self.inventory = data.get('inventory', [])
+        self.gm_notes = data.get('gm_notes', "")
+        self.current_hp = data.get('current_hp')
+
+
+def make_payloads(rule_set, count):
+    """Serialized NPCs, as they come out of the data column."""
+    rng = random.Random(42)
+    payloads = []
+    for i in range(count):
+        payloads.append(json.dumps({
+            "name": f"Benchmark NPC {i}", "rule_set": RULESET_NAME,
+            "attributes": {attr: str(rng.randint(3, 18)) for attr in rule_set['attributes']},
+            "skills": {skill: str(rng.randint(0, 10)) for skill in rule_set['skills']},
+            "inventory": [], "gm_notes": "", "current_hp": str(rng.randint(1, 40)),
+        }))
+    return payloads
+
+
+def measure(build, payloads):
+    """Returns the bytes allocated per entity when building one entity per payload."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entities = [build(json.loads(payload)) for payload in payloads]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    per_entity = (after - before) / len(entities)
+    del entities
+    gc.collect()
+    return per_entity
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rule_set = RulesModel().load_rule_set(RULESET_NAME)
+    payloads = make_payloads(rule_set, count)
+    print(f"{count} NPCs, ruleset {RULESET_NAME} "
+          f"({len(rule_set['attributes'])} attributes, {len(rule_set['skills'])} skills)")
+    layouts = (
+        ("dict", lambda data: DictNpc(CAMPAIGN_PATH, data)),
+        ("slots", lambda data: NpcModel.from_dict(CAMPAIGN_PATH, data)),
+    )
+    for label, build in layouts:
+        per_entity = measure(build, payloads)
+        print(f"{label:<6} {per_entity:>8.0f} bytes/entity {per_entity * count / 1024 / 1024:>8.1f}MB total")
+
+
+if __name__ == '__main__':
+    main()
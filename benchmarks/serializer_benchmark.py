@@ -0,0 +1,101 @@
+"""
+Compares the JSON and binary entity serializers on a synthetic campaign.
+
+Usage (from the project root): python benchmarks/serializer_benchmark.py [npc count]
+"""
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import open_campaign_session, close_campaign_session, Database
+from npc.npc_model import NpcModel
+from rules.rules_model import RulesModel
+from serialization import SERIALIZER_FORMATS, get_serializer, forget_serializer
+
+RULESET_NAME = "D&D 5e"
+
+
+def make_npcs(campaign_path, rule_set, count):
+    rng = random.Random(42)
+    npcs = []
+    for i in range(count):
+        npc = NpcModel(campaign_path, f"Benchmark NPC {i}", RULESET_NAME)
+        npc.attributes = {attr: str(rng.randint(3, 18)) for attr in rule_set['attributes']}
+        npc.skills = {skill: str(rng.randint(0, 10)) for skill in rule_set['skills']}
+        npc.inventory = [
+            {"item_id": f"{rng.getrandbits(128):032x}", "quantity": 1, "equipped": rng.random() < 0.5}
+            for _ in range(rng.randint(0, 4))
+        ]
+        npc.gm_notes = "Guards the northern gate." if i % 3 == 0 else ""
+        npcs.append(npc)
+    return npcs
+
+
+def run(serializer_format, rule_set, count):
+    campaign_path = tempfile.mkdtemp(prefix=f"serializer_{serializer_format}_")
+    try:
+        with open(os.path.join(campaign_path, "campaign.json"), 'w') as f:
+            json.dump({"ruleset": RULESET_NAME, "serializer": serializer_format}, f)
+        open_campaign_session(campaign_path)
+        npcs = make_npcs(campaign_path, rule_set, count)
+        db = Database(campaign_path)
+        db.connect()
+        serializer = get_serializer(db)
+        db.close()
+
+        documents = [npc.to_dict() for npc in npcs]
+        start = time.perf_counter()
+        payloads = [serializer.dumps(data) for data in documents]
+        encode_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for tag, payload in payloads:
+            serializer.loads(tag, payload)
+        decode_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        NpcModel.save_many(campaign_path, npcs)
+        save_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        loaded = NpcModel.get_all_for_ruleset(campaign_path, RULESET_NAME)
+        load_time = time.perf_counter() - start
+        assert len(loaded) == count
+
+        db.connect()
+        data_bytes = db.fetchone("SELECT SUM(LENGTH(data)) FROM npcs")[0]
+        db.close()
+        close_campaign_session()
+        # Fold the WAL into the main file and compact it so the file size is comparable
+        db.connect()
+        db.conn.execute("VACUUM")
+        db.close()
+        file_size = os.path.getsize(os.path.join(campaign_path, "campaign.db"))
+        return encode_time, decode_time, save_time, load_time, data_bytes, file_size
+    finally:
+        close_campaign_session()
+        forget_serializer(campaign_path)
+        shutil.rmtree(campaign_path, ignore_errors=True)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rule_set = RulesModel().load_rule_set(RULESET_NAME)
+    print(f"{count} NPCs, ruleset {RULESET_NAME}")
+    print(f"{'format':<8} {'encode':>9} {'decode':>9} {'save':>9} {'load':>9} {'data':>10} {'db file':>10}")
+    for serializer_format in SERIALIZER_FORMATS:
+        encode_time, decode_time, save_time, load_time, data_bytes, file_size = run(serializer_format, rule_set, count)
+        print(
+            f"{serializer_format:<8} {encode_time:>8.3f}s {decode_time:>8.3f}s {save_time:>8.3f}s {load_time:>8.3f}s "
+            f"{data_bytes / 1024:>8.0f}KB {file_size / 1024:>8.0f}KB"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,8 @@
 import os
 import json
 from utils import resource_path # Import the helper
-from database import Database
+from database import Database, DEFAULT_DB_PROFILE, resolve_db_pragmas
+from serialization import DEFAULT_SERIALIZER_FORMAT, forget_serializer
 
 class CampaignModel:
     """Manages the creation and listing of campaign save files."""
@@ -15,7 +16,7 @@ class CampaignModel:
         """Returns a list of all existing campaign names."""
         return sorted([d for d in os.listdir(self.base_dir) if os.path.isdir(os.path.join(self.base_dir, d))])
 
-    def create_campaign(self, name, ruleset_name):
+    def create_campaign(self, name, ruleset_name, db_profile=DEFAULT_DB_PROFILE):
         """Creates the necessary directory structure for a new campaign."""
         campaign_path = os.path.join(self.base_dir, name)
         if os.path.exists(campaign_path):
@@ -31,8 +32,8 @@ class CampaignModel:
         db.connect() # This will create the file and the schema
         db.close()
 
-        # Create a metadata file to store the chosen ruleset
-        metadata = {"ruleset": ruleset_name}
+        # Create a metadata file to store the chosen ruleset and database profile
+        metadata = {"ruleset": ruleset_name, "db_profile": db_profile}
         with open(os.path.join(campaign_path, "campaign.json"), 'w') as f:
             json.dump(metadata, f, indent=4)
         
@@ -45,4 +46,47 @@ class CampaignModel:
             return None
         with open(metadata_path, 'r') as f:
             data = json.load(f)
-            return data.get("ruleset")
\ No newline at end of file
+            return data.get("ruleset")
+
+    def _read_metadata(self, name):
+        metadata_path = os.path.join(self.base_dir, name, "campaign.json")
+        if not os.path.exists(metadata_path):
+            return None
+        with open(metadata_path, 'r') as f:
+            return json.load(f)
+
+    def get_campaign_db_profile(self, name):
+        """Returns the name of the database profile a campaign uses."""
+        metadata = self._read_metadata(name) or {}
+        return metadata.get("db_profile", DEFAULT_DB_PROFILE)
+
+    def set_campaign_db_profile(self, name, db_profile):
+        """Stores a new database profile in the campaign's metadata."""
+        metadata = self._read_metadata(name)
+        if metadata is None:
+            return False
+        metadata["db_profile"] = db_profile
+        with open(os.path.join(self.base_dir, name, "campaign.json"), 'w') as f:
+            json.dump(metadata, f, indent=4)
+        return True
+
+    def get_campaign_db_pragmas(self, name):
+        """Resolves the SQLite PRAGMA settings for a campaign, including its optional overrides."""
+        metadata = self._read_metadata(name) or {}
+        return resolve_db_pragmas(metadata.get("db_profile"), metadata.get("db_settings"))
+
+    def get_campaign_serializer(self, name):
+        """Returns the format ("json" or "binary") new rows of a campaign are written in."""
+        metadata = self._read_metadata(name) or {}
+        return metadata.get("serializer", DEFAULT_SERIALIZER_FORMAT)
+
+    def set_campaign_serializer(self, name, serializer_format):
+        """Switches the format for future writes; rows already stored keep theirs."""
+        metadata = self._read_metadata(name)
+        if metadata is None:
+            return False
+        metadata["serializer"] = serializer_format
+        with open(os.path.join(self.base_dir, name, "campaign.json"), 'w') as f:
+            json.dump(metadata, f, indent=4)
+        forget_serializer(os.path.join(self.base_dir, name))
+        return True
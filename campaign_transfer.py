@@ -0,0 +1,619 @@
+"""
+Streaming export and import of a campaign's characters, NPCs, items, quests and maps.
+
+An export is a folder with one `<table>.jsonl` or `<table>.csv` file per table plus a
+manifest.json. Both directions handle one record (import: one batch) at a time, so
+memory stays flat however large the campaign is. Imported records are validated against
+the campaign's ruleset, ids that already exist are remapped (references to them in
+inventories, quest links and map tokens follow), and each batch is written in one
+transaction.
+
+Usage:
+    python campaign_transfer.py export <campaign folder> <export folder> [--format csv]
+    python campaign_transfer.py import <campaign folder> <export folder> [--on-conflict skip]
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import uuid
+from database import Database
+from rules.rules_model import RulesModel
+from character.character_model import CharacterModel
+from npc.npc_model import NpcModel
+from item.item_model import ItemModel
+from quest.quest_model import QuestModel
+
+TRANSFER_FORMAT_VERSION = 1
+FORMATS = ("jsonl", "csv")
+# Import order: items first, so inventories and quests can follow remapped item ids
+TRANSFER_TABLES = ("items", "characters", "npcs", "quests", "maps")
+# What happens to a record whose id (or, for characters/NPCs/maps, name) already exists
+CONFLICT_POLICIES = ("rename", "replace", "skip")
+IMPORT_BATCH_SIZE = 500
+EXPORT_PROGRESS_INTERVAL = 500
+MAX_REPORTED_ERRORS = 100
+QUEST_STATUSES = ("Active", "Inactive", "Completed", "Failed")
+MANIFEST_FILE = "manifest.json"
+
+# CSV layout: plain columns, plus columns holding JSON (lists, dicts). Character and NPC
+# stats get one column each, "attribute:<name>" / "skill:<name>", so they edit nicely.
+_CSV_COLUMNS = {
+    "items": ["id", "name", "type", "description", "modifiers"],
+    "characters": ["name", "rule_set", "current_hp", "inventory"],
+    "npcs": ["name", "rule_set", "current_hp", "gm_notes", "inventory"],
+    "quests": ["id", "title", "status", "description", "objectives", "linked_npcs", "linked_items"],
+    "maps": ["name", "width", "height", "grid_size", "grid_scale", "map_type", "levels"],
+}
+_CSV_JSON_COLUMNS = {"modifiers", "inventory", "objectives", "linked_npcs", "linked_items", "levels"}
+_CSV_NUMBER_COLUMNS = {"width", "height", "grid_size", "grid_scale"}
+ATTRIBUTE_PREFIX = "attribute:"
+SKILL_PREFIX = "skill:"
+
+
+class TransferError(ValueError):
+    """A record that cannot be imported (malformed, or not valid for the campaign's ruleset)."""
+
+
+class ImportReport:
+    """Per-table counts of an import plus the first MAX_REPORTED_ERRORS rejected records."""
+    def __init__(self):
+        self.imported = {}
+        self.renamed = {}
+        self.skipped = {}
+        self.errors = []
+        self.error_count = 0
+
+    def count(self, counter, table, amount=1):
+        counter[table] = counter.get(table, 0) + amount
+
+    def add_error(self, table, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((table, line, message))
+
+    def summary(self):
+        lines = []
+        for table in TRANSFER_TABLES:
+            if table in self.imported or table in self.skipped:
+                lines.append(f"{table}: {self.imported.get(table, 0)} imported "
+                             f"({self.renamed.get(table, 0)} renamed), {self.skipped.get(table, 0)} skipped")
+        if self.error_count:
+            lines.append(f"{self.error_count} invalid record(s):")
+            lines.extend(f"  {table} line {line}: {message}" for table, line, message in self.errors)
+            if self.error_count > len(self.errors):
+                lines.append(f"  ... and {self.error_count - len(self.errors)} more")
+        return "\n".join(lines)
+
+
+def _no_progress(message, done, total):
+    pass
+
+
+def _print_progress(message, done, total):
+    print(f"  - {message}: {done}/{total if total is not None else '?'}")
+
+
+def load_campaign_rule_set(campaign_path):
+    """The ruleset named in a campaign folder's campaign.json, or None."""
+    metadata_path = os.path.join(campaign_path, "campaign.json")
+    if not os.path.exists(metadata_path):
+        return None
+    with open(metadata_path, 'r') as f:
+        ruleset_name = json.load(f).get("ruleset")
+    return RulesModel().load_rule_set(ruleset_name) if ruleset_name else None
+
+
+def _entity_id(name):
+    """Characters and NPCs are keyed by their name (see EntityModel.get_id)."""
+    return name.lower().replace(' ', '_')
+
+
+def _map_file_name(name):
+    return f"{name.lower().replace(' ', '_')}.json"
+
+
+# --- Export ---
+
+def _count_rows(campaign_path, table, rule_set_name):
+    db = Database(campaign_path)
+    db.connect()
+    try:
+        if table in ("characters", "npcs"):
+            return db.fetchone(f"SELECT COUNT(*) FROM {table} WHERE rule_set = ?", (rule_set_name,))[0]
+        return db.fetchone(f"SELECT COUNT(*) FROM {table}")[0]
+    finally:
+        db.close()
+
+
+def _map_files(campaign_path):
+    maps_dir = os.path.join(campaign_path, 'maps')
+    if not os.path.isdir(maps_dir):
+        return []
+    return sorted(os.path.join(maps_dir, f) for f in os.listdir(maps_dir) if f.endswith('.json'))
+
+
+def iter_records(campaign_path, table, rule_set_name):
+    """Yields a table's records as the dicts the models save, one page in memory at a time."""
+    if table == "items":
+        yield from ItemModel(campaign_path).stream_all()
+    elif table == "quests":
+        yield from QuestModel(campaign_path).stream_all()
+    elif table == "characters":
+        yield from (model.to_dict() for model in CharacterModel.stream_all(campaign_path, rule_set_name))
+    elif table == "npcs":
+        yield from (model.to_dict() for model in NpcModel.stream_all(campaign_path, rule_set_name))
+    elif table == "maps":
+        for path in _map_files(campaign_path):
+            with open(path, 'r') as f:
+                yield json.load(f)
+    else:
+        raise ValueError(f"Unknown table '{table}'")
+
+
+def _csv_columns(table, rule_set):
+    columns = list(_CSV_COLUMNS[table])
+    if table in ("characters", "npcs"):
+        columns += [ATTRIBUTE_PREFIX + stat for stat in rule_set.get('attributes', [])]
+        columns += [SKILL_PREFIX + stat for stat in rule_set.get('skills', {})]
+    return columns
+
+
+def _to_csv_row(table, record):
+    row = {}
+    for column in _CSV_COLUMNS[table]:
+        value = record.get(column)
+        row[column] = json.dumps(value) if column in _CSV_JSON_COLUMNS else ("" if value is None else value)
+    if table in ("characters", "npcs"):
+        row.update((ATTRIBUTE_PREFIX + stat, value) for stat, value in record.get('attributes', {}).items())
+        row.update((SKILL_PREFIX + stat, value) for stat, value in record.get('skills', {}).items())
+    return row
+
+
+def export_campaign(campaign_path, out_dir, fmt="jsonl", tables=TRANSFER_TABLES, rule_set=None, progress=None):
+    """
+    Writes each table to `<out_dir>/<table>.<fmt>` plus a manifest, streaming row by row.
+    Only the characters and NPCs of the campaign's ruleset are exported (the editor shows
+    no others). `progress(message, done, total)` is called as rows are written.
+    Returns {table: records written}.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'")
+    rule_set = rule_set or load_campaign_rule_set(campaign_path)
+    if rule_set is None:
+        raise ValueError(f"Could not find the ruleset of the campaign at '{campaign_path}'.")
+    report = progress or _no_progress
+    os.makedirs(out_dir, exist_ok=True)
+    counts = {}
+    for table in tables:
+        message = f"Exporting {table}"
+        total = len(_map_files(campaign_path)) if table == "maps" else _count_rows(campaign_path, table, rule_set['name'])
+        report(message, 0, total)
+        path = os.path.join(out_dir, f"{table}.{fmt}")
+        done = 0
+        with open(path, 'w', newline='' if fmt == "csv" else None, encoding='utf-8') as f:
+            if fmt == "csv":
+                writer = csv.DictWriter(f, fieldnames=_csv_columns(table, rule_set), extrasaction='ignore')
+                writer.writeheader()
+            for record in iter_records(campaign_path, table, rule_set['name']):
+                if fmt == "csv":
+                    writer.writerow(_to_csv_row(table, record))
+                else:
+                    f.write(json.dumps(record) + "\n")
+                done += 1
+                if done % EXPORT_PROGRESS_INTERVAL == 0:
+                    report(message, done, total)
+        report(message, done, total)
+        counts[table] = done
+
+    manifest = {
+        "format_version": TRANSFER_FORMAT_VERSION, "format": fmt,
+        "ruleset": rule_set['name'], "tables": counts,
+    }
+    with open(os.path.join(out_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=4)
+    return counts
+
+
+# --- Reading export files ---
+
+def _from_csv_row(table, row):
+    record = {}
+    attributes, skills = {}, {}
+    for column, value in row.items():
+        if column is None:
+            raise TransferError("Row has more cells than the header.")
+        if column.startswith(ATTRIBUTE_PREFIX):
+            if value not in (None, ""):
+                attributes[column[len(ATTRIBUTE_PREFIX):]] = value
+        elif column.startswith(SKILL_PREFIX):
+            if value not in (None, ""):
+                skills[column[len(SKILL_PREFIX):]] = value
+        elif column in _CSV_JSON_COLUMNS:
+            try:
+                record[column] = json.loads(value) if value else None
+            except json.JSONDecodeError:
+                raise TransferError(f"Column '{column}' is not valid JSON.") from None
+        elif column in _CSV_NUMBER_COLUMNS:
+            if not value:
+                continue
+            try:
+                record[column] = float(value) if "." in value else int(value)
+            except (TypeError, ValueError):
+                raise TransferError(f"Column '{column}' is not a number.") from None
+        elif value != "":
+            record[column] = value
+    if table in ("characters", "npcs"):
+        record['attributes'] = attributes
+        record['skills'] = skills
+    return record
+
+
+def read_records(path, table):
+    """
+    Yields (line number, record, error) for each record of an export file; a record that
+    cannot be parsed comes back as (line, None, error) so the import can report and skip it.
+    """
+    if path.endswith(".csv"):
+        # Map levels easily exceed csv's default 128 KiB cell limit
+        csv.field_size_limit(2 ** 31 - 1)
+        with open(path, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                try:
+                    yield reader.line_num, _from_csv_row(table, row), None
+                except TransferError as e:
+                    yield reader.line_num, None, str(e)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_number, None, f"Not valid JSON: {e.msg}"
+                    continue
+                if not isinstance(record, dict):
+                    yield line_number, None, "Not a JSON object."
+                    continue
+                yield line_number, record, None
+
+
+def _find_table_file(in_dir, table):
+    for fmt in FORMATS:
+        path = os.path.join(in_dir, f"{table}.{fmt}")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+# --- Validation ---
+
+def _require_text(record, key):
+    value = record.get(key)
+    if not isinstance(value, str) or not value.strip():
+        raise TransferError(f"'{key}' is missing or empty.")
+    return value.strip()
+
+
+def _require_list(record, key):
+    value = record.get(key)
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        raise TransferError(f"'{key}' must be a list.")
+    return value
+
+
+def _validate_stats(record, key, known, kind):
+    stats = record.get(key) or {}
+    if not isinstance(stats, dict):
+        raise TransferError(f"'{key}' must be an object.")
+    unknown = [stat for stat in stats if stat not in known]
+    if unknown:
+        raise TransferError(f"Unknown {kind}(s) for this ruleset: {', '.join(unknown)}.")
+    for stat, value in stats.items():
+        if not isinstance(value, (str, int, float)) or isinstance(value, bool):
+            raise TransferError(f"{kind.capitalize()} '{stat}' has an invalid value.")
+    return {stat: str(value) for stat, value in stats.items()}
+
+
+def validate_record(table, record, rule_set):
+    """Checks a record against the ruleset and returns it normalized; raises TransferError."""
+    if table in ("characters", "npcs"):
+        data = {'name': _require_text(record, 'name')}
+        rule_set_name = record.get('rule_set') or rule_set['name']
+        if rule_set_name != rule_set['name']:
+            raise TransferError(f"Belongs to ruleset '{rule_set_name}', not '{rule_set['name']}'.")
+        data['rule_set'] = rule_set_name
+        data['attributes'] = _validate_stats(record, 'attributes', set(rule_set.get('attributes', [])), "attribute")
+        data['skills'] = _validate_stats(record, 'skills', set(rule_set.get('skills', {})), "skill")
+        inventory = _require_list(record, 'inventory')
+        for entry in inventory:
+            if not isinstance(entry, dict) or not entry.get('item_id'):
+                raise TransferError("Every inventory entry needs an 'item_id'.")
+        data['inventory'] = inventory
+        current_hp = record.get('current_hp')
+        data['current_hp'] = str(current_hp) if current_hp not in (None, "") else data['attributes'].get("Hit Points", "10")
+        if table == "npcs":
+            data['gm_notes'] = str(record.get('gm_notes') or "")
+        return data
+
+    if table == "items":
+        # Items may also modify derived stats (e.g. armor lowering "Dodge Chance")
+        known_stats = (set(rule_set.get('attributes', [])) | set(rule_set.get('skills', {}))
+                       | set(rule_set.get('formulas') or {}))
+        modifiers = _require_list(record, 'modifiers')
+        for modifier in modifiers:
+            if not isinstance(modifier, dict) or modifier.get('stat') not in known_stats:
+                raise TransferError(f"Modifier {modifier!r} is not for a stat of this ruleset.")
+            if not isinstance(modifier.get('value'), int) or isinstance(modifier.get('value'), bool):
+                raise TransferError(f"Modifier for '{modifier['stat']}' needs a whole-number value.")
+        return {
+            'id': str(record.get('id') or uuid.uuid4()), 'name': _require_text(record, 'name'),
+            'description': str(record.get('description') or ""), 'type': str(record.get('type') or "Miscellaneous"),
+            'modifiers': modifiers,
+        }
+
+    if table == "quests":
+        status = record.get('status') or "Inactive"
+        if status not in QUEST_STATUSES:
+            raise TransferError(f"Unknown quest status '{status}'.")
+        objectives = _require_list(record, 'objectives')
+        for objective in objectives:
+            if not isinstance(objective, dict) or not isinstance(objective.get('text', ""), str):
+                raise TransferError("Every objective needs a 'text'.")
+        return {
+            'id': str(record.get('id') or uuid.uuid4()), 'title': _require_text(record, 'title'), 'status': status,
+            'description': str(record.get('description') or ""),
+            'objectives': [{'text': objective.get('text', ""), 'completed': bool(objective.get('completed'))}
+                           for objective in objectives],
+            'linked_npcs': [str(npc_id) for npc_id in _require_list(record, 'linked_npcs')],
+            'linked_items': [str(item_id) for item_id in _require_list(record, 'linked_items')],
+        }
+
+    if table == "maps":
+        data = {'name': _require_text(record, 'name')}
+        for key in ("width", "height"):
+            if not isinstance(record.get(key), int) or record[key] <= 0:
+                raise TransferError(f"'{key}' must be a positive whole number.")
+            data[key] = record[key]
+        data['grid_size'] = record.get('grid_size') or 20
+        data['grid_scale'] = record.get('grid_scale') or 1.5
+        data['map_type'] = record.get('map_type') or "outside"
+        levels = record.get('levels') or {"0": {'elements': [], 'tokens': [], 'landmarks': []}}
+        if not isinstance(levels, dict):
+            raise TransferError("'levels' must be an object.")
+        for level, level_data in levels.items():
+            if not str(level).lstrip('-').isdigit() or not isinstance(level_data, dict):
+                raise TransferError(f"Level '{level}' is malformed.")
+            for key in ('elements', 'tokens', 'landmarks'):
+                level_data[key] = _require_list(level_data, key)
+        data['levels'] = levels
+        return data
+
+    raise ValueError(f"Unknown table '{table}'")
+
+
+# --- Import ---
+
+class _Importer:
+    """The state of one import: id remappings so far, the report and the write batches."""
+    def __init__(self, campaign_path, rule_set, on_conflict, batch_size, report, progress):
+        self.campaign_path = campaign_path
+        self.rule_set = rule_set
+        self.on_conflict = on_conflict
+        self.batch_size = batch_size
+        self.report = report
+        self.progress = progress
+        # table -> {id (or name) in the file: id (or name) it was imported as}, for renamed records only
+        self.remapped = {table: {} for table in TRANSFER_TABLES}
+
+    def run(self, table, path, total):
+        message = f"Importing {table}"
+        self.progress(message, 0, total)
+        done = 0
+        batch = []
+        for line, record, error in read_records(path, table):
+            if error is None:
+                try:
+                    batch.append((line, validate_record(table, record, self.rule_set)))
+                except TransferError as e:
+                    error = str(e)
+            if error is not None:
+                self.report.add_error(table, line, error)
+                self.report.count(self.report.skipped, table)
+            done += 1
+            if len(batch) >= self.batch_size:
+                self._flush(table, batch)
+                batch = []
+                self.progress(message, done, total)
+        if batch:
+            self._flush(table, batch)
+        self.progress(message, done, total)
+
+    def _flush(self, table, batch):
+        if table == "maps":
+            records = self._resolve_map_conflicts([record for _, record in batch])
+        else:
+            records = self._resolve_conflicts(table, [record for _, record in batch])
+        records = [self._remap_references(table, record) for record in records]
+        if table == "items":
+            ItemModel(self.campaign_path).save_many(records)
+        elif table == "quests":
+            QuestModel(self.campaign_path).save_many(records)
+        elif table == "characters":
+            CharacterModel.save_many(self.campaign_path, [CharacterModel.from_dict(self.campaign_path, r) for r in records])
+            CharacterModel.refresh_loaded(self.campaign_path, [_entity_id(r['name']) for r in records])
+        elif table == "npcs":
+            NpcModel.save_many(self.campaign_path, [NpcModel.from_dict(self.campaign_path, r) for r in records])
+            NpcModel.refresh_loaded(self.campaign_path, [_entity_id(r['name']) for r in records])
+        elif table == "maps":
+            for record in records:
+                self._write_map(record)
+        self.report.count(self.report.imported, table, len(records))
+
+    def _existing_ids(self, table, ids):
+        db = Database(self.campaign_path)
+        db.connect()
+        try:
+            rows = db.fetchall_in(f"SELECT id FROM {table} WHERE id IN ({{ids}})", ids)
+        finally:
+            db.close()
+        return {row['id'] for row in rows}
+
+    def _resolve_conflicts(self, table, records):
+        """Applies the conflict policy to records whose id is already taken (in the table or this batch)."""
+        by_name = table in ("characters", "npcs")
+        key_of = (lambda record: _entity_id(record['name'])) if by_name else (lambda record: record['id'])
+        taken = self._existing_ids(table, {key_of(record) for record in records})
+        resolved = []
+        for record in records:
+            key = key_of(record)
+            if key in taken:
+                if self.on_conflict == "skip":
+                    self.report.count(self.report.skipped, table)
+                    continue
+                if self.on_conflict == "rename":
+                    self._rename(table, record, taken)
+                    self.report.count(self.report.renamed, table)
+            taken.add(key_of(record))
+            resolved.append(record)
+        return resolved
+
+    def _rename(self, table, record, taken):
+        if table in ("characters", "npcs"):
+            old_name = record['name']
+            number = 2
+            while True:
+                new_name = f"{old_name} ({number})"
+                new_id = _entity_id(new_name)
+                if new_id not in taken and not self._existing_ids(table, [new_id]):
+                    break
+                number += 1
+            record['name'] = new_name
+            # Quest links and map tokens may refer to a character or NPC by name or by id
+            self.remapped[table][old_name] = new_name
+            self.remapped[table][_entity_id(old_name)] = new_id
+        else:
+            new_id = str(uuid.uuid4())
+            self.remapped[table][record['id']] = new_id
+            record['id'] = new_id
+
+    def _resolve_map_conflicts(self, records):
+        maps_dir = os.path.join(self.campaign_path, 'maps')
+        resolved = []
+        for record in records:
+            if os.path.exists(os.path.join(maps_dir, _map_file_name(record['name']))):
+                if self.on_conflict == "skip":
+                    self.report.count(self.report.skipped, "maps")
+                    continue
+                if self.on_conflict == "rename":
+                    old_name, number = record['name'], 2
+                    while os.path.exists(os.path.join(maps_dir, _map_file_name(f"{old_name} ({number})"))):
+                        number += 1
+                    record['name'] = f"{old_name} ({number})"
+                    self.report.count(self.report.renamed, "maps")
+            resolved.append(record)
+        return resolved
+
+    def _remap_references(self, table, record):
+        items = self.remapped["items"]
+        if table in ("characters", "npcs"):
+            for entry in record['inventory']:
+                entry['item_id'] = items.get(entry['item_id'], entry['item_id'])
+        elif table == "quests":
+            npcs = self.remapped["npcs"]
+            record['linked_items'] = [items.get(item_id, item_id) for item_id in record['linked_items']]
+            record['linked_npcs'] = [npcs.get(npc_id, npc_id) for npc_id in record['linked_npcs']]
+        elif table == "maps":
+            token_kinds = {"PC": self.remapped["characters"], "NPC": self.remapped["npcs"]}
+            for level_data in record['levels'].values():
+                for token in level_data['tokens']:
+                    renamed = token_kinds.get(token.get('type'), {})
+                    token['name'] = renamed.get(token.get('name'), token.get('name'))
+        return record
+
+    def _write_map(self, record):
+        maps_dir = os.path.join(self.campaign_path, 'maps')
+        os.makedirs(maps_dir, exist_ok=True)
+        path = os.path.join(maps_dir, _map_file_name(record['name']))
+        # Written next to the target and swapped in, so a failed write never leaves half a map
+        temp_path = path + ".importing"
+        with open(temp_path, 'w') as f:
+            json.dump(record, f, indent=4)
+        os.replace(temp_path, path)
+
+
+def import_campaign(campaign_path, in_dir, tables=TRANSFER_TABLES, rule_set=None, on_conflict="rename",
+                    batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """
+    Imports the export files found in `in_dir` (JSONL or CSV, per table) into a campaign.
+    Records are validated against the campaign's ruleset; invalid ones are skipped and
+    reported. `on_conflict` decides what happens to an id that already exists: "rename"
+    (new id or "Name (2)", with references in later tables remapped), "replace" or "skip".
+    Each batch of `batch_size` records is written in one transaction, so an interrupted
+    import keeps the batches already written. Returns an ImportReport.
+    """
+    if on_conflict not in CONFLICT_POLICIES:
+        raise ValueError(f"Unknown conflict policy '{on_conflict}'")
+    rule_set = rule_set or load_campaign_rule_set(campaign_path)
+    if rule_set is None:
+        raise ValueError(f"Could not find the ruleset of the campaign at '{campaign_path}'.")
+    manifest_path = os.path.join(in_dir, MANIFEST_FILE)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get("format_version", TRANSFER_FORMAT_VERSION) > TRANSFER_FORMAT_VERSION:
+            raise ValueError(f"The export in '{in_dir}' was written by a newer version of the editor.")
+
+    report = ImportReport()
+    importer = _Importer(campaign_path, rule_set, on_conflict, max(1, batch_size), report, progress or _no_progress)
+    # Always in dependency order, whatever order `tables` lists them in
+    for table in (table for table in TRANSFER_TABLES if table in tables):
+        path = _find_table_file(in_dir, table)
+        if path:
+            importer.run(table, path, manifest.get("tables", {}).get(table))
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export or import campaign content as JSONL or CSV.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="Write a campaign's content to a folder.")
+    export_parser.add_argument("campaign", help="Campaign folder (containing campaign.db)")
+    export_parser.add_argument("folder", help="Folder to write the export files to")
+    export_parser.add_argument("--format", choices=FORMATS, default="jsonl")
+    import_parser = subparsers.add_parser("import", help="Add the content of an export folder to a campaign.")
+    import_parser.add_argument("campaign", help="Campaign folder (containing campaign.db)")
+    import_parser.add_argument("folder", help="Folder with the export files")
+    import_parser.add_argument("--on-conflict", choices=CONFLICT_POLICIES, default="rename")
+    import_parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    for subparser in (export_parser, import_parser):
+        subparser.add_argument("--tables", default=",".join(TRANSFER_TABLES),
+                               help="Comma-separated subset of: " + ", ".join(TRANSFER_TABLES))
+    args = parser.parse_args(argv)
+
+    tables = [table.strip() for table in args.tables.split(",") if table.strip()]
+    unknown = [table for table in tables if table not in TRANSFER_TABLES]
+    if unknown:
+        parser.error(f"unknown table(s): {', '.join(unknown)}")
+    try:
+        if args.command == "export":
+            counts = export_campaign(args.campaign, args.folder, args.format, tables, progress=_print_progress)
+            print("Exported " + ", ".join(f"{count} {table}" for table, count in counts.items()))
+        else:
+            report = import_campaign(args.campaign, args.folder, tables, on_conflict=args.on_conflict,
+                                     batch_size=args.batch_size, progress=_print_progress)
+            print(report.summary())
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,4 @@
+import copy
 from tkinter import messagebox
 from .character_model import CharacterModel
 from .character_view import CharacterView, AddItemDialog
@@ -14,7 +15,7 @@ class CharacterController:
         self.current_character = None
         
         # --- LAZY LOAD: Load data when controller is created ---
-        self.app_controller._reload_character_cache()
+        self.app_controller._refresh_character_cache()
 
     def get_item_controller(self):
         return self.app_controller.get_loaded_controller(ItemController)
@@ -23,6 +24,7 @@ class CharacterController:
         return self.app_controller.get_loaded_controller(QuestController)
 
     def get_character_list(self):
+        """Returns the cached, name-sorted EntityHandles of the current ruleset."""
         if self.current_rule_set:
             cache_key = f"characters_models_{self.current_rule_set['name']}"
             return self.app_controller.get_cached_data(cache_key) or []
@@ -35,16 +37,12 @@ class CharacterController:
         self.update_character_sheet_list()
 
     def update_character_sheet_list(self):
-        if self.current_rule_set:
-            characters = self.get_character_list()
-            char_names = [char.name for char in characters]
-            self.view.update_character_list(char_names)
-        else:
-            self.view.update_character_list([])
+        self.view.update_character_list()
         self.view.clear_sheet()
         self.current_character = None
 
     def save_new_character(self):
+        if not self.app_controller.ensure_writable(self.view.parent_frame): return
         if not self.current_rule_set:
             MessageBox.showerror("Error", "No rule set loaded.", self.view.parent_frame)
             return
@@ -59,16 +57,20 @@ class CharacterController:
                 char.set_attribute(key, value)
             elif key in self.current_rule_set['skills']:
                 char.set_skill(key, value)
-        char.current_hp = char.attributes.get("Hit Points", "10")
-        char.save()
-        MessageBox.showinfo("Success", f"Character '{name}' saved.", self.view.parent_frame)
-        
-        self.app_controller.on_character_or_npc_list_changed()
+        char.current_hp = char.attributes.get("Hit Points", 10)
+        self.app_controller.db_writer.submit(
+            ("characters", char.get_id()), char.save,
+            on_success=lambda: self._on_new_character_saved(name)
+        )
 
         self.view.char_name_entry.delete(0, 'end')
         for entry in self.view.char_creator_entries.values():
             entry.delete(0, 'end')
 
+    def _on_new_character_saved(self, name):
+        self.app_controller.on_character_or_npc_list_changed()
+        MessageBox.showinfo("Success", f"Character '{name}' saved.", self.view.parent_frame)
+
     def load_character_to_sheet(self, refresh=False):
         """Loads a selected character into the sheet view."""
         item_controller = self.get_item_controller()
@@ -79,7 +81,12 @@ class CharacterController:
             self.view.clear_sheet()
             return
             
-        self.current_character = CharacterModel.load(self.campaign_path, char_name)
+        # The cached handle keeps the shared instance alive, so switching sheets is a memory hit.
+        # Queued saves are snapshots of that same instance, so it already holds them: no need to wait for the writer
+        handle = self.app_controller.get_entity_handle(
+            f"characters_models_{self.current_rule_set['name']}", char_name.lower().replace(' ', '_')
+        ) if self.current_rule_set else None
+        self.current_character = handle.model if handle else CharacterModel.load(self.campaign_path, char_name)
         if not self.current_character:
             MessageBox.showerror("Error", f"Could not load character: {char_name}", self.view.parent_frame)
             return
@@ -91,6 +98,7 @@ class CharacterController:
             self.app_controller.set_dirty_flag(False)
 
     def save_character_sheet(self):
+        if not self.app_controller.ensure_writable(self.view.parent_frame): return
         if not self.current_character: return
         self.current_character.current_hp = self.view.current_hp_entry.get()
         for key, entry in self.view.char_sheet_entries.items():
@@ -103,23 +111,32 @@ class CharacterController:
                 self.current_character.set_attribute(key, base_value)
             elif key in self.current_character.skills:
                 self.current_character.set_skill(key, base_value)
-        self.current_character.save()
+        # The writer gets a snapshot, so further edits on the sheet cannot race the write
+        snapshot = copy.deepcopy(self.current_character)
+        self.current_character.mark_saved()
+        self.app_controller.db_writer.submit(
+            ("characters", snapshot.get_id()), snapshot.save,
+            on_success=lambda: MessageBox.showinfo("Success", f"Changes to '{snapshot.name}' saved.", self.view.parent_frame)
+        )
         self.app_controller.set_dirty_flag(False)
-        MessageBox.showinfo("Success", f"Changes to '{self.current_character.name}' saved.", self.view.parent_frame)
 
     def delete_current_character(self):
+        if not self.app_controller.ensure_writable(self.view.parent_frame): return
         if not self.current_character: return
         char_name = self.current_character.name
         if MessageBox.askyesno("Confirm Deletion", f"Are you sure you want to permanently delete {char_name}?", self.view.parent_frame):
-            if CharacterModel.delete(self.campaign_path, char_name):
-                MessageBox.showinfo("Deleted", f"Character '{char_name}' has been deleted.", self.view.parent_frame)
-                self.current_character = None
-                self.view.clear_sheet()
+            self.app_controller.db_writer.submit(
+                ("characters", self.current_character.get_id()),
+                lambda: CharacterModel.delete(self.campaign_path, char_name),
+                on_success=lambda: self._on_character_deleted(char_name)
+            )
+            self.current_character = None
+            self.view.clear_sheet()
+            self.app_controller.set_dirty_flag(False)
 
-                self.app_controller.on_character_or_npc_list_changed()
-                self.app_controller.set_dirty_flag(False)
-            else:
-                MessageBox.showerror("Error", f"Could not find file for character '{char_name}'.", self.view.parent_frame)
+    def _on_character_deleted(self, char_name):
+        self.app_controller.on_character_or_npc_list_changed()
+        MessageBox.showinfo("Deleted", f"Character '{char_name}' has been deleted.", self.view.parent_frame)
 
     def show_add_item_dialog(self):
         """Opens the dialog to add an item to the current character's inventory."""
@@ -130,7 +147,8 @@ class CharacterController:
             MessageBox.showerror("Error", "The 'Items' feature must be open in a pane to add items.", self.view.parent_frame)
             return
         
-        dialog = AddItemDialog(parent=self.view.parent_frame, all_items=item_controller.all_items)
+        dialog = AddItemDialog(parent=self.view.parent_frame, all_items=item_controller.all_items,
+                               search=self.app_controller.search_items)
         selected_item = dialog.get_selection()
         if selected_item:
             self.add_item_to_inventory(selected_item)
@@ -145,6 +163,7 @@ class CharacterController:
                 break
         else:
             self.current_character.inventory.append({"item_id": item_to_add["id"], "quantity": 1, "equipped": False})
+        self.current_character.touch()
         self.view.display_sheet_data(self.current_character, item_controller, self)
         self.mark_as_dirty()
 
@@ -158,6 +177,7 @@ class CharacterController:
                 if inv_entry["quantity"] <= 0:
                     self.current_character.inventory.pop(i)
                 break
+        self.current_character.touch()
         self.view.display_sheet_data(self.current_character, item_controller, self)
         self.mark_as_dirty()
 
@@ -167,7 +187,7 @@ class CharacterController:
         if not item_controller: return
         for inv_entry in self.current_character.inventory:
             if inv_entry["item_id"] == inv_entry_to_toggle["item_id"]:
-                inv_entry["equipped"] = not inv_entry.get("equipped", False)
+                self.app_controller.set_item_equipped(self.current_character, inv_entry, not inv_entry.get("equipped", False))
                 break
         self.view.display_sheet_data(self.current_character, item_controller, self)
         self.mark_as_dirty()
@@ -1,29 +1,33 @@
 import customtkinter as ctk
-from ui_extensions import AutoWidthComboBox
+from ui_extensions import TypeAheadComboBox, VirtualList, SearchEntry
+from fuzzy_index import FuzzyIndex
 from quest.quest_controller import QuestController
 
 class AddItemDialog(ctk.CTkToplevel):
-    # ... (This class is unchanged)
-    def __init__(self, parent, all_items):
+    # --- NEW: Fuzzy search box over a virtualized list; `search(text, limit)` is the app's item FuzzyIndex ---
+    MAX_MATCHES = 200
+
+    def __init__(self, parent, all_items, search=None):
         super().__init__(parent)
         self.title("Add Item to Inventory")
         self.geometry("400x500")
         self.configure(fg_color="#2B2B2B")
         self.protocol("WM_DELETE_WINDOW", self._on_cancel)
         self.selected_item = None
-        self.buttons = []
+        self.all_items = all_items
+        self.items_by_id = {item["id"]: item for item in all_items}
+        if search is None:
+            search = FuzzyIndex((item["id"], item["name"], f'{item.get("type") or ""} {item.get("description") or ""}') for item in all_items).search
+        self.search = search
         ctk.CTkLabel(self, text="Select an Item to Add", font=ctk.CTkFont(size=16)).pack(pady=10)
-        self.scroll_frame = ctk.CTkScrollableFrame(self)
-        self.scroll_frame.pack(fill="both", expand=True, padx=10, pady=5)
-        if not all_items:
-            ctk.CTkLabel(self.scroll_frame, text="No items created in this campaign yet.").pack()
-        else:
-            for item in all_items:
-                btn = ctk.CTkButton(self.scroll_frame, text=f'{item["name"]} ({item["type"]})',
-                                    command=lambda i=item: self._select(i), 
-                                    fg_color="transparent", anchor="w", border_width=1, border_color="gray50")
-                btn.pack(fill="x", pady=2)
-                self.buttons.append((btn, item))
+        if all_items:
+            self.search_entry = SearchEntry(self, on_search=self._show_matches, placeholder_text="Search name, type or description...")
+            self.search_entry.pack(fill="x", padx=10)
+        self.item_list = VirtualList(self, text=lambda item: f'{item["name"]} ({item["type"]})',
+                                     key=lambda item: item["id"], on_select=self._select,
+                                     on_activate=self._on_activate, empty_text="No items created in this campaign yet.")
+        self.item_list.pack(fill="both", expand=True, padx=10, pady=5)
+        self.item_list.set_items(all_items)
         self.confirm_button = ctk.CTkButton(self, text="Add Selected Item", command=self._on_confirm, state="disabled")
         self.confirm_button.pack(pady=10)
         self.transient(parent)
@@ -31,14 +35,21 @@ class AddItemDialog(ctk.CTkToplevel):
         self.grab_set()
         self.wait_window()
 
+    def _show_matches(self, text):
+        if not text.strip():
+            self.item_list.set_items(self.all_items)
+            return
+        self.item_list.empty_label.configure(text="No matching items.")
+        matches = self.search(text, self.MAX_MATCHES)
+        self.item_list.set_items([self.items_by_id[item_id] for item_id, _ in matches if item_id in self.items_by_id])
+
     def _select(self, item):
         self.selected_item = item
         self.confirm_button.configure(state="normal")
-        for btn, btn_item in self.buttons:
-            if btn_item["id"] == item["id"]:
-                btn.configure(fg_color="#3B8ED0", border_color="#3B8ED0")
-            else:
-                btn.configure(fg_color="transparent", border_color="gray50")
+
+    def _on_activate(self, item):
+        self._select(item)
+        self._on_confirm()
 
     def _on_confirm(self):
         self.grab_release()
@@ -99,9 +110,7 @@ class CharacterView:
             self.sheet_ui_built = True
             if self.rule_set:
                 self.build_sheet_ui(self.rule_set, self.controller)
-                self.update_character_list(
-                    [char.name for char in self.controller.get_character_list()]
-                )
+                self.update_character_list()
 
     def _setup_creator_ui(self, controller):
         # ... (rest of the file is identical to the one you have)
@@ -129,9 +138,11 @@ class CharacterView:
         load_frame = ctk.CTkFrame(container)
         load_frame.grid(row=0, column=0, pady=(10, 20), padx=20, sticky="ew")
         ctk.CTkLabel(load_frame, text="Load Character:").pack(side="left", padx=(10,10))
-        self.char_sheet_list = AutoWidthComboBox(load_frame, values=["-"], state="readonly")
+        self.char_sheet_list = TypeAheadComboBox(
+            load_frame, search=lambda text, limit: controller.app_controller.search_names("character", text, limit),
+            command=lambda name: controller.load_character_to_sheet()
+        )
         self.char_sheet_list.pack(side="left", padx=5, fill="x", expand=True)
-        self.char_sheet_list.bind("<Button-1>", lambda event: self.char_sheet_list._open_dropdown_menu())
         ctk.CTkButton(load_frame, text="Load", command=controller.load_character_to_sheet).pack(side="left", padx=(10,10))
         self.sheet_content_frame = ctk.CTkFrame(container, fg_color="transparent")
         self.sheet_content_frame.grid(row=1, column=0, pady=10, padx=20, sticky="nsew")
@@ -184,6 +195,12 @@ class CharacterView:
         ctk.CTkLabel(hp_frame, text="Max HP:", anchor="w").grid(row=1, column=0, padx=5, pady=2)
         self.max_hp_label = ctk.CTkLabel(hp_frame, text="10", anchor="w")
         self.max_hp_label.grid(row=1, column=1, sticky="w", padx=5, pady=2)
+        # Derived stats from the ruleset's formulas; values come precomputed from the stat engine
+        self.derived_labels = {}
+        for row, name in enumerate(rule_set.get('formulas') or {}, start=2):
+            ctk.CTkLabel(hp_frame, text=f"{name}:", anchor="w").grid(row=row, column=0, padx=5, pady=2)
+            self.derived_labels[name] = ctk.CTkLabel(hp_frame, text="-", anchor="w")
+            self.derived_labels[name].grid(row=row, column=1, sticky="w", padx=5, pady=2)
 
         right_column = ctk.CTkFrame(self.sheet_content_wrapper, fg_color="transparent")
         right_column.grid(row=1, column=1, sticky="nsew", padx=(10, 0))
@@ -233,38 +250,26 @@ class CharacterView:
 
         self.sheet_name_label.configure(text=character.name)
         
-        effective_attrs = character.attributes.copy()
-        
-        if item_controller:
-            all_items_data = {item['id']: item for item in item_controller.all_items}
-            for inv_entry in character.inventory:
-                if inv_entry.get("equipped", False):
-                    item_id = inv_entry["item_id"]
-                    if item_id in all_items_data:
-                        item_details = all_items_data[item_id]
-                        for modifier in item_details.get("modifiers", []):
-                            stat = modifier["stat"]
-                            value = modifier["value"]
-                            if stat in effective_attrs:
-                                try:
-                                    current_val = int(effective_attrs.get(stat, 0))
-                                    effective_attrs[stat] = str(current_val + value)
-                                except ValueError: pass
+        # Cached per (character revision, item catalog revision) by the app's stat engine
+        effective = char_controller.app_controller.get_effective_stats(character)
         
-        base_max_hp_str = character.attributes.get("Hit Points", "10")
-        effective_max_hp_str = effective_attrs.get("Hit Points", base_max_hp_str)
-        hp_display_text = base_max_hp_str
-        if effective_max_hp_str != base_max_hp_str:
-            hp_display_text = f"{effective_max_hp_str} ({base_max_hp_str})"
+        base_max_hp = character.attributes.get("Hit Points", 10)
+        effective_max_hp = effective.get("Hit Points", base_max_hp)
+        hp_display_text = str(base_max_hp)
+        if effective_max_hp != base_max_hp:
+            hp_display_text = f"{effective_max_hp} ({base_max_hp})"
         self.max_hp_label.configure(text=hp_display_text)
         self.current_hp_entry.delete(0, 'end')
         self.current_hp_entry.insert(0, str(character.current_hp))
+        for name, label in self.derived_labels.items():
+            value = effective.derived.get(name)
+            label.configure(text="-" if value is None else str(value))
         
         for key, entry in self.char_sheet_entries.items():
-            base_value = character.attributes.get(key) or character.skills.get(key) or ""
-            effective_value = effective_attrs.get(key)
-            display_text = base_value
-            if effective_value and effective_value != base_value:
+            base_value = character.attributes.get(key, character.skills.get(key, ""))
+            effective_value = effective.get(key)
+            display_text = str(base_value)
+            if effective_value is not None and effective_value != base_value:
                  display_text = f"{effective_value} ({base_value})"
             entry.delete(0, 'end')
             entry.insert(0, display_text)
@@ -281,7 +286,7 @@ class CharacterView:
             ctk.CTkLabel(self.linked_quests_frame, text="Open 'Quests' pane\nto see links.", wraplength=150).pack(pady=10)
             return
             
-        linked_quests = [q for q in quest_controller.get_all_quests() if char_name in q.get('linked_npcs', [])]
+        linked_quests = quest_controller.get_quests_linked_to_npc(char_name)
         if not linked_quests:
             ctk.CTkLabel(self.linked_quests_frame, text="Not linked to any quests.").pack(pady=10)
         else:
@@ -297,8 +302,8 @@ class CharacterView:
             ctk.CTkLabel(self.inventory_list_frame, text="Open 'Items' pane\nto manage inventory.", wraplength=150).pack(pady=10)
             return
 
-        all_items_data = {item['id']: item for item in item_controller.all_items}
         if not char_controller: return
+        all_items_data = char_controller.app_controller.get_item_catalog().items_by_id
         for inv_entry in inventory_list:
             item_id = inv_entry["item_id"]
             if item_id in all_items_data:
@@ -321,8 +326,7 @@ class CharacterView:
         if hasattr(self, 'sheet_content_wrapper'):
             self.sheet_content_wrapper.pack_forget()
 
-    def update_character_list(self, characters):
+    def update_character_list(self):
+        """Resets the picker; its matches come from the app's character name index as the user types."""
         if not self.sheet_ui_built: return
-        values = ["-"] + (characters or [])
-        self.char_sheet_list.configure(values=values)
-        self.char_sheet_list.set(values[0])
\ No newline at end of file
+        self.char_sheet_list.reset()
\ No newline at end of file
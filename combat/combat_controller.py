@@ -5,6 +5,7 @@ from npc.npc_controller import NpcController
 from character.character_model import CharacterModel
 from npc.npc_model import NpcModel
 from custom_dialogs import MessageBox
+import stat_table
 
 class CombatController:
     """Controller for the new Combat Tracker feature."""
@@ -15,9 +16,16 @@ class CombatController:
         self.campaign_path = campaign_path
         self.current_rule_set = None
         self.available_combatants = []
+        # (stat, operator, value) applied to the available list; value None only sorts by the stat
+        self.stat_filter = None
 
     def handle_rule_set_load(self, rule_set):
         self.current_rule_set = rule_set
+        self.stat_filter = None
+        # The table itself is only built once a filter is applied
+        self.view.build_stat_filter(
+            stat_table.stat_columns(rule_set), stat_table.QUERY_OPERATORS, stat_table.np is not None
+        )
         self.update_combatant_lists()
 
     def update_combatant_lists(self):
@@ -32,16 +40,60 @@ class CombatController:
         if npc_controller:
             self.available_combatants.extend(npc_controller.get_npc_list())
 
+        if self.stat_filter:
+            self.available_combatants = self._filter_by_stats(self.available_combatants)
         self.view.update_available_list(self.available_combatants, self)
 
-    def add_to_roster(self, base_model):
-        is_pc = isinstance(base_model, CharacterModel)
+    def _filter_by_stats(self, handles):
+        """Keeps the handles matching the stat filter, strongest first, using the app's stat table."""
+        table = self.app_controller.get_stat_table()
+        if not table:
+            return handles
+        stat, op, value = self.stat_filter
+        conditions = [(stat, op, value)] if value is not None else []
+        handles_by_key = {(handle.kind, handle.id): handle for handle in handles}
+        matches = [
+            handles_by_key[(kind, entity_id)]
+            for kind, entity_id, name in table.query(conditions, sort_by=stat)
+            if (kind, entity_id) in handles_by_key
+        ]
+        average = table.aggregate(stat, "mean", conditions)
+        summary = f"{len(matches)} match"
+        if average is not None:
+            summary += f" | average {stat}: {average:.1f}"
+        self.view.show_filter_summary(summary)
+        return matches
+
+    def apply_stat_filter(self):
+        stat, op, value_text = self.view.get_stat_filter()
+        if not stat or stat == "-":
+            return
+        try:
+            value = float(value_text) if value_text else None
+        except ValueError:
+            MessageBox.showerror("Error", f"'{value_text}' is not a number.", self.view.frame)
+            return
+        self.stat_filter = (stat, op, value)
+        self.update_combatant_lists()
+
+    def clear_stat_filter(self):
+        self.stat_filter = None
+        self.view.clear_stat_filter()
+        self.update_combatant_lists()
+
+    def add_to_roster(self, handle):
+        """Adds a character or NPC from the available list; its full model is loaded only now."""
+        base_model = handle.model
+        if base_model is None:
+            MessageBox.showerror("Error", f"'{handle.name}' no longer exists.", self.view.frame)
+            return
+        is_pc = handle.kind == "character"
         if is_pc:
             for combatant in self.model.combatants.values():
                 if combatant['base_model'].name == base_model.name and combatant['is_pc']:
                     MessageBox.showwarning("Warning", f"Player Character '{base_model.name}' is already in the encounter.", self.view.frame)
                     return
-        self.model.add_combatant(base_model, is_pc)
+        self.model.add_combatant(base_model, is_pc, self.app_controller.get_effective_stats(base_model))
         self.view.update_roster_list(self.model.combatants, self)
 
     def remove_from_roster(self, combatant_id):
@@ -63,16 +115,28 @@ class CombatController:
         self._update_turn_order_view()
 
     def end_combat(self):
+        character_hp, npc_hp = {}, {}
         for combatant_data in self.model.combatants.values():
             base_model = combatant_data['base_model']
             final_hp = combatant_data['current_hp']
-            base_model.current_hp = str(final_hp)
-            base_model.save()
+            base_model.current_hp = final_hp
+            (character_hp if combatant_data['is_pc'] else npc_hp)[base_model.get_id()] = base_model.current_hp
+        # Only HP is written, in one background transaction: unsaved sheet edits on the shared
+        # instances stay unsaved (the read-only viewer profile keeps HP in memory only)
+        if not self.app_controller.is_read_only():
+            self.app_controller.db_writer.submit(
+                None,
+                lambda: (CharacterModel.save_current_hp(self.campaign_path, character_hp),
+                         NpcModel.save_current_hp(self.campaign_path, npc_hp)),
+                on_success=self._on_combat_results_saved
+            )
         self.model.reset_roster()
         self.view.clear_view()
         self.view.update_roster_list(self.model.combatants, self)
-        self.app_controller.refresh_char_npc_sheet_if_loaded()
         self.update_combatant_lists()
+
+    def _on_combat_results_saved(self):
+        self.app_controller.refresh_char_npc_sheet_if_loaded()
         MessageBox.showinfo("Combat Ended", "Combat has ended. Current Hit Points have been saved.", self.view.frame)
 
     def apply_damage(self):
@@ -9,7 +9,10 @@ class CombatModel:
         self.current_turn_index = -1
         self.is_active = False
 
-    def add_combatant(self, base_model, is_pc):
+    def add_combatant(self, base_model, is_pc, stats=None):
+        """Adds a combatant; `stats` are its effective stats (defaults to the base attributes)."""
+        if stats is None:
+            stats = base_model.attributes
         unique_id = str(uuid.uuid4())
         name = base_model.name
         if not is_pc:
@@ -18,8 +21,8 @@ class CombatModel:
                 count += 1
                 name = f"{base_model.name} {count}"
         try:
-            dex_val = int(base_model.attributes.get("Dexterity", 10))
-            max_hp_val = int(base_model.attributes.get("Hit Points", 10))
+            dex_val = int(stats.get("Dexterity", 10))
+            max_hp_val = int(stats.get("Hit Points", 10))
             current_hp_val = int(base_model.current_hp)
         except (ValueError, TypeError, AttributeError):
             dex_val, max_hp_val, current_hp_val = 10, 10, 10
@@ -1,4 +1,5 @@
 import customtkinter as ctk
+from ui_extensions import VirtualList
 
 class CombatView:
     """Manages the UI for the new Combat Tracker feature."""
@@ -24,11 +25,34 @@ class CombatView:
 
         self.setup_pane = ctk.CTkFrame(self.main_pane)
         self.setup_pane.grid(row=0, column=0, sticky="nsew", padx=(0, 10))
+        self.setup_pane.grid_columnconfigure(0, weight=1)
         self.setup_pane.grid_rowconfigure(1, weight=1)
         self.setup_pane.grid_rowconfigure(3, weight=1)
 
-        ctk.CTkLabel(self.setup_pane, text="Available Combatants", font=ctk.CTkFont(size=14, weight="bold")).grid(row=0, column=0, pady=5)
-        self.available_list = ctk.CTkScrollableFrame(self.setup_pane)
+        available_header = ctk.CTkFrame(self.setup_pane, fg_color="transparent")
+        available_header.grid(row=0, column=0, sticky="ew", padx=5)
+        ctk.CTkLabel(available_header, text="Available Combatants", font=ctk.CTkFont(size=14, weight="bold")).pack(pady=5)
+        # Stat query: filters and sorts the list through the app's column store
+        self.filter_frame = ctk.CTkFrame(available_header, fg_color="transparent")
+        self.filter_frame.pack(fill="x")
+        self.filter_stat_combo = ctk.CTkComboBox(self.filter_frame, values=["-"], width=130, state="readonly")
+        self.filter_stat_combo.pack(side="left", padx=(0, 5))
+        self.filter_op_combo = ctk.CTkComboBox(self.filter_frame, values=[">="], width=60, state="readonly")
+        self.filter_op_combo.pack(side="left", padx=(0, 5))
+        self.filter_value_entry = ctk.CTkEntry(self.filter_frame, width=60, placeholder_text="any")
+        self.filter_value_entry.pack(side="left", padx=(0, 5))
+        self.filter_value_entry.bind("<Return>", lambda event: controller.apply_stat_filter())
+        ctk.CTkButton(self.filter_frame, text="Filter", width=50, command=controller.apply_stat_filter).pack(side="left", padx=(0, 5))
+        ctk.CTkButton(self.filter_frame, text="Clear", width=50, command=controller.clear_stat_filter).pack(side="left")
+        self.filter_summary_label = ctk.CTkLabel(available_header, text="", anchor="w")
+        self.filter_summary_label.pack(fill="x")
+
+        # Clicking a row adds it to the roster, so rows keep the plain button look and no selection
+        button_color = ctk.ThemeManager.theme["CTkButton"]["fg_color"]
+        self.available_list = VirtualList(self.setup_pane, text=lambda handle: f"+ {handle.name}",
+                                          key=lambda handle: (handle.kind, handle.id), on_select=controller.add_to_roster,
+                                          row_style=lambda handle: {"fg_color": button_color, "border_width": 0},
+                                          selected_style={}, empty_text="No characters or NPCs available.")
         self.available_list.grid(row=1, column=0, sticky="nsew", padx=5)
 
         ctk.CTkLabel(self.setup_pane, text="Encounter Roster", font=ctk.CTkFont(size=14, weight="bold")).grid(row=2, column=0, pady=5)
@@ -50,13 +74,32 @@ class CombatView:
         self.bottom_frame = ctk.CTkFrame(self.tracker_pane, fg_color="transparent")
         self.bottom_frame.grid(row=2, column=0, sticky="ew", padx=5, pady=10)
 
+    def build_stat_filter(self, stat_names, operators, enabled):
+        """Fills the stat query controls; they stay disabled when stat queries are unavailable."""
+        self.filter_stat_combo.configure(values=stat_names or ["-"])
+        self.filter_stat_combo.set(stat_names[0] if stat_names else "-")
+        self.filter_op_combo.configure(values=list(operators))
+        self.filter_op_combo.set(operators[0])
+        state = "normal" if enabled else "disabled"
+        for widget in self.filter_frame.winfo_children():
+            widget.configure(state="readonly" if enabled and isinstance(widget, ctk.CTkComboBox) else state)
+        if not enabled:
+            self.filter_summary_label.configure(text="Install numpy to filter by stats.")
+
+    def get_stat_filter(self):
+        """The (stat, operator, value text) currently entered in the stat query controls."""
+        return self.filter_stat_combo.get(), self.filter_op_combo.get(), self.filter_value_entry.get().strip()
+
+    def clear_stat_filter(self):
+        self.filter_value_entry.delete(0, 'end')
+        self.filter_summary_label.configure(text="")
+
+    def show_filter_summary(self, text):
+        self.filter_summary_label.configure(text=text)
+
     def update_available_list(self, available_combatants, controller):
-        for widget in self.available_list.winfo_children():
-            widget.destroy()
-        for model in available_combatants:
-            btn = ctk.CTkButton(self.available_list, text=f"+ {model.name}", anchor="w",
-                                command=lambda m=model: controller.add_to_roster(m))
-            btn.pack(fill="x", pady=2)
+        self.available_list.set_items(available_combatants)
+        self.available_list.select(None)
 
     def update_roster_list(self, roster, controller):
         for widget in self.roster_list.winfo_children():
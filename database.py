@@ -1,28 +1,250 @@
 import sqlite3
 import json
 import os
+import threading
+from contextlib import contextmanager
+from migrations import migrate
+from identity_map import IdentityMap
+
+# The campaign session that is currently open in the editor, if any.
+_active_session = None
+_session_lock = threading.Lock()
+
+# Connection profiles a campaign can choose from (stored as "db_profile" in campaign.json).
+# WAL lets background readers run while the UI thread writes; cache_size is in KiB when negative.
+DB_PROFILES = {
+    "safe": {
+        "journal_mode": "WAL", "synchronous": "FULL", "cache_size": -8000,
+        "mmap_size": 0, "temp_store": "DEFAULT",
+    },
+    "fast": {
+        "journal_mode": "WAL", "synchronous": "NORMAL", "cache_size": -64000,
+        "mmap_size": 268435456, "temp_store": "MEMORY",
+    },
+    "read-only viewer": {
+        "journal_mode": "WAL", "synchronous": "NORMAL", "cache_size": -64000,
+        "mmap_size": 268435456, "temp_store": "MEMORY", "query_only": "ON",
+    },
+}
+DEFAULT_DB_PROFILE = "fast"
+# How often the editor folds the WAL file back into campaign.db
+WAL_CHECKPOINT_INTERVAL_MS = 5 * 60 * 1000
+# Entries kept in change_log when a session opens; older ones are pruned
+CHANGE_LOG_RETENTION = 10000
+# Maximum number of values bound into one "IN (...)" clause
+SQL_IN_CHUNK_SIZE = 500
+# Default number of rows per page for the models' keyset-paginated get_page()
+DEFAULT_PAGE_SIZE = 200
+
+
+def resolve_db_pragmas(profile_name=None, overrides=None):
+    """Returns the PRAGMA settings for a profile, with optional per-campaign overrides applied."""
+    pragmas = dict(DB_PROFILES.get(profile_name) or DB_PROFILES[DEFAULT_DB_PROFILE])
+    if overrides:
+        pragmas.update({key: value for key, value in overrides.items() if key in ("cache_size", "mmap_size")})
+    return pragmas
+
+
+def _apply_pragmas(conn, pragmas, include_query_only=True):
+    for name, value in pragmas.items():
+        if name == "query_only" and not include_query_only:
+            continue
+        conn.execute(f"PRAGMA {name} = {value}")
+
+
+class CampaignConnection(sqlite3.Connection):
+    """A sqlite3 connection that remembers how deeply nested its open transaction is."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tx_depth = 0
+        # Lazily detected by Database.has_search_index()
+        self.fts_enabled = None
+
+
+def _create_connection(db_path, check_same_thread=True):
+    conn = sqlite3.connect(db_path, check_same_thread=check_same_thread, factory=CampaignConnection)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+class CampaignSession:
+    """
+    Owns the SQLite connections for the campaign that is open in the editor.
+    The schema is set up once when the session opens; afterwards every thread
+    (the Tk main thread and any background workers) gets its own long-lived
+    connection that is reused until the session closes.
+    """
+    def __init__(self, campaign_path, pragmas=None):
+        self.campaign_path = os.path.abspath(campaign_path)
+        self.db_path = os.path.join(self.campaign_path, 'campaign.db')
+        self.pragmas = pragmas or resolve_db_pragmas()
+        self.is_read_only = str(self.pragmas.get("query_only", "OFF")).upper() == "ON"
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self.is_open = False
+        # Shared model instances for this campaign (see identity_map.py)
+        self.identity_map = IdentityMap()
+
+    def open(self, progress=None):
+        """Opens the main connection and migrates the schema once; see migrations.migrate for `progress`."""
+        conn = self.get_connection(include_query_only=False)
+        Database._initialize_schema_on(conn, progress)
+        self._prune_change_log(conn)
+        if self.is_read_only:
+            conn.execute("PRAGMA query_only = ON")
+        self.is_open = True
+
+    @staticmethod
+    def _prune_change_log(conn):
+        """Drops old change_log entries; caches are rebuilt after a session opens so never need them."""
+        conn.execute(
+            "DELETE FROM change_log WHERE seq <= (SELECT MAX(seq) FROM change_log) - ?", (CHANGE_LOG_RETENTION,)
+        )
+        conn.commit()
+
+    def checkpoint(self, mode="PASSIVE"):
+        """Copies committed WAL pages back into the main database file without blocking writers."""
+        if not self.is_open:
+            return
+        try:
+            self.get_connection().execute(f"PRAGMA wal_checkpoint({mode})")
+        except sqlite3.Error as e:
+            print(f"  - [WARNING] WAL checkpoint failed: {e}")
+
+    def get_connection(self, include_query_only=True):
+        """Returns the connection belonging to the calling thread, creating it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # check_same_thread is disabled only so that close() may be called from
+            # the main thread; each connection is still used by a single thread.
+            conn = _create_connection(self.db_path, check_same_thread=False)
+            _apply_pragmas(conn, self.pragmas, include_query_only)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        """Closes every connection handed out during this session."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                print(f"  - [WARNING] Failed to close database connection: {e}")
+        self._local = threading.local()
+        self.identity_map.clear()
+        self.is_open = False
+
+
+def open_campaign_session(campaign_path, pragmas=None, progress=None):
+    """Starts the connection session for a campaign, closing any previous one."""
+    global _active_session
+    with _session_lock:
+        if _active_session:
+            _active_session.close()
+        session = CampaignSession(campaign_path, pragmas)
+        session.open(progress)
+        _active_session = session
+        return session
+
+
+def close_campaign_session():
+    """Closes the active campaign session, if there is one."""
+    global _active_session
+    with _session_lock:
+        if _active_session:
+            _active_session.close()
+            _active_session = None
+
+
+def get_campaign_session(campaign_path):
+    """Returns the active session if it belongs to the given campaign, otherwise None."""
+    session = _active_session
+    if session and session.is_open and session.campaign_path == os.path.abspath(campaign_path):
+        return session
+    return None
+
+
+def get_identity_map(campaign_path):
+    """Returns the identity map of the campaign's open session, or None outside a session."""
+    session = get_campaign_session(campaign_path)
+    return session.identity_map if session else None
+
 
 class Database:
     def __init__(self, campaign_path):
+        self.campaign_path = campaign_path
         self.db_path = os.path.join(campaign_path, 'campaign.db')
         self.conn = None
+        self._owns_connection = False
 
     def connect(self):
-        """Establishes a connection to the database and ensures schema exists."""
-        self.conn = sqlite3.connect(self.db_path)
-        self.conn.row_factory = sqlite3.Row
-        self._initialize_schema()
+        """
+        Borrows the calling thread's connection from the active campaign session.
+        Outside of a session (e.g. campaign creation, migration scripts) a private
+        connection is opened and the schema is ensured.
+        """
+        session = get_campaign_session(self.campaign_path)
+        if session:
+            self.conn = session.get_connection()
+            self._owns_connection = False
+        else:
+            self.conn = _create_connection(self.db_path)
+            _apply_pragmas(self.conn, resolve_db_pragmas(), include_query_only=False)
+            self._owns_connection = True
+            self._initialize_schema()
 
     def close(self):
-        """Closes the database connection."""
-        if self.conn:
+        """Closes the database connection if it is not owned by the campaign session."""
+        if self.conn and self._owns_connection:
             self.conn.close()
+        self.conn = None
+        self._owns_connection = False
 
     def execute(self, query, params=()):
-        """Executes a query that doesn't return data (INSERT, UPDATE, DELETE)."""
+        """
+        Executes a query that doesn't return data (INSERT, UPDATE, DELETE).
+        Commits immediately unless it runs inside a transaction() block.
+        Returns the cursor so callers can read lastrowid.
+        """
         cursor = self.conn.cursor()
         cursor.execute(query, params)
-        self.conn.commit()
+        if not self.conn.tx_depth:
+            self.conn.commit()
+        return cursor
+
+    def executemany(self, query, seq_of_params):
+        """Executes a write query once per parameter tuple with a single commit."""
+        cursor = self.conn.cursor()
+        cursor.executemany(query, seq_of_params)
+        if not self.conn.tx_depth:
+            self.conn.commit()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Groups every write issued inside the block into one unit of work.
+        The outermost block commits on success and rolls everything back if an
+        exception escapes; nested blocks simply join the outer transaction.
+        """
+        conn = self.conn
+        if conn.tx_depth == 0 and not conn.in_transaction:
+            conn.execute("BEGIN")
+        conn.tx_depth += 1
+        try:
+            yield self
+        except BaseException:
+            conn.tx_depth -= 1
+            if conn.tx_depth == 0:
+                conn.rollback()
+            raise
+        else:
+            conn.tx_depth -= 1
+            if conn.tx_depth == 0:
+                conn.commit()
 
     def fetchone(self, query, params=()):
         """Fetches a single record."""
@@ -36,46 +258,71 @@ class Database:
         cursor.execute(query, params)
         return cursor.fetchall()
 
+    def fetch_page(self, table, columns, order_by, where="", params=(), page_size=DEFAULT_PAGE_SIZE, after=None):
+        """
+        Keyset pagination: returns (rows, next_token) for the rows that sort after `after`.
+        `order_by` lists the sort expressions, the last of which must be unique (e.g. the id),
+        so the token (the last row's sort key) identifies the position exactly. Each page is an
+        index range scan no matter how deep it is. next_token is None on the last page.
+        """
+        conditions = [where] if where else []
+        if after is not None:
+            # The redundant bound on the first key lets SQLite seek even when a COLLATE
+            # expression keeps it from using the row-value comparison as an index range.
+            conditions.append(f"{order_by[0]} >= ?")
+            conditions.append(f"({', '.join(order_by)}) > ({', '.join('?' for _ in order_by)})")
+            params = (*params, after[0], *after)
+        sort_keys = ", ".join(f"{expression} AS _sort_{i}" for i, expression in enumerate(order_by))
+        query = f"SELECT {columns}, {sort_keys} FROM {table}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY {', '.join(order_by)} LIMIT ?"
+        rows = self.fetchall(query, (*params, page_size))
+        if len(rows) < page_size:
+            return rows, None
+        last = rows[-1]
+        return rows, tuple(last[f"_sort_{i}"] for i in range(len(order_by)))
+
+    def fetchall_in(self, query, values, params=()):
+        """
+        Fetches all records for a query with an `IN ({ids})` placeholder, splitting long
+        value lists into chunks that stay below SQLite's bound-parameter limit.
+        """
+        rows = []
+        values = list(values)
+        for start in range(0, len(values), SQL_IN_CHUNK_SIZE):
+            chunk = values[start:start + SQL_IN_CHUNK_SIZE]
+            rows.extend(self.fetchall(query.format(ids=", ".join("?" for _ in chunk)), (*params, *chunk)))
+        return rows
+
+    def current_revision(self):
+        """Returns the sequence number of the latest logged change (0 for an untouched campaign)."""
+        return self.fetchone("SELECT COALESCE(MAX(seq), 0) FROM change_log")[0]
+
+    def changed_ids_since(self, table, revision):
+        """Returns the ids in `table` written or deleted after the given revision."""
+        rows = self.fetchall(
+            "SELECT DISTINCT entity_id FROM change_log WHERE table_name = ? AND seq > ?", (table, revision)
+        )
+        return [row['entity_id'] for row in rows]
+
+    def data_version(self):
+        """SQLite's data_version: changes whenever another connection commits to the file."""
+        return self.fetchone("PRAGMA data_version")[0]
+
+    def has_search_index(self):
+        """True if the campaign has the FTS5 search index (SQLite builds without FTS5 have none)."""
+        if self.conn.fts_enabled is None:
+            self.conn.fts_enabled = self.fetchone(
+                "SELECT 1 FROM sqlite_master WHERE name = 'search_index'"
+            ) is not None
+        return self.conn.fts_enabled
+
     def _initialize_schema(self):
-        """Creates all necessary tables if they don't exist."""
-        # Using TEXT to store JSON blobs for flexibility.
-        # Indexing key fields for fast lookups.
-        schema = [
-            """
-            CREATE TABLE IF NOT EXISTS characters (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                rule_set TEXT NOT NULL,
-                data TEXT NOT NULL
-            );
-            """,
-            "CREATE INDEX IF NOT EXISTS idx_char_name ON characters (name);",
-            "CREATE INDEX IF NOT EXISTS idx_char_ruleset ON characters (rule_set);",
-            """
-            CREATE TABLE IF NOT EXISTS npcs (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                rule_set TEXT NOT NULL,
-                data TEXT NOT NULL
-            );
-            """,
-            "CREATE INDEX IF NOT EXISTS idx_npc_name ON npcs (name);",
-            "CREATE INDEX IF NOT EXISTS idx_npc_ruleset ON npcs (rule_set);",
-            """
-            CREATE TABLE IF NOT EXISTS items (
-                id TEXT PRIMARY KEY,
-                data TEXT NOT NULL
-            );
-            """,
-            """
-            CREATE TABLE IF NOT EXISTS quests (
-                id TEXT PRIMARY KEY,
-                data TEXT NOT NULL
-            );
-            """
-        ]
-        
-        cursor = self.conn.cursor()
-        for statement in schema:
-            cursor.execute(statement)
-        self.conn.commit()
\ No newline at end of file
+        """Creates or upgrades the campaign's tables."""
+        self._initialize_schema_on(self.conn)
+
+    @staticmethod
+    def _initialize_schema_on(conn, progress=None):
+        """Applies any pending schema migrations; an up-to-date campaign runs no DDL."""
+        migrate(conn, progress)
@@ -0,0 +1,178 @@
+import queue
+import threading
+from database import Database
+
+# Maximum number of distinct write jobs waiting; submit() blocks beyond that
+WRITER_QUEUE_SIZE = 256
+# Jobs committed together in one transaction
+WRITER_BATCH_SIZE = 64
+# How often the Tk main thread collects completion callbacks
+WRITER_POLL_MS = 50
+
+_STOP = object()
+
+
+class _WriteJob:
+    def __init__(self, key, write, on_success, on_error):
+        self.key = key
+        self.write = write
+        self.on_success = on_success
+        self.on_error = on_error
+
+
+class DatabaseWriter:
+    """
+    A single background thread that performs every campaign write, so saving never blocks
+    the Tk main thread on disk I/O.
+
+    Jobs are plain callables run on the writer thread (typically a model's save or delete
+    applied to a snapshot). A job submitted with a key, such as ("npcs", npc_id), replaces
+    a still-pending job with the same key (including its callbacks), so rapid repeated
+    saves of one entity collapse into a single write. Pending jobs are committed together in one transaction, and the
+    callbacks run on the main thread via root.after.
+    """
+    def __init__(self, root, campaign_path, on_error=None):
+        self.root = root
+        self.campaign_path = campaign_path
+        self.default_on_error = on_error
+        self._jobs = queue.Queue(maxsize=WRITER_QUEUE_SIZE)
+        self._results = queue.Queue()
+        self._pending = {}
+        # (first, last] change_log revisions committed by this writer, oldest first
+        self._own_revisions = []
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="DatabaseWriter", daemon=True)
+        self._running = False
+
+    def start(self):
+        self._running = True
+        self._thread.start()
+        self.root.after(WRITER_POLL_MS, self._poll_results)
+
+    def submit(self, key, write, on_success=None, on_error=None):
+        """
+        Queues `write` to run on the writer thread. `on_success()` or `on_error(exception)`
+        is later called on the main thread. Pass key=None for jobs that must never be merged.
+        """
+        on_error = on_error or self.default_on_error
+        with self._lock:
+            job = self._pending.get(key) if key is not None else None
+            if job:
+                # Coalesce: the newer snapshot and its callbacks supersede the queued ones
+                job.write, job.on_success, job.on_error = write, on_success, on_error
+                return
+            job = _WriteJob(key, write, on_success, on_error)
+            if key is not None:
+                self._pending[key] = job
+        self._jobs.put(job)
+
+    def flush(self):
+        """Blocks until every submitted job has been written, then runs their callbacks."""
+        if self._running:
+            self._jobs.join()
+        self._deliver_results()
+
+    def stop(self):
+        """
+        Writes everything still queued and stops the thread. Callbacks not yet delivered are
+        dropped, since the UI they would update is being torn down; failures are still logged.
+        """
+        if not self._running:
+            return
+        self._running = False
+        # Queued after every pending job, so those are written first
+        self._jobs.put(_STOP)
+        self._thread.join()
+        self._deliver_results(run_callbacks=False)
+
+    def wrote_changes(self, since, until):
+        """
+        True if every change logged after revision `since` up to `until` was committed by this
+        writer, i.e. nothing else wrote to the campaign in between.
+        """
+        with self._lock:
+            # Older ranges are never asked about again
+            self._own_revisions = [span for span in self._own_revisions if span[1] > since]
+            covered = since
+            for first, last in self._own_revisions:
+                if first <= covered < last:
+                    covered = last
+            return covered >= until
+
+    def _record_own_revisions(self, first, last):
+        if last > first:
+            with self._lock:
+                self._own_revisions.append((first, last))
+
+    def _take(self, block):
+        job = self._jobs.get(block=block)
+        if job is not _STOP and job.key is not None:
+            with self._lock:
+                # From here on a new submit for this key starts a fresh job
+                self._pending.pop(job.key, None)
+        return job
+
+    def _run(self):
+        db = Database(self.campaign_path)
+        while True:
+            batch = [self._take(block=True)]
+            while len(batch) < WRITER_BATCH_SIZE and batch[-1] is not _STOP:
+                try:
+                    batch.append(self._take(block=False))
+                except queue.Empty:
+                    break
+            stop = batch[-1] is _STOP
+            jobs = [job for job in batch if job is not _STOP]
+            if jobs:
+                self._write_batch(db, jobs)
+            for _ in batch:
+                self._jobs.task_done()
+            if stop:
+                return
+
+    def _write_batch(self, db, jobs):
+        failures = {}
+        db.connect()
+        try:
+            try:
+                with db.transaction():
+                    first = db.current_revision()
+                    for job in jobs:
+                        job.write()
+                    last = db.current_revision()
+                self._record_own_revisions(first, last)
+            except Exception:
+                # Retry one by one so a single bad job does not fail the whole batch
+                for job in jobs:
+                    try:
+                        with db.transaction():
+                            first = db.current_revision()
+                            job.write()
+                            last = db.current_revision()
+                        self._record_own_revisions(first, last)
+                    except Exception as e:
+                        failures[job] = e
+        finally:
+            db.close()
+        for job in jobs:
+            self._results.put((job, failures.get(job)))
+
+    def _deliver_results(self, run_callbacks=True):
+        while True:
+            try:
+                job, error = self._results.get_nowait()
+            except queue.Empty:
+                return
+            if error is None:
+                if job.on_success and run_callbacks:
+                    job.on_success()
+            else:
+                print(f"  - [ERROR] Background write failed: {error}")
+                if job.on_error and run_callbacks:
+                    job.on_error(error)
+
+    def _poll_results(self):
+        if not self._running:
+            return
+        self._deliver_results()
+        self.root.after(WRITER_POLL_MS, self._poll_results)
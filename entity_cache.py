@@ -0,0 +1,57 @@
+from bisect import bisect_left
+
+
+class EntityCache:
+    """
+    A sorted list of entries (models or EntityHandles) that can be patched in place with
+    the rows that changed since a database revision, instead of being rebuilt from a full
+    table scan.
+    `items` is the same list object for the lifetime of the cache, so it can be handed
+    out through AppController's data cache.
+    """
+    def __init__(self, id_key, sort_key):
+        self.id_key = id_key
+        self.sort_key = sort_key
+        self.items = []
+        self.revision = 0
+        self._keys = []
+        self._by_id = {}
+
+    def reset(self, models, revision):
+        """Replaces the whole content, e.g. after the initial load."""
+        self.items[:] = sorted(models, key=self.sort_key)
+        self._keys = [self.sort_key(model) for model in self.items]
+        self._by_id = {self.id_key(model): model for model in self.items}
+        self.revision = revision
+
+    def apply(self, changed_ids, models, revision):
+        """
+        Drops every changed id and inserts the fresh copies of those that still exist.
+        Returns True if the content changed.
+        """
+        self.revision = revision
+        if not changed_ids:
+            return False
+        for entity_id in changed_ids:
+            self._remove(entity_id)
+        for model in models:
+            self._remove(self.id_key(model))
+            key = self.sort_key(model)
+            index = bisect_left(self._keys, key)
+            self._keys.insert(index, key)
+            self.items.insert(index, model)
+            self._by_id[self.id_key(model)] = model
+        return True
+
+    def get(self, entity_id):
+        return self._by_id.get(entity_id)
+
+    def _remove(self, entity_id):
+        model = self._by_id.pop(entity_id, None)
+        if model is None:
+            return
+        index = bisect_left(self._keys, self.sort_key(model))
+        while self.items[index] is not model:
+            index += 1
+        del self._keys[index]
+        del self.items[index]
@@ -0,0 +1,34 @@
+class EntityHandle:
+    """
+    A compact reference to a character or NPC built from the indexed id/name/rule_set
+    columns alone. The full model is loaded on first access to `.model` and memoized,
+    so filling a list with thousands of names never parses their JSON.
+    """
+    __slots__ = ("kind", "id", "name", "rule_set", "_loader", "_model")
+
+    def __init__(self, kind, entity_id, name, rule_set, loader):
+        self.kind = kind
+        self.id = entity_id
+        self.name = name
+        self.rule_set = rule_set
+        self._loader = loader
+        self._model = None
+
+    @property
+    def model(self):
+        """The full model, loaded once; None if the entity was deleted in the meantime."""
+        if self._model is None:
+            self._model = self._loader(self.name)
+        return self._model
+
+    @property
+    def is_loaded(self):
+        return self._model is not None
+
+    def keep_model_of(self, other):
+        """Takes over the instance an older handle for the same entity had already loaded."""
+        if self._model is None:
+            self._model = other._model
+
+    def __repr__(self):
+        return f"EntityHandle({self.kind!r}, {self.id!r}, {self.name!r})"
@@ -0,0 +1,475 @@
+import sys
+from collections.abc import MutableMapping
+from functools import partial
+from database import Database, DEFAULT_PAGE_SIZE, get_identity_map
+from entity_handle import EntityHandle
+from serialization import get_serializer
+from utils import as_int_or_none
+from search.search_model import index_documents, remove_documents
+
+# One layout per distinct tuple of stat names, shared by every entity of a ruleset
+_LAYOUTS = {}
+
+
+def stat_value(value):
+    """
+    Stores whole-number stats as ints; anything else (e.g. "1d6", "" or "+2") is kept as given,
+    so that str() of the stored value always gives back the saved text.
+    """
+    if isinstance(value, str):
+        try:
+            number = int(value)
+        except ValueError:
+            return value
+        # "+2", "007" or " 3" would not survive the round trip
+        return number if str(number) == value else value
+    return value
+
+
+class _StatLayout:
+    """The ordered, interned stat names of a StatBlock plus a name -> position index."""
+    __slots__ = ("keys", "index")
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.index = {key: position for position, key in enumerate(keys)}
+
+
+def _layout_for(keys):
+    keys = tuple(sys.intern(key) for key in keys)
+    layout = _LAYOUTS.get(keys)
+    if layout is None:
+        layout = _LAYOUTS.setdefault(keys, _StatLayout(keys))
+    return layout
+
+
+class StatBlock(MutableMapping):
+    """
+    A dict-like mapping of stat name -> value that keeps only a list of values per entity;
+    the names live in a layout shared by all entities with the same stats. Plain whole
+    numbers are stored as ints; other values keep their saved text.
+    """
+    __slots__ = ("_layout", "_values")
+
+    def __init__(self, data=None):
+        data = data or {}
+        self._layout = _layout_for(data.keys())
+        self._values = [stat_value(value) for value in data.values()]
+
+    def __getitem__(self, key):
+        return self._values[self._layout.index[key]]
+
+    def __setitem__(self, key, value):
+        position = self._layout.index.get(key)
+        if position is None:
+            self._layout = _layout_for(self._layout.keys + (key,))
+            self._values.append(stat_value(value))
+        else:
+            self._values[position] = stat_value(value)
+
+    def __delitem__(self, key):
+        position = self._layout.index[key]
+        keys = self._layout.keys
+        self._layout = _layout_for(keys[:position] + keys[position + 1:])
+        del self._values[position]
+
+    def __contains__(self, key):
+        return key in self._layout.index
+
+    def __iter__(self):
+        return iter(self._layout.keys)
+
+    def __len__(self):
+        return len(self._values)
+
+    def copy(self):
+        block = StatBlock.__new__(StatBlock)
+        block._layout = self._layout
+        block._values = list(self._values)
+        return block
+
+    # Values are immutable, so a deep copy is a shallow one that keeps sharing the layout
+    __copy__ = copy
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def to_dict(self):
+        """Plain {name: "value"} dict in the saved format, where every stat is a string."""
+        return {key: str(value) for key, value in zip(self._layout.keys, self._values)}
+
+    def __repr__(self):
+        return f"StatBlock({dict(zip(self._layout.keys, self._values))!r})"
+
+
+class EntityModel:
+    """
+    Shared, slotted base of characters and NPCs: name, ruleset, stats, inventory and HP,
+    plus their persistence. Subclasses set TABLE (the database table), KIND (the identity
+    map and search index kind) and _document (the text indexed for search).
+    Saved data is unchanged (stats and HP are written as strings); in memory, stats are
+    StatBlocks and whole-number values written plainly are ints.
+    """
+    __slots__ = ("campaign_path", "name", "rule_set_name", "_attributes", "_skills", "inventory",
+                 "_current_hp", "revision", "saved_revision", "__weakref__")
+    TABLE = None
+    KIND = None
+    _document = None
+
+    def __init__(self, campaign_path, name, rule_set_name):
+        self.campaign_path = campaign_path
+        self.name = name
+        self.rule_set_name = sys.intern(rule_set_name)
+        self._attributes = StatBlock()
+        self._skills = StatBlock()
+        self.inventory = []
+        self._current_hp = None
+        # Bumped on every change that affects effective stats (see StatEngine)
+        self.revision = 0
+        # The revision last loaded or handed to a save; anything newer is an unsaved edit
+        self.saved_revision = 0
+
+    @property
+    def attributes(self):
+        return self._attributes
+
+    @attributes.setter
+    def attributes(self, values):
+        self._attributes = StatBlock(values)
+        self.touch()
+
+    @property
+    def skills(self):
+        return self._skills
+
+    @skills.setter
+    def skills(self, values):
+        self._skills = StatBlock(values)
+        self.touch()
+
+    @property
+    def current_hp(self):
+        return self._current_hp
+
+    @current_hp.setter
+    def current_hp(self, value):
+        self._current_hp = stat_value(value)
+
+    def set_attribute(self, attribute, value):
+        self.attributes[attribute] = value
+        self.touch()
+
+    def set_skill(self, skill, value):
+        self.skills[skill] = value
+        self.touch()
+
+    def touch(self):
+        """Marks the stats or inventory as changed; call it after editing `inventory` in place."""
+        self.revision += 1
+
+    @property
+    def is_dirty(self):
+        """True if stats or inventory were edited since the entity was loaded or last saved."""
+        return self.revision != self.saved_revision
+
+    def mark_saved(self):
+        """Records the current state as saved; call it when a snapshot of this instance is written."""
+        self.saved_revision = self.revision
+
+    def get_id(self):
+        """The database id of this entity, derived from its name."""
+        return self.name.lower().replace(' ', '_')
+
+    def to_dict(self):
+        """Converts the entity to a dictionary for saving."""
+        # Ensure current_hp is set before saving
+        if self.current_hp is None:
+            self.current_hp = self.attributes.get("Hit Points", 10)
+        return {
+            'name': self.name, 'rule_set': self.rule_set_name,
+            'attributes': self.attributes.to_dict(), 'skills': self.skills.to_dict(),
+            'inventory': self.inventory, 'current_hp': str(self.current_hp)
+        }
+
+    @classmethod
+    def from_dict(cls, campaign_path, data):
+        """Creates an instance from a saved dictionary."""
+        entity = cls(campaign_path, data['name'], data['rule_set'])
+        entity.apply_dict(data)
+        return entity
+
+    def apply_dict(self, data):
+        """Overwrites this entity's fields with saved data (also used to refresh a shared instance)."""
+        self.name = data['name']
+        self.rule_set_name = sys.intern(data['rule_set'])
+        self.attributes = data.get('attributes', {})
+        self.skills = data.get('skills', {})
+        self.inventory = data.get('inventory', [])
+        self.touch()
+        self.mark_saved()
+        # Default current_hp to Max HP if not found (for backward compatibility)
+        self.current_hp = data.get('current_hp', self.attributes.get("Hit Points", 10))
+
+    def _to_row(self, serializer):
+        """Builds the database row (id, name, rule_set, current_hp, format, data) for this entity."""
+        data = self.to_dict()
+        return (self.get_id(), self.name, self.rule_set_name, as_int_or_none(data['current_hp']), *serializer.dumps(data))
+
+    def save(self):
+        """Saves the entity data to the database."""
+        type(self).save_many(self.campaign_path, [self])
+
+    @classmethod
+    def save_many(cls, campaign_path, models, db=None):
+        """
+        Saves a batch of entities in a single transaction; either all of them are written or none.
+        Pass a connected `db` to write on its connection, joining a transaction it has open.
+        """
+        if not models:
+            return
+        owns_db = db is None
+        if owns_db:
+            db = Database(campaign_path)
+            db.connect()
+        try:
+            serializer = get_serializer(db)
+            rows = [model._to_row(serializer) for model in models]
+            with db.transaction():
+                db.executemany(
+                    f"INSERT OR REPLACE INTO {cls.TABLE} (id, name, rule_set, current_hp, format, data) VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                index_documents(db, cls.KIND, [
+                    (row[0], *cls._document(model.to_dict())) for row, model in zip(rows, models)
+                ])
+        finally:
+            if owns_db:
+                db.close()
+
+    @classmethod
+    def save_current_hp(cls, campaign_path, hp_by_id):
+        """
+        Writes only the current HP of these entities ({id: hp}) into their stored rows, in one
+        transaction; every other field keeps its stored value, whatever the loaded instances hold.
+        """
+        if not hp_by_id:
+            return
+        db = Database(campaign_path)
+        db.connect()
+        try:
+            serializer = get_serializer(db)
+            with db.transaction():
+                rows = db.fetchall_in(f"SELECT id, format, data FROM {cls.TABLE} WHERE id IN ({{ids}})", list(hp_by_id))
+                models = []
+                for row in rows:
+                    data = serializer.load_row(row)
+                    data['current_hp'] = str(hp_by_id[row['id']])
+                    models.append(cls.from_dict(campaign_path, data))
+                cls.save_many(campaign_path, models, db=db)
+        finally:
+            db.close()
+
+    @classmethod
+    def load(cls, campaign_path, name):
+        """Loads a single entity by name, returning the shared instance if it is already loaded."""
+        entity_id = name.lower().replace(' ', '_')
+        identity_map = get_identity_map(campaign_path)
+        if identity_map:
+            loaded = identity_map.get(cls.KIND, entity_id)
+            if loaded is not None:
+                return loaded
+        db = Database(campaign_path)
+        db.connect()
+        serializer = get_serializer(db)
+        row = db.fetchone(f"SELECT id, format, data FROM {cls.TABLE} WHERE id = ?", (entity_id,))
+        db.close()
+        if row:
+            return cls._from_rows(campaign_path, serializer, [row])[0]
+        return None
+
+    @classmethod
+    def load_many(cls, campaign_path, entity_ids):
+        """
+        Loads several entities by id in one query, returning {id: model} for those that exist.
+        Instances already in the identity map are reused without reading their rows.
+        """
+        identity_map = get_identity_map(campaign_path)
+        models = {}
+        missing = []
+        for entity_id in dict.fromkeys(entity_ids):
+            loaded = identity_map.get(cls.KIND, entity_id) if identity_map else None
+            if loaded is not None:
+                models[entity_id] = loaded
+            else:
+                missing.append(entity_id)
+        if missing:
+            db = Database(campaign_path)
+            db.connect()
+            try:
+                serializer = get_serializer(db)
+                rows = db.fetchall_in(f"SELECT id, format, data FROM {cls.TABLE} WHERE id IN ({{ids}})", missing)
+            finally:
+                db.close()
+            for row, model in zip(rows, cls._from_rows(campaign_path, serializer, rows)):
+                models[row['id']] = model
+        return models
+
+    @classmethod
+    def load_stored_many(cls, campaign_path, entity_ids):
+        """
+        Builds fresh models from the stored rows of these ids in one query, bypassing the identity
+        map: loaded instances may hold unsaved edits, which readers of stored data must not see.
+        """
+        db = Database(campaign_path)
+        db.connect()
+        try:
+            serializer = get_serializer(db)
+            rows = db.fetchall_in(f"SELECT id, format, data FROM {cls.TABLE} WHERE id IN ({{ids}})", list(entity_ids))
+        finally:
+            db.close()
+        return [cls.from_dict(campaign_path, serializer.load_row(row)) for row in rows]
+
+    @classmethod
+    def _from_rows(cls, campaign_path, serializer, rows):
+        """Builds models from (id, format, data) rows, reusing instances already in the identity map."""
+        identity_map = get_identity_map(campaign_path)
+        models = []
+        for row in rows:
+            model = identity_map.get(cls.KIND, row['id']) if identity_map else None
+            if model is None:
+                model = cls.from_dict(campaign_path, serializer.load_row(row))
+                if identity_map:
+                    model = identity_map.add(cls.KIND, row['id'], model)
+            models.append(model)
+        return models
+
+    @classmethod
+    def refresh_loaded(cls, campaign_path, entity_ids, keep=()):
+        """
+        Re-reads changed entities that are currently loaded in the identity map into the same
+        instances, and forgets deleted ones, so every holder sees the stored state.
+        Instances with unsaved edits, and those in `keep` (e.g. the one open on a sheet), are
+        left alone so the edits are not lost.
+        """
+        identity_map = get_identity_map(campaign_path)
+        loaded = identity_map.loaded(cls.KIND, entity_ids) if identity_map else {}
+        loaded = {
+            entity_id: model for entity_id, model in loaded.items()
+            if not model.is_dirty and not any(model is kept for kept in keep)
+        }
+        if not loaded:
+            return
+        db = Database(campaign_path)
+        db.connect()
+        serializer = get_serializer(db)
+        rows = db.fetchall_in(f"SELECT id, format, data FROM {cls.TABLE} WHERE id IN ({{ids}})", list(loaded))
+        db.close()
+        for row in rows:
+            loaded.pop(row['id']).apply_dict(serializer.load_row(row))
+        for deleted_id in loaded:
+            identity_map.discard(cls.KIND, deleted_id)
+
+    @classmethod
+    def get_all_for_ruleset(cls, campaign_path, rule_set_name):
+        """Loads all entities for a ruleset in a single query."""
+        db = Database(campaign_path)
+        db.connect()
+        serializer = get_serializer(db)
+        rows = db.fetchall(f"SELECT id, format, data FROM {cls.TABLE} WHERE rule_set = ?", (rule_set_name,))
+        db.close()
+        return cls._from_rows(campaign_path, serializer, rows)
+
+    @classmethod
+    def get_all_ids(cls, campaign_path):
+        """Returns the ids of every stored entity of this kind, across all rulesets."""
+        db = Database(campaign_path)
+        db.connect()
+        rows = db.fetchall(f"SELECT id FROM {cls.TABLE}")
+        db.close()
+        return [row['id'] for row in rows]
+
+    @classmethod
+    def get_page(cls, campaign_path, rule_set_name, page_size=DEFAULT_PAGE_SIZE, after=None):
+        """
+        Returns (models, next_token) for one page of a ruleset's entities ordered by name.
+        Pass next_token back as `after` for the following page; it is None after the last one.
+        """
+        db = Database(campaign_path)
+        db.connect()
+        serializer = get_serializer(db)
+        rows, next_token = db.fetch_page(
+            cls.TABLE, "id, format, data", ("name", "id"), "rule_set = ?", (rule_set_name,), page_size, after
+        )
+        db.close()
+        return cls._from_rows(campaign_path, serializer, rows), next_token
+
+    @classmethod
+    def stream_all(cls, campaign_path, rule_set_name, page_size=DEFAULT_PAGE_SIZE):
+        """Yields every entity of a ruleset in name order, holding only one page in memory."""
+        after = None
+        while True:
+            models, after = cls.get_page(campaign_path, rule_set_name, page_size, after)
+            yield from models
+            if after is None:
+                return
+
+    @classmethod
+    def _handles_from_rows(cls, campaign_path, rows):
+        loader = partial(cls.load, campaign_path)
+        return [EntityHandle(cls.KIND, row['id'], row['name'], row['rule_set'], loader) for row in rows]
+
+    @classmethod
+    def get_handles_for_ruleset(cls, campaign_path, rule_set_name):
+        """Returns lightweight (id, name, rule_set) handles for a ruleset's entities without parsing their data."""
+        db = Database(campaign_path)
+        db.connect()
+        rows = db.fetchall(f"SELECT id, name, rule_set FROM {cls.TABLE} WHERE rule_set = ?", (rule_set_name,))
+        db.close()
+        return cls._handles_from_rows(campaign_path, rows)
+
+    @classmethod
+    def get_handle_changes_since(cls, campaign_path, rule_set_name, revision):
+        """
+        Returns (changed_ids, handles, new_revision): the ids written or deleted after `revision`,
+        and handles for the ruleset's entities among them (deleted ones are simply absent).
+        """
+        db = Database(campaign_path)
+        db.connect()
+        try:
+            new_revision = db.current_revision()
+            changed_ids = db.changed_ids_since(cls.TABLE, revision)
+            rows = db.fetchall_in(
+                f"SELECT id, name, rule_set FROM {cls.TABLE} WHERE rule_set = ? AND id IN ({{ids}})", changed_ids, (rule_set_name,)
+            )
+        finally:
+            db.close()
+        return changed_ids, cls._handles_from_rows(campaign_path, rows), new_revision
+
+    @classmethod
+    def get_with_hp_at_most(cls, campaign_path, rule_set_name, max_hp):
+        """Loads the entities of a ruleset whose current HP is at or below a threshold (e.g. 0 for downed)."""
+        db = Database(campaign_path)
+        db.connect()
+        serializer = get_serializer(db)
+        rows = db.fetchall(
+            f"SELECT id, format, data FROM {cls.TABLE} WHERE rule_set = ? AND current_hp <= ?", (rule_set_name, max_hp)
+        )
+        db.close()
+        return cls._from_rows(campaign_path, serializer, rows)
+
+    @classmethod
+    def delete(cls, campaign_path, name):
+        """Deletes an entity from the database."""
+        db = Database(campaign_path)
+        db.connect()
+        entity_id = name.lower().replace(' ', '_')
+        try:
+            with db.transaction():
+                db.execute(f"DELETE FROM {cls.TABLE} WHERE id = ?", (entity_id,))
+                remove_documents(db, cls.KIND, [entity_id])
+        finally:
+            db.close()
+        identity_map = get_identity_map(campaign_path)
+        if identity_map:
+            identity_map.discard(cls.KIND, entity_id)
+        return True
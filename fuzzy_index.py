@@ -0,0 +1,127 @@
+from collections import Counter
+from functools import lru_cache
+from heapq import nlargest
+from operator import itemgetter
+
+DEFAULT_MATCH_LIMIT = 50
+# A result must share at least this share of the query's trigrams (name hits count double)
+MIN_OVERLAP = 0.5
+# Ranking by trigram hits alone is approximate, so this many times `limit` candidates are re-ranked
+CANDIDATE_FACTOR = 4
+NAME_WEIGHT = 2
+# Text trigrams found in more than this share of the entries (like "the") say nothing and are skipped
+COMMON_TEXT_FRACTION = 0.25
+
+
+@lru_cache(maxsize=65536)
+def _word_trigrams(word):
+    padded = "  " + word
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def trigrams(text):
+    """
+    The trigrams of each word of `text`, case-insensitive, with the word start padded
+    ("sword" -> "  s", " sw", "swo", "wor", "ord"), so a word typed halfway matches.
+    """
+    grams = set()
+    for word in text.casefold().split():
+        # Words repeat a lot across descriptions, so their trigrams are cached
+        grams |= _word_trigrams(word)
+    return grams
+
+
+class FuzzyIndex:
+    """
+    Typo-tolerant search over names plus secondary text (e.g. an item's type and
+    description): an inverted index from trigram to keys, so a lookup only counts the
+    postings of the query's trigrams instead of scanning every entry. Name hits weigh
+    more than text hits, and names containing the query as typed rank first.
+    Updated incrementally with add/remove; `search` has the same shape as PrefixIndex's.
+    """
+    def __init__(self, entries=()):
+        self._entries = {}
+        self._name_postings = {}
+        self._text_postings = {}
+        self.reset(entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def reset(self, entries):
+        """Replaces the content with (key, name, text) triples."""
+        self._entries = {}
+        self._name_postings = {}
+        self._text_postings = {}
+        for key, name, text in entries:
+            self.add(key, name, text)
+
+    def add(self, key, name, text=""):
+        """Adds an entry, or replaces it if the key is already indexed."""
+        if key in self._entries:
+            self.remove(key)
+        name_grams, text_grams = trigrams(name), trigrams(text)
+        self._entries[key] = (name, name.casefold(), name_grams, text_grams)
+        for gram in name_grams:
+            self._name_postings.setdefault(gram, set()).add(key)
+        for gram in text_grams:
+            self._text_postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for postings, grams in ((self._name_postings, entry[2]), (self._text_postings, entry[3])):
+            for gram in grams:
+                keys = postings.get(gram)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del postings[gram]
+
+    def search(self, text, limit=DEFAULT_MATCH_LIMIT):
+        """
+        Up to `limit` (key, name) pairs ranked by similarity to `text`: names that start
+        with or contain it first, then by shared trigrams (name, then type/description),
+        then shorter names. An empty text returns nothing.
+        """
+        query = " ".join(text.split()).casefold()
+        grams = trigrams(query)
+        if not grams:
+            return []
+        ranked = self._rank(query, grams, limit, len(self._entries) * COMMON_TEXT_FRACTION)
+        if not ranked:
+            # Only common words matched (e.g. a word in every description): count them after all
+            ranked = self._rank(query, grams, limit, len(self._entries))
+        return [(key, name) for *_, key, name in ranked[:limit]]
+
+    def _rank(self, query, grams, limit, common):
+        hits = Counter()
+        for gram in grams:
+            keys = self._name_postings.get(gram)
+            if keys:
+                # Counter.update counts in C; calling it twice weights name hits double
+                for _ in range(NAME_WEIGHT):
+                    hits.update(keys)
+            keys = self._text_postings.get(gram)
+            if keys and len(keys) <= common:
+                hits.update(keys)
+        threshold = len(grams) * NAME_WEIGHT * MIN_OVERLAP
+        candidates = nlargest(limit * CANDIDATE_FACTOR, hits.items(), key=itemgetter(1))
+        ranked = []
+        for key, score in candidates:
+            if score < threshold:
+                break
+            name, folded = self._entries[key][:2]
+            if folded.startswith(query):
+                bonus = 2
+            elif query in folded:
+                bonus = 1
+            else:
+                bonus = 0
+            ranked.append((-bonus, -score, len(name), folded, key, name))
+        ranked.sort()
+        return ranked
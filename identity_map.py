@@ -0,0 +1,40 @@
+import threading
+import weakref
+
+
+class IdentityMap:
+    """
+    Campaign-scoped registry of loaded entities keyed by (kind, id), so the sheet, the list
+    handles and the combat roster all share one instance per character or NPC. Entries are
+    weak: an entity nobody references any more simply drops out.
+    """
+    def __init__(self):
+        self._entries = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def get(self, kind, entity_id):
+        with self._lock:
+            return self._entries.get((kind, entity_id))
+
+    def add(self, kind, entity_id, entity):
+        """Registers an entity and returns the canonical instance (an earlier one wins)."""
+        with self._lock:
+            return self._entries.setdefault((kind, entity_id), entity)
+
+    def discard(self, kind, entity_id):
+        with self._lock:
+            self._entries.pop((kind, entity_id), None)
+
+    def loaded(self, kind, entity_ids):
+        """Returns {id: instance} for those of `entity_ids` that are currently loaded."""
+        with self._lock:
+            found = {}
+            for entity_id in entity_ids:
+                entity = self._entries.get((kind, entity_id))
+                if entity is not None:
+                    found[entity_id] = entity
+            return found
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
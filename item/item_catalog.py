@@ -0,0 +1,142 @@
+from .item_model import ItemModel
+
+# Change events passed to subscribers as listener(event, payload)
+CATALOG_RELOADED = "reloaded"   # payload: None (everything may have changed)
+CATALOG_SAVED = "saved"         # payload: the new or updated item dicts
+CATALOG_DELETED = "deleted"     # payload: the removed item ids
+
+
+def normalize_item_name(name):
+    """Key for name lookups: case-insensitive and ignoring surrounding/repeated whitespace."""
+    return " ".join(name.split()).casefold()
+
+
+class ItemCatalog:
+    """
+    The campaign's items held in memory once, with id, normalized-name and type indexes.
+    Saves and deletes are applied to it as single-item deltas (no table re-read) and
+    announced to subscribers; `revision` changes with every change, so caches built
+    from items (e.g. effective stats) know when to recompute. Items written by other
+    connections are picked up with `sync`, which reads only the rows in the change log.
+    """
+    def __init__(self, campaign_path):
+        self.campaign_path = campaign_path
+        self.items_by_id = {}
+        self._by_name = {}
+        self._by_type = {}
+        self._sorted = None
+        # Created items whose write is still queued, by normalized name (see add_pending)
+        self._pending_by_name = {}
+        self._listeners = []
+        self.revision = 0
+        self.log_revision = 0
+
+    def __len__(self):
+        return len(self.items_by_id)
+
+    def __contains__(self, item_id):
+        return item_id in self.items_by_id
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def load(self):
+        """(Re)reads every item; used once per session and as a fallback."""
+        model = ItemModel(self.campaign_path)
+        # Read first: a write landing in between is simply applied again by the next sync
+        self.log_revision = model.current_revision()
+        self.items_by_id = {}
+        self._by_name = {}
+        self._by_type = {}
+        for item in model.load_all_items():
+            self._index(item)
+        self._changed(CATALOG_RELOADED, None)
+
+    def sync(self):
+        """Applies the items written or deleted by anyone since the last load/sync. Returns True if any were."""
+        changed_ids, items, self.log_revision = ItemModel(self.campaign_path).get_changes_since(self.log_revision)
+        if not changed_ids:
+            return False
+        present = {item['id'] for item in items}
+        deleted = [item_id for item_id in changed_ids if item_id not in present and item_id in self.items_by_id]
+        if items:
+            self.apply_saved(items)
+        if deleted:
+            self.apply_deleted(deleted)
+        return bool(items or deleted)
+
+    def get(self, item_id, default=None):
+        return self.items_by_id.get(item_id, default)
+
+    def find_by_name(self, name):
+        """The item with this name (see normalize_item_name), including pending ones, or None."""
+        key = normalize_item_name(name)
+        matches = self._by_name.get(key)
+        return next(iter(matches.values())) if matches else self._pending_by_name.get(key)
+
+    def add_pending(self, items):
+        """
+        Makes new items findable by name while their write is still queued, so generating
+        again before it lands reuses them instead of creating duplicates. Each must later
+        be resolved with apply_saved (written) or drop_pending (the write failed).
+        """
+        for item in items:
+            self._pending_by_name[normalize_item_name(item['name'])] = item
+
+    def drop_pending(self, items):
+        """Forgets pending items, e.g. after their write failed."""
+        for item in items:
+            key = normalize_item_name(item['name'])
+            if self._pending_by_name.get(key) is item:
+                del self._pending_by_name[key]
+
+    def items_of_type(self, item_type):
+        """The items of one type (e.g. "Weapon") in name order."""
+        return sorted(self._by_type.get(item_type, {}).values(), key=lambda item: item['name'].lower())
+
+    def all_items(self):
+        """Every item in name order; the list is rebuilt only after a change."""
+        if self._sorted is None:
+            self._sorted = sorted(self.items_by_id.values(), key=lambda item: item['name'].lower())
+        return self._sorted
+
+    def apply_saved(self, items):
+        """Adds or replaces items after they were written."""
+        self.drop_pending(items)
+        for item in items:
+            self._unindex(item['id'])
+            self._index(item)
+        self._changed(CATALOG_SAVED, items)
+
+    def apply_deleted(self, item_ids):
+        """Drops items after they were deleted."""
+        for item_id in item_ids:
+            self._unindex(item_id)
+        self._changed(CATALOG_DELETED, item_ids)
+
+    def _index(self, item):
+        self.items_by_id[item['id']] = item
+        self._by_name.setdefault(normalize_item_name(item['name']), {})[item['id']] = item
+        self._by_type.setdefault(item.get('type'), {})[item['id']] = item
+
+    def _unindex(self, item_id):
+        item = self.items_by_id.pop(item_id, None)
+        if item is None:
+            return
+        # Names and types are not unique, so both indexes hold {id: item} per key
+        for index, key in ((self._by_name, normalize_item_name(item['name'])), (self._by_type, item.get('type'))):
+            matches = index.get(key)
+            if matches:
+                matches.pop(item_id, None)
+                if not matches:
+                    del index[key]
+
+    def _changed(self, event, payload):
+        self.revision += 1
+        self._sorted = None
+        for listener in list(self._listeners):
+            listener(event, payload)
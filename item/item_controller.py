@@ -1,5 +1,7 @@
+import copy
 from .item_model import ItemModel
 from .item_view import ItemView
+from .item_catalog import CATALOG_RELOADED, CATALOG_SAVED, CATALOG_DELETED
 from custom_dialogs import MessageBox
 
 class ItemController:
@@ -8,13 +10,23 @@ class ItemController:
         self.app_controller = app_controller
         self.model = ItemModel(campaign_path)
         self.view = ItemView(parent_frame)
+        self.campaign_path = campaign_path
 
-        self.all_items = []
         self.selected_item = None
         self.current_rule_set = None
 
+    @property
+    def catalog(self):
+        """The app's shared ItemCatalog (the source of truth for items in memory)."""
+        return self.app_controller.get_item_catalog()
+
+    @property
+    def all_items(self):
+        return self.catalog.all_items()
+
     def on_ui_ready(self):
         """Called by AppController after the UI frame has been created."""
+        self.catalog.subscribe(self._on_catalog_changed)
         self.load_all_items()
 
     def handle_rule_set_load(self, rule_set):
@@ -31,15 +43,27 @@ class ItemController:
             label.configure(text=str(new_value))
 
     def load_all_items(self):
-        """Loads items from the model and tells the view to display them."""
-        # --- MODIFIED: No longer checks cache, it's the source of truth now ---
-        self.all_items = self.model.load_all_items()
-        self.app_controller.set_cached_data('items', self.all_items)
-
-        self.all_items.sort(key=lambda x: x['name'].lower())
-        self.view.display_items(self.all_items, self)
+        """Tells the view to display every item of the catalog (which reads the table once per session)."""
+        self.view.display_items(self.catalog.all_items())
         self.clear_editor_fields()
 
+    def _on_catalog_changed(self, event, payload):
+        """Re-shows the list (cheap: only the visible rows are redrawn) and follows the selected item."""
+        if self.view.item_list is None:
+            return
+        if event == CATALOG_RELOADED:
+            self.load_all_items()
+            return
+        self.view.display_items(self.catalog.all_items())
+        if not self.selected_item:
+            return
+        if event == CATALOG_SAVED:
+            for item in payload:
+                if item['id'] == self.selected_item['id']:
+                    self.selected_item = item
+        elif event == CATALOG_DELETED and self.selected_item['id'] in payload:
+            self.clear_editor_fields()
+
     def select_item(self, item):
         """Handles when a user clicks on an item in the list."""
         self.selected_item = item
@@ -60,6 +84,7 @@ class ItemController:
 
     def save_new_item(self):
         """Saves a brand new item."""
+        if not self.app_controller.ensure_writable(self.view.parent_frame): return
         name = self.view.name_entry.get()
         desc = self.view.desc_textbox.get("1.0", "end-1c")
         item_type = self.view.type_combo.get()
@@ -71,9 +96,33 @@ class ItemController:
         modifiers = self._get_modifiers_from_view()
         
         new_item = self.model.create_item(name, desc, item_type, modifiers)
-        self.model.save_item(new_item)
-        self.load_all_items()
-        MessageBox.showinfo("Success", f"Item '{name}' created.", parent=self.view.parent_frame)
+        self._queue_item_write(
+            new_item['id'], lambda model: model.save_item(new_item),
+            lambda catalog: catalog.apply_saved([new_item]),
+            lambda: MessageBox.showinfo("Success", f"Item '{name}' created.", parent=self.view.parent_frame)
+        )
+        self.clear_editor_fields()
+
+    def _queue_item_write(self, key, write, apply, on_done=None, pending=()):
+        """
+        Runs `write(model)` on the database writer with its own ItemModel (self.model's
+        connection belongs to the main thread), then applies the same change to the
+        catalog with `apply(catalog)`, without re-reading the table. New items passed as
+        `pending` are findable by name in the catalog right away and dropped if the write fails.
+        """
+        catalog = self.catalog
+        catalog.add_pending(pending)
+        def on_success():
+            apply(catalog)
+            if on_done:
+                on_done()
+        def on_error(error):
+            catalog.drop_pending(pending)
+            self.app_controller._show_write_error(error)
+        self.app_controller.db_writer.submit(
+            ("items", key) if key else None, lambda: write(ItemModel(self.campaign_path)),
+            on_success=on_success, on_error=on_error
+        )
 
     def create_item_from_data(self, item_data):
         """Creates a new item from a dictionary, used by generators."""
@@ -83,13 +132,28 @@ class ItemController:
             item_data["type"],
             item_data["modifiers"]
         )
-        self.model.save_item(new_item)
-        # Note: We don't call load_all_items() here to avoid multiple UI refreshes
-        # The calling function (NPC controller) will handle the final UI refresh.
+        self._queue_item_write(
+            new_item['id'], lambda model: model.save_item(new_item), lambda catalog: catalog.apply_saved([new_item]),
+            pending=[new_item]
+        )
         return new_item
 
+    def create_items_from_data(self, items_data):
+        """Creates several new items from dictionaries and saves them in one transaction."""
+        new_items = [
+            self.model.create_item(data["name"], data["description"], data["type"], data["modifiers"])
+            for data in items_data
+        ]
+        if new_items:
+            self._queue_item_write(
+                None, lambda model: model.save_many(new_items), lambda catalog: catalog.apply_saved(new_items),
+                pending=new_items
+            )
+        return new_items
+
     def save_changes(self):
         """Saves changes to an existing, selected item."""
+        if not self.app_controller.ensure_writable(self.view.parent_frame): return
         if not self.selected_item:
             return
 
@@ -103,33 +167,33 @@ class ItemController:
             
         modifiers = self._get_modifiers_from_view()
         
-        item_to_update = None
-        for item in self.all_items:
-            if item["id"] == self.selected_item["id"]:
-                item["name"] = new_name
-                item["description"] = new_desc
-                item["type"] = new_type
-                item["modifiers"] = modifiers
-                item_to_update = item
-                break
-        
+        item_to_update = self.catalog.get(self.selected_item["id"])
         if item_to_update:
-            self.model.save_item(item_to_update)
-
-        self.load_all_items()
-        MessageBox.showinfo("Success", f"Item '{new_name}' updated.", parent=self.view.parent_frame)
+            # A new dict: the catalog's indexes still hold the old one until the write lands
+            snapshot = copy.deepcopy(item_to_update)
+            snapshot.update(name=new_name, description=new_desc, type=new_type, modifiers=modifiers)
+            self._queue_item_write(
+                snapshot['id'], lambda model: model.save_item(snapshot),
+                lambda catalog: catalog.apply_saved([snapshot]),
+                lambda: MessageBox.showinfo("Success", f"Item '{new_name}' updated.", parent=self.view.parent_frame)
+            )
 
     def delete_item(self):
         """Deletes the currently selected item."""
+        if not self.app_controller.ensure_writable(self.view.parent_frame): return
         if not self.selected_item:
             return
             
         if MessageBox.askyesno("Confirm Deletion", f"Are you sure you want to permanently delete '{self.selected_item['name']}'?", parent=self.view.parent_frame):
-            self.model.delete_item(self.selected_item["id"])
-            self.load_all_items()
-            MessageBox.showinfo("Deleted", "Item has been deleted.", parent=self.view.parent_frame)
+            item_id = self.selected_item["id"]
+            self._queue_item_write(
+                item_id, lambda model: model.delete_item(item_id),
+                lambda catalog: catalog.apply_deleted([item_id]),
+                lambda: MessageBox.showinfo("Deleted", "Item has been deleted.", parent=self.view.parent_frame)
+            )
 
     def clear_editor_fields(self):
         """Clears the selection and the editor fields."""
         self.selected_item = None
+        self.view.select_item_row(None)
         self.view.clear_editor()
\ No newline at end of file
@@ -1,6 +1,7 @@
-import json
 import uuid
-from database import Database
+from database import Database, DEFAULT_PAGE_SIZE
+from serialization import get_serializer
+from search.search_model import index_documents, remove_documents, item_document
 
 class ItemModel:
     """Manages the item database for a specific campaign."""
@@ -10,26 +11,125 @@ class ItemModel:
     def load_all_items(self):
         """Loads the entire list of items from the database."""
         self.db.connect()
-        rows = self.db.fetchall("SELECT data FROM items")
+        serializer = get_serializer(self.db)
+        rows = self.db.fetchall("SELECT format, data FROM items")
         self.db.close()
         if not rows:
             return []
-        return [json.loads(row['data']) for row in rows]
+        return [serializer.load_row(row) for row in rows]
 
-    def save_item(self, item_data):
-        """Saves a single item to the database."""
+    def load_many(self, item_ids):
+        """Loads several items by id in one query, returning {id: item} for those that exist."""
+        self.db.connect()
+        try:
+            serializer = get_serializer(self.db)
+            rows = self.db.fetchall_in("SELECT id, format, data FROM items WHERE id IN ({ids})", list(dict.fromkeys(item_ids)))
+        finally:
+            self.db.close()
+        return {row['id']: serializer.load_row(row) for row in rows}
+
+    def current_revision(self):
+        """The change-log position of the latest write to any tracked table."""
+        self.db.connect()
+        try:
+            return self.db.current_revision()
+        finally:
+            self.db.close()
+
+    def get_changes_since(self, revision):
+        """
+        Returns (changed_ids, items, new_revision): the ids written or deleted after `revision`
+        and the current data of those still present (deleted ones are simply absent).
+        """
         self.db.connect()
-        self.db.execute(
-            "INSERT OR REPLACE INTO items (id, data) VALUES (?, ?)",
-            (item_data['id'], json.dumps(item_data))
+        try:
+            serializer = get_serializer(self.db)
+            new_revision = self.db.current_revision()
+            changed_ids = self.db.changed_ids_since("items", revision)
+            rows = self.db.fetchall_in("SELECT format, data FROM items WHERE id IN ({ids})", changed_ids)
+        finally:
+            self.db.close()
+        return changed_ids, [serializer.load_row(row) for row in rows], new_revision
+
+    def get_page(self, page_size=DEFAULT_PAGE_SIZE, after=None):
+        """
+        Returns (items, next_token) for one page of items ordered by name (case-insensitive).
+        Pass next_token back as `after` for the following page; it is None after the last one.
+        """
+        self.db.connect()
+        serializer = get_serializer(self.db)
+        rows, next_token = self.db.fetch_page(
+            "items", "format, data", ("name COLLATE NOCASE", "id"), page_size=page_size, after=after
         )
         self.db.close()
+        return [serializer.load_row(row) for row in rows], next_token
+
+    def stream_all(self, page_size=DEFAULT_PAGE_SIZE):
+        """Yields every item in name order, holding only one page in memory."""
+        after = None
+        while True:
+            items, after = self.get_page(page_size, after)
+            yield from items
+            if after is None:
+                return
+
+    @staticmethod
+    def _to_row(item_data, serializer):
+        """Builds the database row (id, name, type, format, data) for an item."""
+        return (item_data['id'], item_data.get('name'), item_data.get('type'), *serializer.dumps(item_data))
+
+    def find_by_type(self, item_type):
+        """Loads all items of one type (e.g. "Weapon") using the type index."""
+        self.db.connect()
+        serializer = get_serializer(self.db)
+        rows = self.db.fetchall("SELECT format, data FROM items WHERE type = ?", (item_type,))
+        self.db.close()
+        return [serializer.load_row(row) for row in rows]
+
+    def find_by_name(self, name):
+        """Loads the item with the given name (case-insensitive), or None."""
+        self.db.connect()
+        serializer = get_serializer(self.db)
+        row = self.db.fetchone("SELECT format, data FROM items WHERE name = ? COLLATE NOCASE", (name,))
+        self.db.close()
+        return serializer.load_row(row) if row else None
+
+    def save_item(self, item_data):
+        """Saves a single item to the database."""
+        self.save_many([item_data])
+
+    def save_many(self, items, db=None):
+        """
+        Saves a batch of items in a single transaction; either all of them are written or none.
+        Pass a connected `db` to write on its connection, joining a transaction it has open.
+        """
+        if not items:
+            return
+        owns_db = db is None
+        if owns_db:
+            db = self.db
+            db.connect()
+        try:
+            serializer = get_serializer(db)
+            rows = [self._to_row(item_data, serializer) for item_data in items]
+            with db.transaction():
+                db.executemany(
+                    "INSERT OR REPLACE INTO items (id, name, type, format, data) VALUES (?, ?, ?, ?, ?)", rows
+                )
+                index_documents(db, "item", [(item_data['id'], *item_document(item_data)) for item_data in items])
+        finally:
+            if owns_db:
+                db.close()
 
     def delete_item(self, item_id):
         """Deletes a single item from the database."""
         self.db.connect()
-        self.db.execute("DELETE FROM items WHERE id = ?", (item_id,))
-        self.db.close()
+        try:
+            with self.db.transaction():
+                self.db.execute("DELETE FROM items WHERE id = ?", (item_id,))
+                remove_documents(self.db, "item", [item_id])
+        finally:
+            self.db.close()
 
     def create_item(self, name, description, item_type, modifiers):
         """Creates a new item dictionary with a unique ID."""
@@ -1,10 +1,12 @@
 import customtkinter as ctk
+from ui_extensions import VirtualList
 
 class ItemView:
     """Manages the UI for the self-contained Item feature."""
     def __init__(self, parent_frame):
         self.parent_frame = parent_frame
         self.modifier_widgets = {}
+        self.item_list = None
 
     def setup_ui(self, controller):
         """Builds the UI widgets and connects them to the controller."""
@@ -17,8 +19,11 @@ class ItemView:
         list_frame.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
         list_frame.grid_rowconfigure(1, weight=1)
         ctk.CTkLabel(list_frame, text="Campaign Items", font=ctk.CTkFont(size=16, weight="bold")).grid(row=0, column=0, padx=10, pady=10)
-        self.item_list_frame = ctk.CTkScrollableFrame(list_frame)
-        self.item_list_frame.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
+        list_frame.grid_columnconfigure(0, weight=1)
+        # Virtualized: only the rows in view are widgets, so thousands of items scroll smoothly
+        self.item_list = VirtualList(list_frame, text=lambda item: item["name"], key=lambda item: item["id"],
+                                     on_select=controller.select_item, empty_text="No items yet.")
+        self.item_list.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
 
         # Right Pane: Editor for creating/editing an item
         editor_frame = ctk.CTkFrame(self.parent_frame)
@@ -80,15 +85,13 @@ class ItemView:
 
             self.modifier_widgets[stat_name] = value_label
 
-    def display_items(self, items, controller):
-        """Clears and repopulates the list of items on the left."""
-        for widget in self.item_list_frame.winfo_children():
-            widget.destroy()
-        
-        for item in items:
-            item_row = ctk.CTkButton(self.item_list_frame, text=item["name"], anchor="w", fg_color="transparent",
-                                     command=lambda i=item: controller.select_item(i))
-            item_row.pack(fill="x", pady=2)
+    def display_items(self, items):
+        """Shows the items in the list on the left, keeping the selected one highlighted."""
+        self.item_list.set_items(items)
+
+    def select_item_row(self, item_id):
+        """Highlights an item's row (None clears the highlight) without re-triggering selection."""
+        self.item_list.select_key(item_id)
 
     def populate_editor(self, item):
         """Fills the editor fields with the data of the selected item."""
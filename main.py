@@ -1,7 +1,11 @@
+import multiprocessing
 import customtkinter as ctk
 from app_controller import AppController
 
 if __name__ == "__main__":
+    # Needed by the NPC generator's worker processes in the packaged (PyInstaller) build
+    multiprocessing.freeze_support()
+
     ctk.set_appearance_mode("Dark")
     ctk.set_default_color_theme("blue")
 
@@ -1,6 +1,8 @@
 import customtkinter as ctk
 import threading
 import queue
+from database import DB_PROFILES, DEFAULT_DB_PROFILE
+from ui_extensions import VirtualList
 
 class MainMenuView(ctk.CTkFrame):
     """The UI for the main menu screen, featuring a clean vertical layout."""
@@ -66,10 +68,9 @@ class LoadGameWindow(ctk.CTkToplevel):
         super().__init__(parent_view)
         self.controller = controller
         self.selected_campaign = None
-        self.campaign_buttons = []
 
         self.title("Load Game")
-        self.geometry("400x500")
+        self.geometry("400x550")
         self.configure(fg_color="#2B2B2B")
         self.resizable(False, False)
         
@@ -80,13 +81,19 @@ class LoadGameWindow(ctk.CTkToplevel):
 
         ctk.CTkLabel(self, text="Select a Campaign", font=ctk.CTkFont(size=18, weight="bold")).grid(row=0, column=0, pady=10)
 
-        self.campaign_list_frame = ctk.CTkScrollableFrame(self, label_text="Existing Campaigns")
-        self.campaign_list_frame.grid(row=1, column=0, sticky="nsew", padx=10)
-        
-        self.loading_label = ctk.CTkLabel(self.campaign_list_frame, text="Loading...")
-        self.loading_label.pack(pady=20)
+        self.campaign_list = VirtualList(self, label_text="Existing Campaigns", on_select=self._on_campaign_select,
+                                         on_activate=lambda name: self._load_and_close(),
+                                         row_style=lambda name: {"anchor": "center"}, empty_text="Loading...")
+        self.campaign_list.grid(row=1, column=0, sticky="nsew", padx=10)
+
+        profile_frame = ctk.CTkFrame(self, fg_color="transparent")
+        profile_frame.grid(row=2, column=0, pady=(10, 0), padx=10, sticky="ew")
+        ctk.CTkLabel(profile_frame, text="Database Profile:").pack(side="left", padx=(0, 10))
+        self.profile_combo = ctk.CTkComboBox(profile_frame, values=list(DB_PROFILES), state="readonly")
+        self.profile_combo.pack(side="left", fill="x", expand=True)
+        self.profile_combo.set(DEFAULT_DB_PROFILE)
 
-        ctk.CTkButton(self, text="Load Selected", command=self._load_and_close).grid(row=2, column=0, pady=10)
+        ctk.CTkButton(self, text="Load Selected", command=self._load_and_close).grid(row=3, column=0, pady=10)
 
         self.campaign_queue = queue.Queue()
         self.worker_thread = threading.Thread(target=self._fetch_campaigns_worker, daemon=True)
@@ -108,31 +115,15 @@ class LoadGameWindow(ctk.CTkToplevel):
                 self.after(100, self._process_queue)
 
     def _populate_list_ui(self, campaigns):
-        """(Runs on the main GUI thread) Clears old widgets and builds the button list."""
-        self.loading_label.destroy()
-        for btn in self.campaign_buttons:
-            btn.destroy()
-        self.campaign_buttons.clear()
+        """(Runs on the main GUI thread) Shows the campaigns in the list."""
         self.selected_campaign = None
+        self.campaign_list.empty_label.configure(text="No saved games found.")
+        self.campaign_list.set_items(campaigns)
 
-        if not campaigns:
-            ctk.CTkLabel(self.campaign_list_frame, text="No saved games found.").pack()
-        else:
-            for name in campaigns:
-                btn = ctk.CTkButton(self.campaign_list_frame, text=name, 
-                                    command=lambda n=name: self._on_campaign_select(n),
-                                    fg_color="transparent", border_width=1, border_color="gray50")
-                btn.pack(pady=2, padx=5, fill="x")
-                self.campaign_buttons.append(btn)
-    
     def _on_campaign_select(self, campaign_name):
         self.selected_campaign = campaign_name
-        for btn in self.campaign_buttons:
-            if btn.cget("text") == campaign_name:
-                btn.configure(fg_color="#3B8ED0", border_color="#3B8ED0")
-            else:
-                btn.configure(fg_color="transparent", border_color="gray50")
-    
+        self.profile_combo.set(self.controller.campaign_model.get_campaign_db_profile(campaign_name))
+
     def _on_close(self):
         """Ensures the grab is released before destroying the window."""
         self.grab_release()
@@ -141,6 +132,11 @@ class LoadGameWindow(ctk.CTkToplevel):
     def _load_and_close(self):
         """Schedules the loading operation and safely closes the pop-up."""
         campaign_to_load = self.selected_campaign
+        if campaign_to_load:
+            campaign_model = self.controller.campaign_model
+            chosen_profile = self.profile_combo.get()
+            if chosen_profile != campaign_model.get_campaign_db_profile(campaign_to_load):
+                campaign_model.set_campaign_db_profile(campaign_to_load, chosen_profile)
         self._on_close() # Use the safe closing method
         if campaign_to_load:
             self.controller.root.after(50, lambda: self.controller.load_game_flow(campaign_to_load))
@@ -149,7 +145,7 @@ class NewCampaignDialog(ctk.CTkToplevel):
     def __init__(self, parent, rulesets):
         super().__init__(parent)
         self.title("New Campaign")
-        self.geometry("400x300")
+        self.geometry("400x370")
         self.configure(fg_color="#2B2B2B")
         self.resizable(False, False)
         
@@ -171,6 +167,13 @@ class NewCampaignDialog(ctk.CTkToplevel):
         self.combobox.pack(pady=(0, 10), padx=20, fill="x")
         if rulesets:
             self.combobox.set(rulesets[0])
+
+        # Database Profile Selection (the read-only viewer profile makes no sense for a new campaign)
+        ctk.CTkLabel(self, text="Database Profile:", anchor="w").pack(pady=(5, 0), padx=20, fill="x")
+        writable_profiles = [name for name, pragmas in DB_PROFILES.items() if "query_only" not in pragmas]
+        self.profile_combobox = ctk.CTkComboBox(self, values=writable_profiles, state="readonly", width=300)
+        self.profile_combobox.pack(pady=(0, 10), padx=20, fill="x")
+        self.profile_combobox.set(DEFAULT_DB_PROFILE)
         
         # Buttons
         button_frame = ctk.CTkFrame(self, fg_color="transparent")
@@ -199,7 +202,7 @@ class NewCampaignDialog(ctk.CTkToplevel):
             self._on_close()
             return
             
-        self.result = (campaign_name, ruleset_name)
+        self.result = (campaign_name, ruleset_name, self.profile_combobox.get())
         self._on_close()
 
     def get_input(self):
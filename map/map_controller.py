@@ -3,8 +3,6 @@ from .map_model import MapModel
 from .map_view import MapView
 from .map_generation.map_generation_controller import MapGenerationController
 from custom_dialogs import MessageBox
-from character.character_controller import CharacterController
-from npc.npc_controller import NpcController
 import customtkinter as ctk
 import math
 import os
@@ -79,16 +77,20 @@ class MapController:
                 self.app_controller.set_dirty_flag(True)
 
     def update_token_placer_list(self):
-        char_controller = self.app_controller.get_loaded_controller(CharacterController)
-        npc_controller = self.app_controller.get_loaded_controller(NpcController)
-        pc_list, npc_list = [], []
-        if char_controller:
-            pc_models = char_controller.get_character_list()
-            pc_list = [f"PC: {model.name}" for model in pc_models]
-        if npc_controller:
-            npc_models = npc_controller.get_npc_list()
-            npc_list = [f"NPC: {model.name}" for model in npc_models]
-        self.view.update_token_placer_list(pc_list + npc_list)
+        self.view.update_token_placer_list()
+
+    def search_tokens(self, text, limit):
+        """Type-ahead matches for the token placer: "PC: name" then "NPC: name" entries."""
+        kinds = (("PC: ", "character"), ("NPC: ", "npc"))
+        # A picked entry keeps its prefix in the box; search only that kind, by the name part
+        for prefix, kind in kinds:
+            if text.startswith(prefix.strip()):
+                text, kinds = text[len(prefix.strip()):], ((prefix, kind),)
+                break
+        matches = []
+        for prefix, kind in kinds:
+            matches += [prefix + name for name in self.app_controller.search_names(kind, text, limit)]
+        return matches[:limit]
 
     def set_tool(self, tool_name):
         self.current_tool = tool_name
@@ -136,7 +138,8 @@ class MapController:
         x_grid, y_grid = event.x // self.model.grid_size, event.y // self.model.grid_size
         if self.current_tool == "place_token":
             token_str = self.view.token_placer_list.get()
-            if not token_str or "No tokens" in token_str or "Load" in token_str: return
+            # Only a complete "PC: name" / "NPC: name" entry, not a half-typed one
+            if token_str not in self.search_tokens(token_str, 1): return
             token_type, token_name = token_str.split(': ', 1)
             if self.model.add_token(token_name.strip(), token_type, x_grid, y_grid, self.current_level):
                 self._redraw_viewer_canvas()
@@ -227,6 +230,7 @@ class MapController:
         self.view.draw_viewer_canvas(self.model, self)
 
     def save_map(self):
+        if not self.app_controller.ensure_writable(self.view.parent_frame): return
         if not self.model:
             MessageBox.showerror("Error", "There is no map to save.", self.view.parent_frame)
             return
@@ -251,10 +255,11 @@ class MapController:
 
     def refresh_map_list(self):
         maps = MapModel.get_all_maps(self.campaign_path)
-        self.view.update_map_list(maps)
+        self.app_controller.name_indexes["map"].reset((name, name) for name in maps)
+        self.view.update_map_list()
         
     def load_map_for_viewing(self, map_name):
-        if "Select a saved map..." in map_name:
+        if map_name == self.view.MAP_PROMPT:
             self._initialize_blank_state()
             return
         loaded_model = MapModel.load(self.campaign_path, map_name)
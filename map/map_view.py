@@ -1,10 +1,13 @@
 import customtkinter as ctk
 from PIL import Image, ImageTk, ImageDraw
 import os
-from ui_extensions import AutoWidthComboBox
+from ui_extensions import TypeAheadComboBox
 
 class MapView:
     """Manages the UI for the self-contained Map feature."""
+    MAP_PROMPT = "Select a saved map..."
+    TOKEN_PROMPT = "Type a character/NPC name..."
+
     def __init__(self, parent_frame):
         self.parent_frame = parent_frame
         self.map_photo_image = None
@@ -84,9 +87,11 @@ class MapView:
         toolbar = ctk.CTkFrame(self.viewer_tab, width=220)
         toolbar.grid(row=0, column=0, sticky="ns", padx=10, pady=10)
         ctk.CTkLabel(toolbar, text="Select Map:").pack(pady=(10, 5))
-        self.map_selection_list = AutoWidthComboBox(toolbar, command=controller.load_map_for_viewing)
+        self.map_selection_list = TypeAheadComboBox(
+            toolbar, search=lambda text, limit: controller.app_controller.search_names("map", text, limit),
+            placeholder=self.MAP_PROMPT, command=controller.load_map_for_viewing
+        )
         self.map_selection_list.pack(pady=5, padx=10, fill="x")
-        self.map_selection_list.bind("<Button-1>", lambda event: self.map_selection_list._open_dropdown_menu())
         ctk.CTkLabel(toolbar, text="Level Controls", font=ctk.CTkFont(weight="bold")).pack(pady=(10,0))
         viewer_level_frame = ctk.CTkFrame(toolbar, fg_color="transparent")
         viewer_level_frame.pack(fill="x", padx=10, pady=5)
@@ -97,7 +102,7 @@ class MapView:
         self.viewer_level_up_btn = ctk.CTkButton(viewer_level_frame, text="Up", command=lambda: controller.change_level(1))
         self.viewer_level_up_btn.pack(side="left", expand=True, padx=2)
         ctk.CTkLabel(toolbar, text="Token Tools", font=ctk.CTkFont(weight="bold")).pack(pady=(20, 5))
-        self.token_placer_list = AutoWidthComboBox(toolbar, values=["Load characters/npcs"])
+        self.token_placer_list = TypeAheadComboBox(toolbar, search=controller.search_tokens, placeholder=self.TOKEN_PROMPT)
         self.token_placer_list.pack(pady=5, padx=10, fill="x")
         ctk.CTkButton(toolbar, text="Place Token", command=lambda: controller.set_tool("place_token")).pack(pady=5, padx=10, fill="x")
         ctk.CTkButton(toolbar, text="Delete Selected", command=controller.delete_selected_tokens, fg_color="#D2691E", hover_color="#B2590E").pack(pady=5, padx=10, fill="x")
@@ -229,17 +234,11 @@ class MapView:
             x2, y2 = (t2['x'] + 0.5) * grid_size, (t2['y'] + 0.5) * grid_size
             self.viewer_canvas.create_line(x1, y1, x2, y2, fill="yellow", width=2, dash=(4, 4), tags="overlay")
 
-    def update_token_placer_list(self, tokens):
-        values = tokens or ["Load characters/npcs"]
-        self.token_placer_list.configure(values=values)
-        if tokens: self.token_placer_list.set(values[0])
-        else: self.token_placer_list.set("Load characters/npcs")
+    def update_token_placer_list(self):
+        self.token_placer_list.reset()
 
-    def update_map_list(self, maps):
-        prompt = "Select a saved map..."
-        display_values = [prompt] + (maps or [])
-        self.map_selection_list.configure(values=display_values)
-        self.map_selection_list.set(prompt)
+    def update_map_list(self):
+        self.map_selection_list.reset()
 
     def draw_static_background(self, map_model, current_level):
         canvas_width = map_model.width * map_model.grid_size
@@ -25,7 +25,7 @@ def migrate_characters(campaign_path, ruleset_name, db):
         print(f"    - Skipping characters: table already contains {count} entries.")
         return
 
-    migrated_count = 0
+    characters, migrated_files = [], []
     for filename in os.listdir(char_dir):
         if filename.endswith('.json'):
             file_path = os.path.join(char_dir, filename)
@@ -38,18 +38,25 @@ def migrate_characters(campaign_path, ruleset_name, db):
                 if 'current_hp' not in data:
                     data['current_hp'] = data.get('attributes', {}).get('Hit Points', '10')
 
-                char = CharacterModel.from_dict(campaign_path, data)
-                char.save()
-                migrated_count += 1
-                
-                # Rename file to prevent re-migration
-                shutil.move(file_path, file_path + '.migrated')
+                characters.append(CharacterModel.from_dict(campaign_path, data))
+                migrated_files.append(file_path)
 
             except Exception as e:
                 print(f"      [ERROR] Could not migrate character {filename}: {e}")
-    
-    if migrated_count > 0:
-        print(f"    - Migrated {migrated_count} characters successfully.")
+
+    if not characters:
+        return
+    try:
+        # All characters are written in one transaction, so a failure leaves the table untouched
+        CharacterModel.save_many(campaign_path, characters)
+    except Exception as e:
+        print(f"      [ERROR] Could not save migrated characters: {e}")
+        return
+
+    # Rename files to prevent re-migration
+    for file_path in migrated_files:
+        shutil.move(file_path, file_path + '.migrated')
+    print(f"    - Migrated {len(characters)} characters successfully.")
 
 def migrate_npcs(campaign_path, ruleset_name, db):
     """Migrates NPC data from individual JSON files to the database."""
@@ -64,7 +71,7 @@ def migrate_npcs(campaign_path, ruleset_name, db):
         print(f"    - Skipping NPCs: table already contains {count} entries.")
         return
         
-    migrated_count = 0
+    npcs, migrated_files = [], []
     for filename in os.listdir(npc_dir):
         if filename.endswith('.json'):
             file_path = os.path.join(npc_dir, filename)
@@ -76,16 +83,23 @@ def migrate_npcs(campaign_path, ruleset_name, db):
                 if 'current_hp' not in data:
                     data['current_hp'] = data.get('attributes', {}).get('Hit Points', '10')
 
-                npc = NpcModel.from_dict(campaign_path, data)
-                npc.save()
-                migrated_count += 1
-                shutil.move(file_path, file_path + '.migrated')
+                npcs.append(NpcModel.from_dict(campaign_path, data))
+                migrated_files.append(file_path)
                 
             except Exception as e:
                 print(f"      [ERROR] Could not migrate NPC {filename}: {e}")
 
-    if migrated_count > 0:
-        print(f"    - Migrated {migrated_count} NPCs successfully.")
+    if not npcs:
+        return
+    try:
+        NpcModel.save_many(campaign_path, npcs)
+    except Exception as e:
+        print(f"      [ERROR] Could not save migrated NPCs: {e}")
+        return
+
+    for file_path in migrated_files:
+        shutil.move(file_path, file_path + '.migrated')
+    print(f"    - Migrated {len(npcs)} NPCs successfully.")
 
 def migrate_items(campaign_path, db):
     """Migrates item data from items.json to the database."""
@@ -104,22 +118,19 @@ def migrate_items(campaign_path, db):
         print(f"    - Skipping items: table already contains {count} entries.")
         return
 
-    migrated_count = 0
     try:
         with open(item_file, 'r') as f:
             items_data = json.load(f)
         
-        item_model = ItemModel(campaign_path)
         for item_dict in items_data:
             # Ensure a unique ID exists
             if 'id' not in item_dict:
                 item_dict['id'] = str(uuid.uuid4())
-            item_model.save_item(item_dict)
-            migrated_count += 1
+        ItemModel(campaign_path).save_many(items_data)
         
         shutil.move(item_file, item_file + '.migrated')
-        if migrated_count > 0:
-            print(f"    - Migrated {migrated_count} items successfully.")
+        if items_data:
+            print(f"    - Migrated {len(items_data)} items successfully.")
 
     except Exception as e:
         print(f"      [ERROR] Could not migrate items from {item_file}: {e}")
@@ -137,21 +148,18 @@ def migrate_quests(campaign_path, db):
         print(f"    - Skipping quests: table already contains {count} entries.")
         return
 
-    migrated_count = 0
     try:
         with open(quest_file, 'r') as f:
             quests_data = json.load(f)
             
-        quest_model = QuestModel(campaign_path)
         for quest_dict in quests_data:
             if 'id' not in quest_dict:
                 quest_dict['id'] = str(uuid.uuid4())
-            quest_model.save_quest(quest_dict)
-            migrated_count += 1
+        QuestModel(campaign_path).save_many(quests_data)
             
         shutil.move(quest_file, quest_file + '.migrated')
-        if migrated_count > 0:
-            print(f"    - Migrated {migrated_count} quests successfully.")
+        if quests_data:
+            print(f"    - Migrated {len(quests_data)} quests successfully.")
             
     except Exception as e:
         print(f"      [ERROR] Could not migrate quests from {quest_file}: {e}")
@@ -0,0 +1,329 @@
+import os
+import sqlite3
+import sys
+
+# Rows handled per statement when a migration backfills existing data
+BACKFILL_BATCH_SIZE = 2000
+
+# Entity tables whose writes are recorded in change_log
+TRACKED_TABLES = ("characters", "npcs", "items", "quests")
+
+# SQL that yields the integer value of a JSON field, or NULL when it is not a whole number.
+_JSON_INT = "CASE WHEN CAST(json_extract(data, '$.{0}') AS INTEGER) || '' = TRIM(json_extract(data, '$.{0}')) THEN CAST(json_extract(data, '$.{0}') AS INTEGER) END"
+
+# (table, column, declaration, backfill expression for rows written before the column existed)
+PROMOTED_COLUMNS = [
+    ("characters", "current_hp", "INTEGER", _JSON_INT.format("current_hp")),
+    ("npcs", "current_hp", "INTEGER", _JSON_INT.format("current_hp")),
+    ("items", "name", "TEXT", "json_extract(data, '$.name')"),
+    ("items", "type", "TEXT", "json_extract(data, '$.type')"),
+    ("quests", "title", "TEXT", "json_extract(data, '$.title')"),
+    ("quests", "status", "TEXT", "json_extract(data, '$.status')"),
+]
+
+
+# --- Helpers ---
+
+def has_table(conn, name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+
+def has_column(conn, table, column):
+    return any(row[1] == column for row in conn.execute(f"PRAGMA table_info({table})"))
+
+
+def add_column(conn, table, column, declaration):
+    """Adds a column unless a campaign created before versioning already has it. Returns True if added."""
+    if has_column(conn, table, column):
+        return False
+    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+    return True
+
+
+def iter_row_batches(conn, table, columns, batch_size=BACKFILL_BATCH_SIZE):
+    """
+    Yields the rows of a table in rowid order, `batch_size` at a time, so a backfill
+    written in Python never holds more than one batch in memory.
+    """
+    last_rowid = 0
+    while True:
+        rows = conn.execute(
+            f"SELECT rowid, {columns} FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?", (last_rowid, batch_size)
+        ).fetchall()
+        if not rows:
+            return
+        last_rowid = rows[-1][0]
+        yield rows
+
+
+def backfill_column(conn, table, column, expression, report, batch_size=BACKFILL_BATCH_SIZE):
+    """Sets `column` from a SQL expression, one rowid range at a time, reporting progress."""
+    total = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    last_rowid, done = 0, 0
+    while done < total:
+        upper, count = conn.execute(
+            f"SELECT MAX(rowid), COUNT(*) FROM (SELECT rowid FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?)",
+            (last_rowid, batch_size)
+        ).fetchone()
+        if not count:
+            break
+        conn.execute(f"UPDATE {table} SET {column} = {expression} WHERE rowid > ? AND rowid <= ?", (last_rowid, upper))
+        last_rowid, done = upper, done + count
+        report(f"Filling {table}.{column}", done, total)
+
+
+# --- Migrations ---
+# Each one runs exactly once per campaign, inside its own transaction. Campaigns created
+# before user_version was recorded already have some of these objects, so every step
+# must tolerate finding its tables and columns in place.
+
+def _create_base_tables(conn, report):
+    # Using TEXT to store JSON blobs for flexibility.
+    # Indexing key fields for fast lookups.
+    statements = [
+        """
+        CREATE TABLE IF NOT EXISTS characters (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            rule_set TEXT NOT NULL,
+            data TEXT NOT NULL
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_char_name ON characters (name);",
+        "CREATE INDEX IF NOT EXISTS idx_char_ruleset ON characters (rule_set);",
+        """
+        CREATE TABLE IF NOT EXISTS npcs (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            rule_set TEXT NOT NULL,
+            data TEXT NOT NULL
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_npc_name ON npcs (name);",
+        "CREATE INDEX IF NOT EXISTS idx_npc_ruleset ON npcs (rule_set);",
+        """
+        CREATE TABLE IF NOT EXISTS items (
+            id TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS quests (
+            id TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        """
+    ]
+    for statement in statements:
+        conn.execute(statement)
+
+
+def _add_promoted_columns(conn, report):
+    # Promoted columns: copies of frequently queried fields from the JSON blob, written
+    # by the models' save methods so that filters can use an index instead of json.loads.
+    for table, column, declaration, backfill in PROMOTED_COLUMNS:
+        if add_column(conn, table, column, declaration):
+            backfill_column(conn, table, column, backfill, report)
+    statements = [
+        "CREATE INDEX IF NOT EXISTS idx_char_ruleset_hp ON characters (rule_set, current_hp);",
+        "CREATE INDEX IF NOT EXISTS idx_npc_ruleset_hp ON npcs (rule_set, current_hp);",
+        "CREATE INDEX IF NOT EXISTS idx_item_name ON items (name COLLATE NOCASE);",
+        "CREATE INDEX IF NOT EXISTS idx_item_type ON items (type);",
+        "CREATE INDEX IF NOT EXISTS idx_quest_status ON quests (status);",
+        "CREATE INDEX IF NOT EXISTS idx_quest_title ON quests (title);",
+    ]
+    for statement in statements:
+        conn.execute(statement)
+
+
+def _create_quest_links(conn, report):
+    # Normalized copy of each quest's linked_npcs/linked_items lists, kept in sync by
+    # QuestModel so that "quests for this NPC" is an indexed lookup in either direction.
+    is_new = not has_table(conn, "quest_links")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS quest_links (
+            quest_id TEXT NOT NULL,
+            target_type TEXT NOT NULL,
+            target_id TEXT NOT NULL,
+            PRIMARY KEY (quest_id, target_type, target_id)
+        ) WITHOUT ROWID;
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_quest_links_target ON quest_links (target_type, target_id);")
+    if not is_new:
+        return
+    total = conn.execute("SELECT COUNT(*) FROM quests").fetchone()[0]
+    done = 0
+    for rows in iter_row_batches(conn, "quests", "id"):
+        first_rowid, last_rowid = rows[0][0], rows[-1][0]
+        for target_type, list_key in (("npc", "linked_npcs"), ("item", "linked_items")):
+            conn.execute(f"""
+                INSERT OR IGNORE INTO quest_links (quest_id, target_type, target_id)
+                SELECT quests.id, '{target_type}', links.value
+                FROM quests, json_each(quests.data, '$.{list_key}') AS links
+                WHERE quests.rowid BETWEEN ? AND ?
+            """, (first_rowid, last_rowid))
+        done += len(rows)
+        report("Linking quests", done, total)
+
+
+def _create_search_index(conn, report):
+    # Full-text search: search_docs maps each entity to the rowid of its FTS5 document.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS search_docs (
+            doc_id INTEGER PRIMARY KEY,
+            entity_type TEXT NOT NULL,
+            entity_id TEXT NOT NULL,
+            UNIQUE (entity_type, entity_id)
+        );
+    """)
+    if has_table(conn, "search_index"):
+        return
+    try:
+        conn.execute(
+            "CREATE VIRTUAL TABLE search_index USING fts5("
+            "name, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3');"
+        )
+    except sqlite3.OperationalError as e:
+        print(f"  - [WARNING] Full-text search is unavailable in this SQLite build: {e}")
+        return
+
+    conn.execute("DELETE FROM search_docs")
+    sources = [
+        ("character", "characters", "id, name, ''"),
+        ("npc", "npcs", "id, name, COALESCE(json_extract(data, '$.gm_notes'), '')"),
+        ("item", "items", """id, json_extract(data, '$.name'),
+            COALESCE(json_extract(data, '$.type'), '') || ' ' || COALESCE(json_extract(data, '$.description'), '')"""),
+        ("quest", "quests", """id, json_extract(data, '$.title'),
+            COALESCE(json_extract(data, '$.description'), '') || ' ' || COALESCE(
+                (SELECT group_concat(json_extract(value, '$.text'), ' ') FROM json_each(quests.data, '$.objectives')), '')"""),
+    ]
+    for entity_type, table, columns in sources:
+        total = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        done = 0
+        for rows in iter_row_batches(conn, table, columns):
+            for _, entity_id, name, body in rows:
+                doc_id = conn.execute(
+                    "INSERT INTO search_docs (entity_type, entity_id) VALUES (?, ?)", (entity_type, entity_id)
+                ).lastrowid
+                conn.execute("INSERT INTO search_index (rowid, name, body) VALUES (?, ?, ?)", (doc_id, name or "", body))
+            done += len(rows)
+            report(f"Indexing {table} for search", done, total)
+
+
+def _add_change_tracking(conn, report):
+    # Change tracking: every insert/replace/delete on an entity table appends to change_log,
+    # and the row's revision is set to that log sequence number. Caches remember the last
+    # sequence they saw and only re-read the rows logged after it.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            entity_id TEXT NOT NULL,
+            op TEXT NOT NULL
+        );
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_change_log_table ON change_log (table_name, seq);")
+    for table in TRACKED_TABLES:
+        add_column(conn, table, "revision", "INTEGER NOT NULL DEFAULT 0")
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_logged_write AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO change_log (table_name, entity_id, op) VALUES ('{table}', NEW.id, 'write');
+                UPDATE {table} SET revision = last_insert_rowid() WHERE id = NEW.id;
+            END;
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_logged_delete AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO change_log (table_name, entity_id, op) VALUES ('{table}', OLD.id, 'delete');
+            END;
+        """)
+
+
+def _add_serializer_formats(conn, report):
+    # Rows may now be stored in a non-JSON format (see serialization.py); the tag says which.
+    # Migrations after this one must decode `data` in Python rather than with json_extract.
+    for table in TRACKED_TABLES:
+        add_column(conn, table, "format", "TEXT NOT NULL DEFAULT 'json'")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS codec_dictionaries (
+            dict_id INTEGER PRIMARY KEY,
+            content BLOB NOT NULL
+        );
+    """)
+
+
+def _add_pagination_indexes(conn, report):
+    # Keyset pagination walks these (sort key, id) indexes; the single-column name/title
+    # indexes are prefixes of the new ones and would only cost extra writes.
+    statements = [
+        "CREATE INDEX IF NOT EXISTS idx_char_ruleset_name ON characters (rule_set, name, id);",
+        "CREATE INDEX IF NOT EXISTS idx_npc_ruleset_name ON npcs (rule_set, name, id);",
+        "CREATE INDEX IF NOT EXISTS idx_item_name_id ON items (name COLLATE NOCASE, id);",
+        "CREATE INDEX IF NOT EXISTS idx_quest_title_id ON quests (title, id);",
+        "DROP INDEX IF EXISTS idx_item_name;",
+        "DROP INDEX IF EXISTS idx_quest_title;",
+    ]
+    for statement in statements:
+        conn.execute(statement)
+
+
+# (version, description, function) in the order they must be applied. Never reorder or
+# edit a released migration; add a new one with the next version number instead.
+MIGRATIONS = [
+    (1, "Create entity tables", _create_base_tables),
+    (2, "Promote queried JSON fields to columns", _add_promoted_columns),
+    (3, "Create quest link table", _create_quest_links),
+    (4, "Create full-text search index", _create_search_index),
+    (5, "Add change tracking", _add_change_tracking),
+    (6, "Add per-row serializer format", _add_serializer_formats),
+    (7, "Add pagination indexes", _add_pagination_indexes),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, progress=None):
+    """
+    Brings a campaign database up to SCHEMA_VERSION. An up-to-date database costs a
+    single PRAGMA read. `progress(message, done, total)` is called while large tables
+    are backfilled. Returns the schema version after migrating.
+    """
+    if get_schema_version(conn) >= SCHEMA_VERSION:
+        return SCHEMA_VERSION
+    report = progress or (lambda message, done, total: None)
+
+    for version, description, apply in MIGRATIONS:
+        # IMMEDIATE takes the write lock up front, so two processes opening the same
+        # campaign cannot both apply a migration.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if get_schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            report(f"Migration {version}: {description}", 0, 1)
+            apply(conn, report)
+            conn.execute(f"PRAGMA user_version = {version}")
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+    return SCHEMA_VERSION
+
+
+def _print_progress(message, done, total):
+    print(f"  - {message}: {done}/{total}")
+
+
+if __name__ == '__main__':
+    # Usage: python migrations.py <campaign folder> [...]
+    for campaign_path in sys.argv[1:]:
+        print(f"Migrating {campaign_path}")
+        connection = sqlite3.connect(os.path.join(campaign_path, 'campaign.db'))
+        try:
+            print(f"  - Schema version {migrate(connection, _print_progress)}")
+        finally:
+            connection.close()
@@ -1,11 +1,19 @@
+import copy
+import queue
+import threading
 from tkinter import messagebox
 from .npc_model import NpcModel
 from .npc_view import NpcView
 from custom_dialogs import MessageBox
 from character.character_view import AddItemDialog
 from item.item_controller import ItemController
+from item.item_model import ItemModel
+from item.item_catalog import normalize_item_name
 from quest.quest_controller import QuestController
-from .npc_generator_model import NpcGeneratorModel
+from .npc_generator_model import NpcGeneratorModel, MAX_BATCH_SIZE
+
+# How often the main thread collects progress from a running batch generation
+BATCH_POLL_MS = 100
 
 class NpcController:
     def __init__(self, app_controller, parent_frame, campaign_path):
@@ -15,9 +23,12 @@ class NpcController:
         self.current_rule_set = None
         self.current_npc = None
         self.generated_npc_data = None
+        # Running batch generation: (cancel event, result queue, writer, campaign path), or None
+        self.batch_job = None
+        self._batch_poll_id = None
 
         # --- LAZY LOAD: Load data when controller is created ---
-        self.app_controller._reload_npc_cache()
+        self.app_controller._refresh_npc_cache()
 
     def get_item_controller(self):
         return self.app_controller.get_loaded_controller(ItemController)
@@ -26,6 +37,7 @@ class NpcController:
         return self.app_controller.get_loaded_controller(QuestController)
 
     def get_npc_list(self):
+        """Returns the cached, name-sorted EntityHandles of the current ruleset."""
         if self.current_rule_set:
             cache_key = f"npcs_models_{self.current_rule_set['name']}"
             return self.app_controller.get_cached_data(cache_key) or []
@@ -39,24 +51,15 @@ class NpcController:
         self.update_npc_sheet_list()
 
     def update_npc_management_list(self):
-        if self.current_rule_set:
-            npcs = self.get_npc_list()
-            npc_names = [npc.name for npc in npcs]
-            self.view.update_npc_management_list(npc_names)
-        else:
-            self.view.update_npc_management_list([])
+        self.view.update_npc_management_list()
             
     def update_npc_sheet_list(self):
-        if self.current_rule_set:
-            npcs = self.get_npc_list()
-            npc_names = [npc.name for npc in npcs]
-            self.view.update_npc_sheet_list(npc_names)
-        else:
-            self.view.update_npc_sheet_list([])
+        self.view.update_npc_sheet_list()
         self.view.clear_sheet()
         self.current_npc = None
 
     def generate_random_npc(self):
+        if not self.app_controller.ensure_writable(self.view.parent_frame): return
         if not self.current_rule_set:
             MessageBox.showerror("Error", "A rule set must be loaded to generate an NPC.", self.view.parent_frame)
             return
@@ -67,23 +70,152 @@ class NpcController:
         generator = NpcGeneratorModel()
         npc_data = generator.generate(self.current_rule_set)
         created_items = []
-        all_item_names = [item['name'].lower() for item in item_controller.all_items]
+        missing_items_data = []
+        catalog = self.app_controller.get_item_catalog()
         for item_to_create_data in npc_data["items_to_create"]:
-            if item_to_create_data["name"].lower() not in all_item_names:
-                new_item = item_controller.create_item_from_data(item_to_create_data)
-                created_items.append(new_item)
+            item = catalog.find_by_name(item_to_create_data["name"])
+            if item is None:
+                missing_items_data.append(item_to_create_data)
             else:
-                for item in item_controller.all_items:
-                    if item['name'].lower() == item_to_create_data['name'].lower():
-                        created_items.append(item)
-                        break
-        item_controller.load_all_items()
+                created_items.append(item)
+        # Write all of the NPC's new items in a single transaction; the item list refreshes once it lands
+        created_items.extend(item_controller.create_items_from_data(missing_items_data))
         self.generated_npc_data = npc_data
         self.generated_npc_data['created_items'] = created_items
         self.view.populate_creator_fields(npc_data)
         MessageBox.showinfo("NPC Generated", f"Generated a new {npc_data['name']}! Review and save when ready.", self.view.parent_frame)
 
+    def generate_npc_batch(self):
+        """Generates and saves many NPCs at once in a worker process pool, reporting progress."""
+        if not self.app_controller.ensure_writable(self.view.parent_frame): return
+        if self.batch_job:
+            return
+        if not self.current_rule_set:
+            MessageBox.showerror("Error", "A rule set must be loaded to generate NPCs.", self.view.parent_frame)
+            return
+        try:
+            count = int(self.view.get_batch_count())
+        except ValueError:
+            count = 0
+        if not 1 <= count <= MAX_BATCH_SIZE:
+            MessageBox.showerror("Error", f"Enter a number of NPCs between 1 and {MAX_BATCH_SIZE}.", self.view.parent_frame)
+            return
+        cancel_event, results = threading.Event(), queue.Queue()
+        # The batch is saved through the session it was started in, and only while that session is open
+        self.batch_job = (cancel_event, results, self.app_controller.db_writer, self.campaign_path)
+        # NPC ids are unique across rulesets, so every stored id is taken, not just this ruleset's
+        taken_ids = NpcModel.get_all_ids(self.campaign_path)
+        worker = threading.Thread(
+            target=self._npc_batch_worker, args=(self.current_rule_set, count, taken_ids, cancel_event, results), daemon=True
+        )
+        worker.start()
+        self.view.set_batch_running(True, f"Generating {count} NPCs...")
+        self._batch_poll_id = self.app_controller.root.after(BATCH_POLL_MS, self._poll_npc_batch)
+
+    def cancel_npc_batch(self):
+        if self.batch_job:
+            self.batch_job[0].set()
+            self.view.set_batch_running(True, "Cancelling...")
+
+    def stop_background_work(self):
+        """Cancels a running batch generation and its polling when the editor session ends."""
+        if self._batch_poll_id is not None:
+            self.app_controller.root.after_cancel(self._batch_poll_id)
+            self._batch_poll_id = None
+        if self.batch_job:
+            self.batch_job[0].set()
+            self.batch_job = None
+
+    @staticmethod
+    def _npc_batch_worker(rule_set, count, taken_ids, cancel_event, results):
+        """(Runs on a background thread) Drives the generator's process pool."""
+        try:
+            npcs = NpcGeneratorModel().generate_batch(
+                rule_set, count, taken_ids=taken_ids, cancel_event=cancel_event,
+                progress=lambda done, total: results.put(("progress", done, total))
+            )
+            results.put(("done", npcs))
+        except Exception as e:
+            results.put(("error", e))
+
+    def _poll_npc_batch(self):
+        """(Runs on the main GUI thread) Shows progress and saves the batch once it is generated."""
+        self._batch_poll_id = None
+        if not self.batch_job:
+            return
+        results, writer, campaign_path = self.batch_job[1:]
+        while True:
+            try:
+                message = results.get_nowait()
+            except queue.Empty:
+                self._batch_poll_id = self.app_controller.root.after(BATCH_POLL_MS, self._poll_npc_batch)
+                return
+            if message[0] == "progress":
+                self.view.show_batch_progress(message[1], message[2])
+                continue
+            self.batch_job = None
+            if message[0] == "error":
+                print(f"  - [ERROR] NPC batch generation failed: {message[1]}")
+                self.view.set_batch_running(False, "Generation failed.")
+                MessageBox.showerror("Error", f"Could not generate NPCs: {message[1]}", self.view.parent_frame)
+            elif message[1] is None:
+                self.view.set_batch_running(False, "Cancelled; nothing was saved.")
+            else:
+                self._save_npc_batch(message[1], writer, campaign_path)
+            return
+
+    def _save_npc_batch(self, npcs_data, writer, campaign_path):
+        """Builds the generated NPCs and writes them, with any items they need, in one transaction."""
+        session_open = writer is self.app_controller.db_writer and campaign_path == self.app_controller.current_campaign_path
+        if not self.current_rule_set or not session_open:
+            self.view.set_batch_running(False, "Cancelled; nothing was saved.")
+            return
+        # Existing items are found through the catalog's name index; each missing item is created once and shared
+        catalog = self.app_controller.get_item_catalog()
+        item_model = ItemModel(campaign_path)
+        new_items_by_name = {}
+        new_items = []
+        npcs = []
+        rule_set = self.current_rule_set
+        for npc_data in npcs_data:
+            npc = NpcModel(campaign_path, npc_data["name"], rule_set['name'])
+            stats = npc_data["stats"]
+            npc.attributes = {stat: stats.get(stat, "0") for stat in rule_set['attributes']}
+            npc.skills = {stat: stats.get(stat, "0") for stat in rule_set['skills']}
+            npc.current_hp = npc.attributes.get("Hit Points", 10)
+            npc.gm_notes = npc_data["gm_notes"]
+            for item_data in npc_data["items_to_create"]:
+                name_key = normalize_item_name(item_data["name"])
+                item = catalog.find_by_name(name_key) or new_items_by_name.get(name_key)
+                if item is None:
+                    item = item_model.create_item(
+                        item_data["name"], item_data["description"], item_data["type"], item_data["modifiers"]
+                    )
+                    new_items_by_name[name_key] = item
+                    new_items.append(item)
+                npc.inventory.append({"item_id": item["id"], "quantity": 1, "equipped": True})
+            npcs.append(npc)
+        self.view.set_batch_running(True, f"Saving {len(npcs)} NPCs...")
+        catalog.add_pending(new_items)
+        writer.submit(
+            None, lambda: NpcModel.save_many(campaign_path, npcs, new_items),
+            on_success=lambda: self._on_npc_batch_saved(len(npcs), new_items),
+            on_error=lambda error: self._on_npc_batch_save_failed(error, new_items)
+        )
+
+    def _on_npc_batch_save_failed(self, error, new_items):
+        self.app_controller.get_item_catalog().drop_pending(new_items)
+        self.view.set_batch_running(False, "Saving failed; nothing was saved.")
+        self.app_controller._show_write_error(error)
+
+    def _on_npc_batch_saved(self, count, new_items):
+        self.view.set_batch_running(False, f"Saved {count} NPCs.")
+        self.app_controller.on_character_or_npc_list_changed()
+        if new_items:
+            self.app_controller.get_item_catalog().apply_saved(new_items)
+
     def save_new_npc(self):
+        if not self.app_controller.ensure_writable(self.view.parent_frame): return
         if not self.current_rule_set:
             MessageBox.showerror("Error", "No rule set loaded.", self.view.parent_frame)
             return
@@ -95,33 +227,44 @@ class NpcController:
         for key, entry in self.view.npc_creator_entries.items():
             value = entry.get() or "0"
             if key in self.current_rule_set['attributes']:
-                npc.attributes[key] = value
+                npc.set_attribute(key, value)
             elif key in self.current_rule_set['skills']:
-                npc.skills[key] = value
-        npc.current_hp = npc.attributes.get("Hit Points", "10")
+                npc.set_skill(key, value)
+        npc.current_hp = npc.attributes.get("Hit Points", 10)
         npc.gm_notes = self.view.npc_notes_text.get("1.0", "end-1c")
         if self.generated_npc_data and self.generated_npc_data["name"] == name:
             for item in self.generated_npc_data.get("created_items", []):
                 npc.inventory.append({"item_id": item["id"], "quantity": 1, "equipped": True})
-        npc.save()
+        self.app_controller.db_writer.submit(
+            ("npcs", npc.get_id()), npc.save, on_success=lambda: self._on_new_npc_saved(name)
+        )
+        self.view.clear_creator_fields()
+        self.generated_npc_data = None
+
+    def _on_new_npc_saved(self, name):
+        self.app_controller.on_character_or_npc_list_changed()
         MessageBox.showinfo("Success", f"NPC '{name}' saved.", self.view.parent_frame)
 
+    def _on_npc_deleted(self, npc_name):
         self.app_controller.on_character_or_npc_list_changed()
-        self.view.clear_creator_fields()
-        self.generated_npc_data = None
+        MessageBox.showinfo("Deleted", f"NPC '{npc_name}' has been deleted.", self.view.parent_frame)
+
+    def _delete_npc(self, npc_name):
+        """Queues the deletion of an NPC on the database writer."""
+        self.app_controller.db_writer.submit(
+            ("npcs", npc_name.lower().replace(' ', '_')),
+            lambda: NpcModel.delete(self.campaign_path, npc_name),
+            on_success=lambda: self._on_npc_deleted(npc_name)
+        )
 
     def delete_selected_npc(self):
+        if not self.app_controller.ensure_writable(self.view.parent_frame): return
         npc_name = self.view.npc_management_list.get().strip()
         if not npc_name or npc_name == "-":
             MessageBox.showerror("Error", "Please select an NPC from the list to delete.", self.view.parent_frame)
             return
         if MessageBox.askyesno("Confirm Deletion", f"Are you sure you want to permanently delete {npc_name}?", self.view.parent_frame):
-            if NpcModel.delete(self.campaign_path, npc_name):
-                MessageBox.showinfo("Deleted", f"NPC '{npc_name}' has been deleted.", self.view.parent_frame)
-                
-                self.app_controller.on_character_or_npc_list_changed()
-            else:
-                MessageBox.showerror("Error", f"Could not find file for NPC '{npc_name}'.", self.view.parent_frame)
+            self._delete_npc(npc_name)
 
     def load_npc_to_sheet(self, refresh=False):
         item_controller = self.get_item_controller()
@@ -133,7 +276,12 @@ class NpcController:
             self.view.clear_sheet()
             return
             
-        self.current_npc = NpcModel.load(self.campaign_path, npc_name)
+        # The cached handle keeps the shared instance alive, so switching sheets is a memory hit.
+        # Queued saves are snapshots of that same instance, so it already holds them: no need to wait for the writer
+        handle = self.app_controller.get_entity_handle(
+            f"npcs_models_{self.current_rule_set['name']}", npc_name.lower().replace(' ', '_')
+        ) if self.current_rule_set else None
+        self.current_npc = handle.model if handle else NpcModel.load(self.campaign_path, npc_name)
         if not self.current_npc:
             MessageBox.showerror("Error", f"Could not load NPC: {npc_name}", self.view.parent_frame)
             return
@@ -145,6 +293,7 @@ class NpcController:
             self.app_controller.set_dirty_flag(False)
         
     def save_npc_sheet(self):
+        if not self.app_controller.ensure_writable(self.view.parent_frame): return
         if not self.current_npc: return
         self.current_npc.current_hp = self.view.current_hp_entry.get()
         for key, entry in self.view.npc_sheet_entries.items():
@@ -154,26 +303,28 @@ class NpcController:
             else:
                 base_value = full_value
             if key in self.current_npc.attributes:
-                self.current_npc.attributes[key] = base_value
+                self.current_npc.set_attribute(key, base_value)
             elif key in self.current_npc.skills:
-                self.current_npc.skills[key] = base_value
+                self.current_npc.set_skill(key, base_value)
         self.current_npc.gm_notes = self.view.sheet_notes_text.get("1.0", "end-1c")
-        self.current_npc.save()
+        # The writer gets a snapshot, so further edits on the sheet cannot race the write
+        snapshot = copy.deepcopy(self.current_npc)
+        self.current_npc.mark_saved()
+        self.app_controller.db_writer.submit(
+            ("npcs", snapshot.get_id()), snapshot.save,
+            on_success=lambda: MessageBox.showinfo("Success", f"Changes to '{snapshot.name}' saved.", self.view.parent_frame)
+        )
         self.app_controller.set_dirty_flag(False)
-        MessageBox.showinfo("Success", f"Changes to '{self.current_npc.name}' saved.", self.view.parent_frame)
 
     def delete_current_npc(self):
+        if not self.app_controller.ensure_writable(self.view.parent_frame): return
         if not self.current_npc: return
         npc_name = self.current_npc.name
         if MessageBox.askyesno("Confirm Deletion", f"Are you sure you want to permanently delete {npc_name}?", self.view.parent_frame):
-            if NpcModel.delete(self.campaign_path, npc_name):
-                MessageBox.showinfo("Deleted", f"NPC '{npc_name}' has been deleted.", self.view.parent_frame)
-                self.current_npc = None
-                self.view.clear_sheet()
-                self.app_controller.on_character_or_npc_list_changed()
-                self.app_controller.set_dirty_flag(False)
-            else:
-                MessageBox.showerror("Error", f"Could not find file for NPC '{npc_name}'.", self.view.parent_frame)
+            self._delete_npc(npc_name)
+            self.current_npc = None
+            self.view.clear_sheet()
+            self.app_controller.set_dirty_flag(False)
 
     def show_add_item_dialog(self):
         if not self.current_npc: return
@@ -181,7 +332,8 @@ class NpcController:
         if not item_controller:
             MessageBox.showerror("Error", "The 'Items' feature must be open in a pane to add items.", self.view.parent_frame)
             return
-        dialog = AddItemDialog(parent=self.view.parent_frame, all_items=item_controller.all_items)
+        dialog = AddItemDialog(parent=self.view.parent_frame, all_items=item_controller.all_items,
+                               search=self.app_controller.search_items)
         selected_item = dialog.get_selection()
         if selected_item:
             self.add_item_to_inventory(selected_item)
@@ -196,6 +348,7 @@ class NpcController:
                 break
         else:
             self.current_npc.inventory.append({"item_id": item_to_add["id"], "quantity": 1, "equipped": False})
+        self.current_npc.touch()
         self.view.display_sheet_data(self.current_npc, item_controller, self)
         self.mark_as_dirty()
 
@@ -209,6 +362,7 @@ class NpcController:
                 if inv_entry["quantity"] <= 0:
                     self.current_npc.inventory.pop(i)
                 break
+        self.current_npc.touch()
         self.view.display_sheet_data(self.current_npc, item_controller, self)
         self.mark_as_dirty()
 
@@ -218,7 +372,7 @@ class NpcController:
         if not item_controller: return
         for inv_entry in self.current_npc.inventory:
             if inv_entry["item_id"] == inv_entry_to_toggle["item_id"]:
-                inv_entry["equipped"] = not inv_entry.get("equipped", False)
+                self.app_controller.set_item_equipped(self.current_npc, inv_entry, not inv_entry.get("equipped", False))
                 break
         self.view.display_sheet_data(self.current_npc, item_controller, self)
         self.mark_as_dirty()
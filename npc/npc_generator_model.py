@@ -1,147 +1,271 @@
+import copy
+import json
+import multiprocessing
+import os
 import random
+import threading
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from utils import resource_path
+
+# NPCs generated per process-pool task; also the unit of progress reporting and cancellation
+BATCH_CHUNK_SIZE = 250
+# Upper bound for one batch request
+MAX_BATCH_SIZE = 10000
+
+# Generator content: one JSON pack per game system/genre, plus packs of generic traits
+GENERATOR_PACKS_DIR = 'data/generator_packs'
+GENERATOR_PACK_FORMAT_VERSION = 1
+# Attribute keywords a ruleset must share with a system for it to be recognized
+SYSTEM_MATCH_THRESHOLD = 3
+_LIST_FIELDS = ("names", "surnames", "origins", "goals", "secrets")
+_TRAIT_FIELDS = ("adjectives", "voices", "mannerisms", "appearances")
+
+# Loaded once per process on first use
+_packs = None
+_packs_lock = threading.Lock()
+# (ruleset name, attributes, skills) -> system name and its per-archetype primary stats
+_ruleset_plans = {}
+
+# One generator per worker process, built on its first chunk
+_worker_generator = None
+
+
+def _generate_chunk(rule_set, seed, count):
+    """(Runs in a worker process) Generates `count` NPCs with an RNG seeded for this chunk."""
+    global _worker_generator
+    if _worker_generator is None:
+        _worker_generator = NpcGeneratorModel()
+    rng = random.Random(seed)
+    return [_worker_generator.generate(rule_set, rng) for _ in range(count)]
+
+
+class GeneratorPacks:
+    """
+    The merged content of every generator pack: `systems` (name -> content, in priority
+    order), the generic `traits`, and the `default_system`. A pack with the name of an
+    already loaded system adds to it, so a third-party pack can just bring more names.
+    """
+    def __init__(self):
+        self.systems = {}
+        self.traits = {field: [] for field in _TRAIT_FIELDS}
+        self.default_system = None
+
+    def add_pack(self, pack):
+        for field, values in pack.get("traits", {}).items():
+            self.traits.setdefault(field, []).extend(values)
+        if "archetypes" not in pack:
+            return
+        system = self.systems.setdefault(pack["name"], {
+            "keywords": [], "archetypes": {}, **{field: [] for field in _LIST_FIELDS}
+        })
+        system["keywords"].extend(keyword for keyword in pack.get("keywords", []) if keyword not in system["keywords"])
+        system["archetypes"].update(pack["archetypes"])
+        for field in _LIST_FIELDS:
+            system[field].extend(pack.get(field, []))
+        if pack.get("default") or self.default_system is None:
+            self.default_system = pack["name"]
+
+    def finish(self):
+        """Precomputes the lookup data the generator would otherwise rebuild per NPC."""
+        for system in self.systems.values():
+            system["keyword_set"] = frozenset(keyword.lower() for keyword in system["keywords"])
+            system["archetype_names"] = list(system["archetypes"])
+            for archetype in system["archetypes"].values():
+                archetype["primary_stats_lower"] = [stat.lower() for stat in archetype["primary_stats"]]
+
+
+def load_generator_packs(packs_dir=GENERATOR_PACKS_DIR):
+    """Reads and merges every pack in `packs_dir` (system packs in priority order)."""
+    packs_path = resource_path(packs_dir)
+    packs = []
+    for file_name in sorted(os.listdir(packs_path)) if os.path.isdir(packs_path) else []:
+        if not file_name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(packs_path, file_name), 'r', encoding='utf-8') as f:
+                pack = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"  - [WARNING] Skipping generator pack '{file_name}': {e}")
+            continue
+        if pack.get("format_version") != GENERATOR_PACK_FORMAT_VERSION:
+            print(f"  - [WARNING] Skipping generator pack '{file_name}': unsupported format_version {pack.get('format_version')!r}")
+            continue
+        if "archetypes" in pack and not pack.get("name"):
+            print(f"  - [WARNING] Skipping generator pack '{file_name}': a system pack needs a name")
+            continue
+        packs.append(pack)
+    merged = GeneratorPacks()
+    for pack in sorted(packs, key=lambda pack: pack.get("priority", 100)):
+        merged.add_pack(pack)
+    merged.finish()
+    return merged
+
+
+def get_generator_packs():
+    """The process-wide generator content, loaded on first use."""
+    global _packs
+    if _packs is None:
+        with _packs_lock:
+            if _packs is None:
+                _packs = load_generator_packs()
+    return _packs
+
 
 class NpcGeneratorModel:
     """
     A service model for generating random but plausible NPC data, now with awareness
-    of multiple TTRPG systems and genres.
+    of multiple TTRPG systems and genres. The content comes from the data packs in
+    data/generator_packs, shared by every generator in the process.
     """
 
     def __init__(self):
-        # The entire data structure is now organized by game system/genre.
-        self.systems = {
-            "D&D / Fantasy": {
-                "keywords": ["Strength", "Dexterity", "Constitution", "Wisdom", "Charisma", "Intelligence"],
-                "archetypes": {
-                    "Fighter": {
-                        "primary_stats": ["Strength", "Hit Points"], "occupations": ["Town Guard", "Mercenary", "Veteran", "Gladiator"],
-                        "items": [{"name": "Longsword", "type": "Weapon", "description": "A standard steel longsword.", "modifiers": []}, {"name": "Chainmail Armor", "type": "Armor", "description": "A suit of interlocking metal rings.", "modifiers": [{"stat": "Dodge Chance", "value": -2}]}]
-                    },
-                    "Rogue": {
-                        "primary_stats": ["Dexterity", "Stealth"], "occupations": ["Thief", "Spy", "Assassin", "Scout"],
-                        "items": [{"name": "Dagger", "type": "Weapon", "description": "A small, easily concealed dagger.", "modifiers": []}, {"name": "Leather Armor", "type": "Armor", "description": "Armor made of hardened leather.", "modifiers": []}]
-                    },
-                    "Wizard": {
-                        "primary_stats": ["Intelligence", "Arcana"], "occupations": ["Hedge Mage", "Court Wizard", "Scholar"],
-                        "items": [{"name": "Wizard Robes", "type": "Armor", "description": "Flowing robes with arcane embroidery.", "modifiers": []}, {"name": "Quarterstaff", "type": "Weapon", "description": "A sturdy oaken staff.", "modifiers": [{"stat": "Magic", "value": 1}]}]
-                    },
-                    "Cleric": {
-                        "primary_stats": ["Wisdom", "Medicine"], "occupations": ["Acolyte", "Traveling Healer", "Temple Priest"],
-                        "items": [{"name": "Mace", "type": "Weapon", "description": "A blunt-force weapon favored by clerics.", "modifiers": []}, {"name": "Holy Symbol", "type": "Miscellaneous", "description": "A silver amulet of a deity.", "modifiers": [{"stat": "Wisdom", "value": 1}]}]
-                    },
-                    "Barbarian": {
-                        "primary_stats": ["Strength", "Constitution", "Intimidation"], "occupations": ["Tribal Outcast", "Raider", "Pit Fighter"],
-                        "items": [{"name": "Greataxe", "type": "Weapon", "description": "A massive, intimidating axe.", "modifiers": []}, {"name": "Hide Armor", "type": "Armor", "description": "Armor made from the thick hides of beasts.", "modifiers": []}]
-                    },
-                },
-                "names": ["Alden", "Bram", "Faye", "Gwen", "Ronan", "Seraphina", "Kael", "Moira"],
-                "surnames": ["Blackwood", "Stonehand", "Swiftwater", "Greycastle", "Oakenshield"],
-                "origins": ["Raised in a quiet farming village,", "Trained from a young age in a remote monastery,", "The sole survivor of a goblin raid on their caravan,"],
-                "goals": ["avenge a fallen mentor.", "find a lost family heirloom.", "reclaim their ancestral lands from orcs."],
-                "secrets": ["is secretly a member of the thieves' guild.", "possesses a cursed magic item they cannot get rid of.", "is the illegitimate heir to a minor noble house."],
-            },
-            "Cyberpunk": {
-                "keywords": ["Reflexes", "Tech", "Cool", "Body", "Empathy"],
-                "archetypes": {
-                    "Solo": {
-                        "primary_stats": ["Reflexes", "Body", "Handguns", "Rifles"], "occupations": ["Corporate Enforcer", "Mercenary", "Cyberpsycho Hunter"],
-                        "items": [{"name": "Heavy Pistol", "type": "Weapon", "description": "A reliable, high-caliber sidearm.", "modifiers": []}, {"name": "Armored Vest", "type": "Armor", "description": "Standard-issue kevlar body armor.", "modifiers": []}]
-                    },
-                    "Netrunner": {
-                        "primary_stats": ["Intelligence", "Hacking", "Electronics"], "occupations": ["Data Thief", "System Saboteur", "Cyber-Detective"],
-                        "items": [{"name": "Cyberdeck", "type": "Miscellaneous", "description": "A high-end deck for navigating the Net.", "modifiers": [{"stat": "Hacking", "value": 2}]}, {"name": "Light Pistol", "type": "Weapon", "description": "A small pistol for self-defense.", "modifiers": []}]
-                    },
-                    "Techie": {
-                        "primary_stats": ["Tech", "Engineering", "Crafting"], "occupations": ["Ripperdoc", "Mechanic", "Weaponsmith"],
-                        "items": [{"name": "Tech Toolkit", "type": "Miscellaneous", "description": "A full set of advanced cybernetic and electronic tools.", "modifiers": [{"stat": "Tech", "value": 2}]}, {"name": "Heavy Wrench", "type": "Weapon", "description": "It's for repairs, mostly.", "modifiers": []}]
-                    },
-                    "Fixer": {
-                        "primary_stats": ["Cool", "Persuasion", "Streetwise"], "occupations": ["Information Broker", "Smuggler", "Gang Leader"],
-                        "items": [{"name": "Burner Phone", "type": "Miscellaneous", "description": "An untraceable, disposable comms device.", "modifiers": []}, {"name": "Holdout Pistol", "type": "Weapon", "description": "A tiny pistol that's easy to conceal.", "modifiers": []}]
-                    },
-                },
-                "names": ["Jax", "Kira", "Nash", "Rogue", "Spike", "V", "Yori", "Zane"],
-                "surnames": ["Jones", "Tanaka", "Kowalski", "Singh", "Volkov", "Nix"],
-                "origins": ["Grew up on the mean streets of the Combat Zone,", "An ex-corporate wage-slave who got burned,", "A nomad who left the clan for a life in the city,"],
-                "goals": ["get enough eddies for a top-tier cybernetic upgrade.", "erase their past identity from a corporate database.", "take down the gang that wronged them."],
-                "secrets": ["is secretly a corporate informant.", "has a piece of pre-Collapse tech they don't understand.", "is slowly succumbing to cyberpsychosis."],
-            },
-            "Call of Cthulhu / Horror": {
-                "keywords": ["Power", "Education", "Sanity", "Luck"],
-                "archetypes": {
-                    "Investigator": {
-                        "primary_stats": ["Investigation", "Library Use", "Spot Hidden"], "occupations": ["Private Detective", "Journalist", "Police Detective"],
-                        "items": [{"name": ".38 Revolver", "type": "Weapon", "description": "A standard-issue six-shot revolver.", "modifiers": []}, {"name": "Trench Coat", "type": "Armor", "description": "A heavy coat, good for concealing things and staying anonymous.", "modifiers": []}]
-                    },
-                    "Professor": {
-                        "primary_stats": ["Education", "Archaeology", "Occult"], "occupations": ["University Professor", "Museum Curator", "Antiquarian"],
-                        "items": [{"name": "Ancient Tome", "type": "Miscellaneous", "description": "A leather-bound book filled with cryptic text.", "modifiers": [{"stat": "Sanity", "value": -5}]}, {"name": "Satchel", "type": "Miscellaneous", "description": "A leather bag for carrying books and artifacts.", "modifiers": []}]
-                    },
-                    "Dilettante": {
-                        "primary_stats": ["Charisma", "Appraise", "Fine Art"], "occupations": ["Wealthy Heir", "Socialite", "Patron of the Arts"],
-                        "items": [{"name": "Cane Sword", "type": "Weapon", "description": "An elegant walking cane with a concealed blade.", "modifiers": []}, {"name": "Expensive Suit", "type": "Armor", "description": "A perfectly tailored suit that opens doors in high society.", "modifiers": []}]
-                    },
-                },
-                "names": ["Arthur", "Abigail", "Charles", "Eleanor", "Harvey", "Josephine", "Walter"],
-                "surnames": ["Blackwood", "Armitage", "West", "Peaslee", "Derby", "Olmstead"],
-                "origins": ["A respected academic at Miskatonic University,", "A hard-boiled detective haunted by a previous case,", "A wealthy socialite who dabbles in the occult for amusement,"],
-                "goals": ["understand a recurring, horrifying nightmare.", "find out what happened to a missing colleague.", "debunk local superstitions, only to find they are real."],
-                "secrets": ["found a strange artifact they can't get rid of.", "read a forbidden book that has started to warp their mind.", "is a member of a secret society that deals with the occult."],
-            },
-        }
-        
-        # Generic components, expanded for more variety
-        self.adjectives = ["A weary", "A cheerful", "A suspicious", "A naive", "A grizzled", "An ambitious", "A cynical", "A paranoid", "A hopeful"]
-        self.voices = ["deep and gravelly", "high and melodic", "fast and clipped", "slow and deliberate", "hoarse and quiet", "booming and confident", "soft and breathy", "nasal and whiny", "smooth and charming"]
-        self.mannerisms = ["constantly fidgets with a coin", "avoids direct eye contact", "has a noticeable limp", "often quotes obscure texts", "tends to stare off into the distance", "taps their fingers when impatient", "cracks their knuckles", "speaks with overly formal language"]
-        self.appearances = ["a jagged scar across their left eye.", "impeccably clean and well-dressed.", "covered in a light layer of grime.", "several strange tattoos on their arms.", "an air of weary sadness.", "a bright, infectious smile.", "eyes that seem to notice everything.", "a look of constant suspicion."]
-    
+        self._packs = None
+
+    @property
+    def packs(self):
+        if self._packs is None:
+            self._packs = get_generator_packs()
+        return self._packs
+
+    @property
+    def systems(self):
+        return self.packs.systems
+
     def _infer_system(self, rule_set):
         """Intelligently guesses the game system based on attribute names."""
-        attributes = [attr.lower() for attr in rule_set.get('attributes', [])]
-        for system_name, data in self.systems.items():
-            matches = 0
-            for keyword in data["keywords"]:
-                if keyword.lower() in attributes:
-                    matches += 1
-            if matches >= 3: # A reasonable threshold for a match
-                return system_name
-        return "D&D / Fantasy" # Default if no match is found
-
-    def generate(self, rule_set):
+        return self._ruleset_plan(rule_set)[0]
+
+    def _ruleset_plan(self, rule_set):
+        """
+        (system name, {archetype: the ruleset's stats that are primary for it}, all stats),
+        worked out once per ruleset.
+        """
+        attributes = rule_set.get('attributes', [])
+        skills = rule_set.get('skills', {})
+        key = (rule_set.get('name'), tuple(attributes), tuple(skills))
+        plan = _ruleset_plans.get(key)
+        if plan is not None:
+            return plan
+        attribute_set = {attr.lower() for attr in attributes}
+        system_name = self.packs.default_system
+        for name, data in self.systems.items():
+            if len(data["keyword_set"] & attribute_set) >= SYSTEM_MATCH_THRESHOLD:
+                system_name = name
+                break
+        all_stats = list(attributes) + list(skills)
+        primary_stats = {}
+        for archetype_name, archetype_data in self.systems[system_name]["archetypes"].items():
+            primary_stats[archetype_name] = frozenset(
+                stat for stat in all_stats if any(ps in stat.lower() for ps in archetype_data["primary_stats_lower"])
+            )
+        plan = _ruleset_plans.setdefault(key, (system_name, primary_stats, all_stats))
+        return plan
+
+    def generate(self, rule_set, rng=random):
         """Generates a complete NPC data dictionary based on the inferred system."""
-        system_name = self._infer_system(rule_set)
+        system_name, primary_stats, all_stats = self._ruleset_plan(rule_set)
         system_data = self.systems[system_name]
+        traits = self.packs.traits
         
-        archetype_name = random.choice(list(system_data["archetypes"].keys()))
+        archetype_name = rng.choice(system_data["archetype_names"])
         archetype_data = system_data["archetypes"][archetype_name]
 
-        name = f"{random.choice(system_data['names'])} {random.choice(system_data['surnames'])}"
+        name = f"{rng.choice(system_data['names'])} {rng.choice(system_data['surnames'])}"
         
         stats = {}
-        all_stats = rule_set.get('attributes', []) + list(rule_set.get('skills', {}).keys())
+        archetype_primary = primary_stats[archetype_name]
         for stat in all_stats:
-            if any(ps.lower() in stat.lower() for ps in archetype_data["primary_stats"]):
-                stats[stat] = str(random.randint(13, 17))
+            if stat in archetype_primary:
+                stats[stat] = str(rng.randint(13, 17))
             else:
-                stats[stat] = str(random.randint(8, 12))
+                stats[stat] = str(rng.randint(8, 12))
         
         backstory = (
-            f"{random.choice(system_data['origins'])} {name.split()[0]} {random.choice(system_data['goals'])} "
-            f"However, they harbor a secret: {name.split()[0]} {random.choice(system_data['secrets'])}"
+            f"{rng.choice(system_data['origins'])} {name.split()[0]} {rng.choice(system_data['goals'])} "
+            f"However, they harbor a secret: {name.split()[0]} {rng.choice(system_data['secrets'])}"
         )
         
         gm_notes = (
             f"--- Backstory ---\n{backstory}\n\n"
-            f"--- Appearance ---\nThey have {random.choice(self.appearances)}\n\n"
-            f"--- Personality ---\n{random.choice(self.adjectives)} {random.choice(archetype_data['occupations']).lower()}.\n\n"
-            f"--- Voice & Mannerisms ---\nVoice: {random.choice(self.voices)}. Mannerisms: {random.choice(self.mannerisms)}."
+            f"--- Appearance ---\nThey have {rng.choice(traits['appearances'])}\n\n"
+            f"--- Personality ---\n{rng.choice(traits['adjectives'])} {rng.choice(archetype_data['occupations']).lower()}.\n\n"
+            f"--- Voice & Mannerisms ---\nVoice: {rng.choice(traits['voices'])}. Mannerisms: {rng.choice(traits['mannerisms'])}."
         )
         
-        items_to_create = archetype_data["items"]
+        # A copy: callers keep these dicts (and their modifier lists) in new items, and the pack is cached for the session
+        items_to_create = copy.deepcopy(archetype_data["items"])
 
         return {
             "name": name,
             "stats": stats,
             "gm_notes": gm_notes,
             "items_to_create": items_to_create
-        }
\ No newline at end of file
+        }
+
+    def generate_batch(self, rule_set, count, seed=None, taken_ids=(), workers=None, progress=None, cancel_event=None):
+        """
+        Generates `count` NPCs across a process pool. The work is split into chunks that each
+        get their own seed drawn from `seed`, so a given seed yields the same NPCs whatever
+        the number of workers. Names are made unique (also against `taken_ids`) by numbering
+        repeats, e.g. "Bram Stonehand 2". `progress(done, count)` is called as chunks finish;
+        setting `cancel_event` stops the batch and returns None.
+        """
+        seeds = random.Random(seed)
+        chunks = []
+        for start in range(0, count, BATCH_CHUNK_SIZE):
+            chunks.append((seeds.getrandbits(64), min(BATCH_CHUNK_SIZE, count - start)))
+        results = [None] * len(chunks)
+        done = 0
+
+        if workers is None:
+            workers = min(os.cpu_count() or 1, len(chunks))
+        # Small batches or a single core: starting worker processes would cost more than it saves
+        if workers <= 1:
+            for position, (chunk_seed, size) in enumerate(chunks):
+                if cancel_event and cancel_event.is_set():
+                    return None
+                rng = random.Random(chunk_seed)
+                results[position] = [self.generate(rule_set, rng) for _ in range(size)]
+                done += size
+                if progress: progress(done, count)
+        else:
+            # Spawned (not forked) workers: the parent has Tk and the database writer thread running
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            try:
+                futures = {
+                    executor.submit(_generate_chunk, rule_set, chunk_seed, size): position
+                    for position, (chunk_seed, size) in enumerate(chunks)
+                }
+                pending = set(futures)
+                while pending:
+                    finished, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                    if cancel_event and cancel_event.is_set():
+                        return None
+                    for future in finished:
+                        results[futures[future]] = future.result()
+                        done += len(results[futures[future]])
+                    if finished and progress: progress(done, count)
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+        npcs = [npc_data for chunk in results for npc_data in chunk]
+        self._make_names_unique(npcs, taken_ids)
+        return npcs
+
+    @staticmethod
+    def _make_names_unique(npcs, taken_ids):
+        """Numbers repeated names so every NPC gets its own id (ids are derived from names)."""
+        taken = set(taken_ids)
+        next_number = {}
+        for npc_data in npcs:
+            base_name = npc_data["name"]
+            name = base_name
+            npc_id = name.lower().replace(' ', '_')
+            number = next_number.get(base_name, 2)
+            while npc_id in taken:
+                name = f"{base_name} {number}"
+                npc_id = name.lower().replace(' ', '_')
+                number += 1
+            next_number[base_name] = number
+            taken.add(npc_id)
+            npc_data["name"] = name
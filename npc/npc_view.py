@@ -1,6 +1,6 @@
 import customtkinter as ctk
 from character.character_view import AddItemDialog
-from ui_extensions import AutoWidthComboBox
+from ui_extensions import TypeAheadComboBox
 from quest.quest_controller import QuestController
 
 class NpcView:
@@ -46,9 +46,7 @@ class NpcView:
             self.sheet_ui_built = True
             if self.controller.current_rule_set:
                 self.build_sheet_ui(self.controller.current_rule_set, self.controller)
-                self.update_npc_sheet_list(
-                    [npc.name for npc in self.controller.get_npc_list()]
-                )
+                self.update_npc_sheet_list()
 
     def _setup_creator_ui(self, controller):
         container = ctk.CTkFrame(self.creator_tab, fg_color="transparent")
@@ -90,11 +88,44 @@ class NpcView:
         manage_frame = ctk.CTkFrame(main_pane)
         manage_frame.grid(row=0, column=1, sticky="nsew", padx=(10, 0))
         ctk.CTkLabel(manage_frame, text="Existing NPCs", font=ctk.CTkFont(size=16, weight="bold")).pack(pady=10)
-        self.npc_management_list = AutoWidthComboBox(manage_frame, state="readonly")
+        self.npc_management_list = TypeAheadComboBox(
+            manage_frame, search=lambda text, limit: controller.app_controller.search_names("npc", text, limit)
+        )
         self.npc_management_list.pack(fill="x", padx=10, pady=5)
-        self.npc_management_list.bind("<Button-1>", lambda event: self.npc_management_list._open_dropdown_menu())
         ctk.CTkButton(manage_frame, text="Delete Selected NPC", command=controller.delete_selected_npc, fg_color="#D2691E", hover_color="#B2590E").pack(pady=10)
 
+        # --- NEW: Batch generation (e.g. populating a whole city) ---
+        ctk.CTkLabel(manage_frame, text="Generate Many", font=ctk.CTkFont(size=16, weight="bold")).pack(pady=(20, 5))
+        batch_frame = ctk.CTkFrame(manage_frame, fg_color="transparent")
+        batch_frame.pack(fill="x", padx=10)
+        ctk.CTkLabel(batch_frame, text="Count:").pack(side="left", padx=(0, 5))
+        self.batch_count_entry = ctk.CTkEntry(batch_frame, width=70)
+        self.batch_count_entry.insert(0, "100")
+        self.batch_count_entry.pack(side="left")
+        self.batch_generate_button = ctk.CTkButton(batch_frame, text="Generate & Save", command=controller.generate_npc_batch)
+        self.batch_generate_button.pack(side="left", padx=5, fill="x", expand=True)
+        self.batch_progress = ctk.CTkProgressBar(manage_frame)
+        self.batch_progress.set(0)
+        self.batch_progress.pack(fill="x", padx=10, pady=5)
+        self.batch_status_label = ctk.CTkLabel(manage_frame, text="")
+        self.batch_status_label.pack()
+        self.batch_cancel_button = ctk.CTkButton(manage_frame, text="Cancel", command=controller.cancel_npc_batch, state="disabled")
+        self.batch_cancel_button.pack(pady=5)
+
+    def get_batch_count(self):
+        return self.batch_count_entry.get().strip()
+
+    def set_batch_running(self, running, status=""):
+        self.batch_generate_button.configure(state="disabled" if running else "normal")
+        self.batch_cancel_button.configure(state="normal" if running else "disabled")
+        if running:
+            self.batch_progress.set(0)
+        self.batch_status_label.configure(text=status)
+
+    def show_batch_progress(self, done, total):
+        self.batch_progress.set(done / total if total else 0)
+        self.batch_status_label.configure(text=f"Generated {done} / {total}")
+
     def populate_creator_fields(self, npc_data):
         self.npc_name_entry.delete(0, 'end')
         self.npc_name_entry.insert(0, npc_data["name"])
@@ -127,9 +158,11 @@ class NpcView:
         load_frame = ctk.CTkFrame(container)
         load_frame.grid(row=0, column=0, pady=(10, 20), padx=20, sticky="ew")
         ctk.CTkLabel(load_frame, text="Load NPC:").pack(side="left", padx=(10,10))
-        self.npc_sheet_list = AutoWidthComboBox(load_frame, values=["-"], state="readonly")
+        self.npc_sheet_list = TypeAheadComboBox(
+            load_frame, search=lambda text, limit: controller.app_controller.search_names("npc", text, limit),
+            command=lambda name: controller.load_npc_to_sheet()
+        )
         self.npc_sheet_list.pack(side="left", padx=5, fill="x", expand=True)
-        self.npc_sheet_list.bind("<Button-1>", lambda event: self.npc_sheet_list._open_dropdown_menu())
         ctk.CTkButton(load_frame, text="Load", command=controller.load_npc_to_sheet).pack(side="left", padx=(10,10))
         self.sheet_content_frame = ctk.CTkFrame(container, fg_color="transparent")
         self.sheet_content_frame.grid(row=1, column=0, pady=10, padx=20, sticky="nsew")
@@ -180,6 +213,12 @@ class NpcView:
         ctk.CTkLabel(hp_frame, text="Max HP:", anchor="w").grid(row=1, column=0, padx=5, pady=2)
         self.max_hp_label = ctk.CTkLabel(hp_frame, text="10", anchor="w")
         self.max_hp_label.grid(row=1, column=1, sticky="w", padx=5, pady=2)
+        # Derived stats from the ruleset's formulas; values come precomputed from the stat engine
+        self.derived_labels = {}
+        for row, name in enumerate(rule_set.get('formulas') or {}, start=2):
+            ctk.CTkLabel(hp_frame, text=f"{name}:", anchor="w").grid(row=row, column=0, padx=5, pady=2)
+            self.derived_labels[name] = ctk.CTkLabel(hp_frame, text="-", anchor="w")
+            self.derived_labels[name].grid(row=row, column=1, sticky="w", padx=5, pady=2)
         
         gm_pane = ctk.CTkFrame(self.sheet_content_wrapper)
         gm_pane.grid(row=1, column=1, sticky="nsew", padx=(10, 0))
@@ -223,29 +262,21 @@ class NpcView:
         if not self.sheet_ui_built: return
         self.sheet_content_wrapper.pack(fill="both", expand=True)
         self.sheet_name_label.configure(text=npc.name)
-        effective_attrs = npc.attributes.copy()
-        if item_controller:
-            all_items_data = {item['id']: item for item in item_controller.all_items}
-            for inv_entry in npc.inventory:
-                if inv_entry.get("equipped", False):
-                    item_id = inv_entry["item_id"]
-                    if item_id in all_items_data:
-                        item_details = all_items_data[item_id]
-                        for modifier in item_details.get("modifiers", []):
-                            stat, value = modifier["stat"], modifier["value"]
-                            if stat in effective_attrs:
-                                try: effective_attrs[stat] = str(int(effective_attrs.get(stat, 0)) + value)
-                                except ValueError: pass
-        base_max_hp_str = npc.attributes.get("Hit Points", "10")
-        effective_max_hp_str = effective_attrs.get("Hit Points", base_max_hp_str)
-        hp_display_text = base_max_hp_str if effective_max_hp_str == base_max_hp_str else f"{effective_max_hp_str} ({base_max_hp_str})"
+        # Cached per (NPC revision, item catalog revision) by the app's stat engine
+        effective = npc_controller.app_controller.get_effective_stats(npc)
+        base_max_hp = npc.attributes.get("Hit Points", 10)
+        effective_max_hp = effective.get("Hit Points", base_max_hp)
+        hp_display_text = str(base_max_hp) if effective_max_hp == base_max_hp else f"{effective_max_hp} ({base_max_hp})"
         self.max_hp_label.configure(text=hp_display_text)
         self.current_hp_entry.delete(0, 'end')
         self.current_hp_entry.insert(0, str(npc.current_hp))
+        for name, label in self.derived_labels.items():
+            value = effective.derived.get(name)
+            label.configure(text="-" if value is None else str(value))
         for key, entry in self.npc_sheet_entries.items():
-            base_value = npc.attributes.get(key) or npc.skills.get(key) or ""
-            effective_value = effective_attrs.get(key)
-            display_text = base_value if not effective_value or effective_value == base_value else f"{effective_value} ({base_value})"
+            base_value = npc.attributes.get(key, npc.skills.get(key, ""))
+            effective_value = effective.get(key)
+            display_text = str(base_value) if effective_value is None or effective_value == base_value else f"{effective_value} ({base_value})"
             entry.delete(0, 'end')
             entry.insert(0, display_text)
         self.sheet_notes_text.delete("1.0", "end")
@@ -259,7 +290,7 @@ class NpcView:
         if not quest_controller:
             ctk.CTkLabel(self.linked_quests_frame, text="Open 'Quests' pane\nto see links.", wraplength=150).pack(pady=10)
             return
-        linked_quests = [q for q in quest_controller.get_all_quests() if npc_name in q.get('linked_npcs', [])]
+        linked_quests = quest_controller.get_quests_linked_to_npc(npc_name)
         if not linked_quests:
             ctk.CTkLabel(self.linked_quests_frame, text="Not linked to any quests.").pack(pady=10)
         else:
@@ -272,8 +303,8 @@ class NpcView:
         if not item_controller:
             ctk.CTkLabel(self.inventory_list_frame, text="Open 'Items' pane\nto manage inventory.", wraplength=150).pack(pady=10)
             return
-        all_items_data = {item['id']: item for item in item_controller.all_items}
         if not npc_controller: return
+        all_items_data = npc_controller.app_controller.get_item_catalog().items_by_id
         for inv_entry in inventory_list:
             item_id = inv_entry["item_id"]
             if item_id in all_items_data:
@@ -292,17 +323,14 @@ class NpcView:
         if hasattr(self, 'sheet_content_wrapper'):
             self.sheet_content_wrapper.pack_forget()
 
-    def update_npc_management_list(self, npcs):
+    def update_npc_management_list(self):
+        """Resets the picker; its matches come from the app's NPC name index as the user types."""
         if not self.creator_ui_built: return
-        values = ["-"] + (npcs or [])
-        self.npc_management_list.configure(values=values)
-        self.npc_management_list.set(values[0])
+        self.npc_management_list.reset()
         
-    def update_npc_sheet_list(self, npcs):
+    def update_npc_sheet_list(self):
         if not self.sheet_ui_built: return
-        values = ["-"] + (npcs or [])
-        self.npc_sheet_list.configure(values=values)
-        self.npc_sheet_list.set(values[0])
+        self.npc_sheet_list.reset()
 
     def highlight_selection(self):
         pass
\ No newline at end of file
@@ -0,0 +1,74 @@
+from bisect import bisect_left, insort
+
+DEFAULT_MATCH_LIMIT = 20
+
+
+class PrefixIndex:
+    """
+    Case-insensitive type-ahead lookup over names: a sorted array of (term, key) pairs,
+    one term per word start of a name, searched with bisect. Typing "smi" therefore finds
+    "Bob Smith", and a lookup only touches the matching slice instead of every name.
+    Updated incrementally with add/rename/remove.
+    """
+    def __init__(self, entries=()):
+        self._names = {}
+        self._terms = []
+        self.reset(entries)
+
+    @staticmethod
+    def _terms_for(name):
+        folded = name.casefold()
+        starts = [0] + [i + 1 for i, char in enumerate(folded[:-1]) if char == ' ' and folded[i + 1] != ' ']
+        return {folded[start:] for start in starts}
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, key):
+        return key in self._names
+
+    def reset(self, entries):
+        """Replaces the content with (key, name) pairs."""
+        self._names = dict(entries)
+        self._terms = sorted((term, key) for key, name in self._names.items() for term in self._terms_for(name))
+
+    def add(self, key, name):
+        """Adds a name, or renames it if the key is already indexed."""
+        if key in self._names:
+            self.remove(key)
+        self._names[key] = name
+        for term in self._terms_for(name):
+            insort(self._terms, (term, key))
+
+    rename = add
+
+    def remove(self, key):
+        name = self._names.pop(key, None)
+        if name is None:
+            return
+        for term in self._terms_for(name):
+            index = bisect_left(self._terms, (term, key))
+            if index < len(self._terms) and self._terms[index] == (term, key):
+                del self._terms[index]
+
+    def search(self, text, limit=DEFAULT_MATCH_LIMIT):
+        """
+        Up to `limit` (key, name) pairs whose name, or any word in it, starts with `text`
+        (case-insensitive). Names that start with it come first, each group alphabetical.
+        An empty text returns the first names alphabetically.
+        """
+        prefix = text.strip().casefold()
+        starts_with, word_matches = {}, {}
+        terms = self._terms
+        for index in range(bisect_left(terms, (prefix,)), len(terms)):
+            term, key = terms[index]
+            if not term.startswith(prefix) or len(starts_with) >= limit:
+                break
+            name = self._names[key]
+            if term == name.casefold():
+                starts_with[key] = name
+            elif prefix and len(word_matches) < limit:
+                word_matches.setdefault(key, name)
+        matches = list(starts_with.items())
+        matches += [(key, name) for key, name in word_matches.items() if key not in starts_with]
+        return matches[:limit]
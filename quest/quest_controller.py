@@ -1,5 +1,6 @@
+import copy
 import customtkinter as ctk
-from .quest_model import QuestModel
+from .quest_model import QuestModel, LINK_TYPE_NPC
 from .quest_view import QuestView, LinkSelectionDialog
 from custom_dialogs import MessageBox
 from character.character_model import CharacterModel
@@ -23,6 +24,10 @@ class QuestController:
         """A simple getter for other controllers to access quest data."""
         return self.all_quests
 
+    def get_quests_linked_to_npc(self, npc_name):
+        """Returns the saved quests that link to a character or NPC, via the quest_links index."""
+        return self.model.get_quests_linked_to(LINK_TYPE_NPC, npc_name)
+
     def load_all_quests(self):
         # --- MODIFIED: No longer checks cache, it's the source of truth now ---
         self.all_quests = self.model.load_all_quests()
@@ -43,14 +48,21 @@ class QuestController:
             self.view.clear_editor()
 
     def create_new_quest(self):
+        if not self.app_controller.ensure_writable(self.view.frame): return
         dialog = ctk.CTkInputDialog(text="Enter the name for the new quest:", title="New Quest")
         title = dialog.get_input()
         if not title: return
         new_quest = self.model.create_quest(title)
-        self.model.save_quest(new_quest)
-        self.load_all_quests()
+        self.all_quests.append(new_quest)
+        self._queue_quest_write(new_quest['id'], lambda model: model.save_quest(new_quest), self.load_all_quests)
         self.select_quest(new_quest)
 
+    def _queue_quest_write(self, quest_id, write, on_success=None):
+        """Runs `write(model)` on the database writer with its own QuestModel (self.model belongs to the main thread)."""
+        self.app_controller.db_writer.submit(
+            ("quests", quest_id), lambda: write(QuestModel(self.campaign_path)), on_success=on_success
+        )
+
     def select_quest(self, quest):
         self.selected_quest = quest
         
@@ -66,6 +78,7 @@ class QuestController:
         self.redraw_links()
     
     def save_changes(self):
+        if not self.app_controller.ensure_writable(self.view.frame): return
         if not self.selected_quest: return
         
         original_title = self.selected_quest['title']
@@ -75,25 +88,29 @@ class QuestController:
         self.selected_quest['status'] = self.view.status_combo.get()
         self.selected_quest['description'] = self.view.desc_text.get("1.0", "end-1c")
         
-        self.model.save_quest(self.selected_quest)
-        
-        if original_title != self.selected_quest['title'] or original_status != self.selected_quest['status']:
-            self.load_all_quests()
-        else:
+        snapshot = copy.deepcopy(self.selected_quest)
+        list_changed = original_title != snapshot['title'] or original_status != snapshot['status']
+
+        def on_saved():
+            if list_changed:
+                self.load_all_quests()
+            MessageBox.showinfo("Success", "Quest changes have been saved.", self.view.frame)
+        self._queue_quest_write(snapshot['id'], lambda model: model.save_quest(snapshot), on_saved)
+
+        if not list_changed:
             # Refresh the all_quests list in memory without a full UI rebuild
             for i, q in enumerate(self.all_quests):
                 if q['id'] == self.selected_quest['id']:
                     self.all_quests[i] = self.selected_quest
                     break
 
-        MessageBox.showinfo("Success", "Quest changes have been saved.", self.view.frame)
-
     def delete_quest(self):
+        if not self.app_controller.ensure_writable(self.view.frame): return
         if not self.selected_quest: return
         if MessageBox.askyesno("Confirm Deletion", f"Are you sure you want to permanently delete '{self.selected_quest['title']}'?", self.view.frame):
-            self.model.delete_quest(self.selected_quest['id'])
+            quest_id = self.selected_quest['id']
+            self._queue_quest_write(quest_id, lambda model: model.delete_quest(quest_id), self.load_all_quests)
             self.selected_quest = None
-            self.load_all_quests()
             self.view.clear_editor()
 
     def add_objective(self):
@@ -114,22 +131,48 @@ class QuestController:
         if not self.selected_quest: return
         self.selected_quest['objectives'][index]['text'] = new_text
 
+    def _npc_cache_key(self):
+        ruleset_data = self.app_controller.ruleset_data
+        return f"npcs_models_{ruleset_data['name']}" if ruleset_data else None
+
+    @staticmethod
+    def _npc_id(link):
+        """Quests link NPCs by name; the NPC's id is derived from it."""
+        return link.lower().replace(' ', '_')
+
+    def _linked_npc_names(self, links):
+        """
+        {link: NPC name} for the linked NPCs that exist. Names come from the cached handles;
+        links the cache does not know are looked up with a single load_many query.
+        """
+        cache_key = self._npc_cache_key()
+        names = {}
+        missing = []
+        for link in links:
+            handle = self.app_controller.get_entity_handle(cache_key, self._npc_id(link)) if cache_key else None
+            if handle:
+                names[link] = handle.name
+            else:
+                missing.append(link)
+        if missing:
+            loaded = NpcModel.load_many(self.campaign_path, [self._npc_id(link) for link in missing])
+            for link in missing:
+                npc = loaded.get(self._npc_id(link))
+                if npc:
+                    names[link] = npc.name
+        return names
+
     def redraw_links(self):
-        item_controller = self.app_controller.get_loaded_controller(ItemController)
-        all_npcs_data = []
-        if self.app_controller.ruleset_data:
-            npc_names = NpcModel.get_for_ruleset(self.campaign_path, self.app_controller.ruleset_data['name'])
-            all_npcs_data = [npc.to_dict() for npc in [NpcModel.load(self.campaign_path, name) for name in npc_names] if npc]
-            for npc in all_npcs_data:
-                npc['id'] = npc['name']
-        
-        all_items_data = item_controller.all_items if item_controller else []
-        self.view.redraw_links(self.selected_quest['linked_npcs'], self.selected_quest['linked_items'], all_npcs_data, all_items_data, self)
+        linked_npcs = [{'id': link, 'name': name} for link, name in self._linked_npc_names(self.selected_quest['linked_npcs']).items()]
+        item_catalog = self.app_controller.get_item_catalog()
+        self.view.redraw_links(self.selected_quest['linked_npcs'], self.selected_quest['linked_items'], linked_npcs, item_catalog, self)
 
     def show_add_npc_dialog(self):
-        if not self.app_controller.ruleset_data: return
-        all_npcs_data = [npc.to_dict() for npc in [NpcModel.load(self.campaign_path, name) for name in NpcModel.get_for_ruleset(self.campaign_path, self.app_controller.ruleset_data['name'])] if npc]
-        for npc in all_npcs_data: npc['id'] = npc['name']
+        cache_key = self._npc_cache_key()
+        if not cache_key: return
+        # The dialog only shows names, so the cached handles are enough; no NPC is loaded
+        handles = self.app_controller.get_cached_data(cache_key) or []
+        all_npcs_data = [{'id': handle.name, 'name': handle.name} for handle in handles]
         dialog = LinkSelectionDialog(self.view.frame, "Link NPC", all_npcs_data)
         npc_id = dialog.get_selection()
         if npc_id and npc_id not in self.selected_quest['linked_npcs']:
@@ -139,7 +182,8 @@ class QuestController:
     def show_add_item_dialog(self):
         item_controller = self.app_controller.get_loaded_controller(ItemController)
         if not item_controller: return
-        dialog = LinkSelectionDialog(self.view.frame, "Link Item", item_controller.all_items)
+        dialog = LinkSelectionDialog(self.view.frame, "Link Item", item_controller.all_items,
+                                     search=self.app_controller.search_items)
         item_id = dialog.get_selection()
         if item_id and item_id not in self.selected_quest['linked_items']:
             self.selected_quest['linked_items'].append(item_id)
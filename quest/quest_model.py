@@ -1,6 +1,12 @@
 import json
 import uuid
-from database import Database
+from database import Database, DEFAULT_PAGE_SIZE
+from serialization import get_serializer
+from search.search_model import index_documents, remove_documents, quest_document
+
+# target_type values used in the quest_links table
+LINK_TYPE_NPC = "npc"
+LINK_TYPE_ITEM = "item"
 
 class QuestModel:
     """Manages the quest database for a specific campaign."""
@@ -10,29 +16,130 @@ class QuestModel:
     def load_all_quests(self):
         """Loads the entire list of quests from the database."""
         self.db.connect()
-        rows = self.db.fetchall("SELECT data FROM quests")
+        serializer = get_serializer(self.db)
+        rows = self.db.fetchall("SELECT format, data FROM quests")
         self.db.close()
         if not rows:
             return []
         try:
-            return [json.loads(row['data']) for row in rows]
+            return [serializer.load_row(row) for row in rows]
         except json.JSONDecodeError:
             return []
 
-    def save_quest(self, quest_data):
-        """Saves a single quest to the database."""
+    def load_many(self, quest_ids):
+        """Loads several quests by id in one query, returning {id: quest} for those that exist."""
+        self.db.connect()
+        try:
+            serializer = get_serializer(self.db)
+            rows = self.db.fetchall_in("SELECT id, format, data FROM quests WHERE id IN ({ids})", list(dict.fromkeys(quest_ids)))
+        finally:
+            self.db.close()
+        return {row['id']: serializer.load_row(row) for row in rows}
+
+    def load_by_status(self, status):
+        """Loads all quests with the given status (e.g. "Active") using the status index."""
+        self.db.connect()
+        serializer = get_serializer(self.db)
+        rows = self.db.fetchall("SELECT format, data FROM quests WHERE status = ?", (status,))
+        self.db.close()
+        return [serializer.load_row(row) for row in rows]
+
+    def get_page(self, page_size=DEFAULT_PAGE_SIZE, after=None):
+        """
+        Returns (quests, next_token) for one page of quests ordered by title.
+        Pass next_token back as `after` for the following page; it is None after the last one.
+        """
         self.db.connect()
-        self.db.execute(
-            "INSERT OR REPLACE INTO quests (id, data) VALUES (?, ?)",
-            (quest_data['id'], json.dumps(quest_data))
+        serializer = get_serializer(self.db)
+        rows, next_token = self.db.fetch_page(
+            "quests", "format, data", ("title", "id"), page_size=page_size, after=after
         )
         self.db.close()
+        return [serializer.load_row(row) for row in rows], next_token
+
+    def stream_all(self, page_size=DEFAULT_PAGE_SIZE):
+        """Yields every quest in title order, holding only one page in memory."""
+        after = None
+        while True:
+            quests, after = self.get_page(page_size, after)
+            yield from quests
+            if after is None:
+                return
+
+    @staticmethod
+    def _to_row(quest_data, serializer):
+        """Builds the database row (id, title, status, format, data) for a quest."""
+        return (quest_data['id'], quest_data.get('title'), quest_data.get('status'), *serializer.dumps(quest_data))
+
+    @staticmethod
+    def _link_rows(quest_data):
+        """Builds the quest_links rows mirroring a quest's linked_npcs and linked_items lists."""
+        quest_id = quest_data['id']
+        rows = [(quest_id, LINK_TYPE_NPC, npc_id) for npc_id in quest_data.get('linked_npcs', [])]
+        rows.extend((quest_id, LINK_TYPE_ITEM, item_id) for item_id in quest_data.get('linked_items', []))
+        return rows
+
+    def _write_quests(self, quests, serializer):
+        """(Runs inside a transaction) Upserts quests and replaces their link rows."""
+        self.db.executemany(
+            "INSERT OR REPLACE INTO quests (id, title, status, format, data) VALUES (?, ?, ?, ?, ?)",
+            [self._to_row(quest_data, serializer) for quest_data in quests]
+        )
+        self.db.executemany("DELETE FROM quest_links WHERE quest_id = ?", [(quest_data['id'],) for quest_data in quests])
+        self.db.executemany(
+            "INSERT OR IGNORE INTO quest_links (quest_id, target_type, target_id) VALUES (?, ?, ?)",
+            [row for quest_data in quests for row in self._link_rows(quest_data)]
+        )
+        index_documents(self.db, "quest", [(quest_data['id'], *quest_document(quest_data)) for quest_data in quests])
+
+    def save_quest(self, quest_data):
+        """Saves a single quest and its links to the database."""
+        self.save_many([quest_data])
+
+    def save_many(self, quests):
+        """Saves a batch of quests in a single transaction; either all of them are written or none."""
+        if not quests:
+            return
+        self.db.connect()
+        try:
+            serializer = get_serializer(self.db)
+            with self.db.transaction():
+                self._write_quests(quests, serializer)
+        finally:
+            self.db.close()
 
     def delete_quest(self, quest_id):
-        """Deletes a single quest from the database."""
+        """Deletes a single quest and its links from the database."""
         self.db.connect()
-        self.db.execute("DELETE FROM quests WHERE id = ?", (quest_id,))
+        try:
+            with self.db.transaction():
+                self.db.execute("DELETE FROM quests WHERE id = ?", (quest_id,))
+                self.db.execute("DELETE FROM quest_links WHERE quest_id = ?", (quest_id,))
+                remove_documents(self.db, "quest", [quest_id])
+        finally:
+            self.db.close()
+
+    def get_quests_linked_to(self, target_type, target_id):
+        """Loads every quest that links to the given NPC or item ("quests for this NPC")."""
+        self.db.connect()
+        serializer = get_serializer(self.db)
+        rows = self.db.fetchall(
+            """SELECT quests.format, quests.data FROM quest_links
+               JOIN quests ON quests.id = quest_links.quest_id
+               WHERE quest_links.target_type = ? AND quest_links.target_id = ?""",
+            (target_type, target_id)
+        )
+        self.db.close()
+        return [serializer.load_row(row) for row in rows]
+
+    def get_linked_ids(self, quest_id, target_type):
+        """Returns the ids of the NPCs or items a quest links to ("NPCs for this quest")."""
+        self.db.connect()
+        rows = self.db.fetchall(
+            "SELECT target_id FROM quest_links WHERE quest_id = ? AND target_type = ?", (quest_id, target_type)
+        )
         self.db.close()
+        return [row['target_id'] for row in rows]
 
     def create_quest(self, title):
         """Creates a new quest dictionary with default values."""
@@ -1,27 +1,30 @@
 import customtkinter as ctk
+from ui_extensions import VirtualList, SearchEntry
+from fuzzy_index import FuzzyIndex
 
 class LinkSelectionDialog(ctk.CTkToplevel):
-    """A reusable dialog to select an NPC or Item to link to a quest."""
-    def __init__(self, parent, title, items_to_display):
+    """A reusable dialog to select an NPC or Item to link to a quest, with a fuzzy search box."""
+    MAX_MATCHES = 200
+
+    def __init__(self, parent, title, items_to_display, search=None):
         super().__init__(parent)
         self.title(title)
         self.geometry("400x500")
         self.configure(fg_color="#2B2B2B")
         self.protocol("WM_DELETE_WINDOW", self._on_cancel)
         self.selected_id = None
-        self.buttons = []
+        self.items_to_display = items_to_display
+        self.items_by_id = {item["id"]: item for item in items_to_display}
+        # `search(text, limit)` -> [(id, name)]; without one, the names shown are indexed here
+        self.search = search or FuzzyIndex((item["id"], item["name"], "") for item in items_to_display).search
         ctk.CTkLabel(self, text=f"Select {title.split(' ')[-1]} to Link", font=ctk.CTkFont(size=16)).pack(pady=10)
-        scroll_frame = ctk.CTkScrollableFrame(self)
-        scroll_frame.pack(fill="both", expand=True, padx=10, pady=5)
-        if not items_to_display:
-            ctk.CTkLabel(scroll_frame, text="Nothing available to link.").pack()
-        else:
-            for item in items_to_display:
-                btn = ctk.CTkButton(scroll_frame, text=item["name"],
-                                    command=lambda i=item: self._select(i), 
-                                    fg_color="transparent", anchor="w", border_width=1, border_color="gray50")
-                btn.pack(fill="x", pady=2)
-                self.buttons.append((btn, item))
+        if items_to_display:
+            SearchEntry(self, on_search=self._show_matches, placeholder_text="Type to search...").pack(fill="x", padx=10)
+        self.item_list = VirtualList(self, text=lambda item: item["name"], key=lambda item: item["id"],
+                                     on_select=self._select, on_activate=self._on_activate,
+                                     empty_text="Nothing available to link.")
+        self.item_list.pack(fill="both", expand=True, padx=10, pady=5)
+        self.item_list.set_items(items_to_display)
         self.confirm_button = ctk.CTkButton(self, text="Link Selected", command=self._on_confirm, state="disabled")
         self.confirm_button.pack(pady=10)
         self.transient(parent)
@@ -29,14 +32,21 @@ class LinkSelectionDialog(ctk.CTkToplevel):
         self.grab_set()
         self.wait_window()
 
+    def _show_matches(self, text):
+        if not text.strip():
+            self.item_list.set_items(self.items_to_display)
+            return
+        self.item_list.empty_label.configure(text="No matches.")
+        matches = self.search(text, self.MAX_MATCHES)
+        self.item_list.set_items([self.items_by_id[item_id] for item_id, _ in matches if item_id in self.items_by_id])
+
     def _select(self, item):
         self.selected_id = item["id"]
         self.confirm_button.configure(state="normal")
-        for btn, btn_item in self.buttons:
-            if btn_item["id"] == item["id"]:
-                btn.configure(fg_color="#3B8ED0", border_color="#3B8ED0")
-            else:
-                btn.configure(fg_color="transparent", border_color="gray50")
+
+    def _on_activate(self, item):
+        self._select(item)
+        self._on_confirm()
 
     def _on_confirm(self):
         self.destroy()
@@ -51,7 +61,7 @@ class LinkSelectionDialog(ctk.CTkToplevel):
 class QuestView:
     def __init__(self, parent_frame):
         self.parent_frame = parent_frame
-        self.quest_buttons = {}
+        self.quest_list = None
         self.editor_is_built = False
 
     def setup_ui(self, controller):
@@ -64,8 +74,14 @@ class QuestView:
         list_frame.grid_rowconfigure(1, weight=1)
         list_frame.grid_columnconfigure(0, weight=1)
         ctk.CTkButton(list_frame, text="Create New Quest", command=controller.create_new_quest).grid(row=0, column=0, padx=10, pady=10, sticky="ew")
-        self.quest_list_scroll_frame = ctk.CTkScrollableFrame(list_frame, label_text="Quests by Status")
-        self.quest_list_scroll_frame.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
+        # Status headers and quests share one virtualized list; headers cannot be selected
+        self.quest_font = ctk.CTkFont()
+        self.header_font = ctk.CTkFont(size=14, weight="bold")
+        self.quest_list = VirtualList(list_frame, label_text="Quests by Status", text=self._quest_row_text,
+                                      key=lambda row: row.get("id", row.get("header")), row_style=self._quest_row_style,
+                                      can_select=lambda row: "header" not in row, on_select=controller.select_quest,
+                                      selected_style={"border_width": 2, "border_color": "#FFFFFF"})
+        self.quest_list.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
         
         self.editor_frame = ctk.CTkFrame(self.parent_frame, fg_color="transparent")
         self.editor_frame.grid(row=0, column=1, padx=10, pady=10, sticky="nsew")
@@ -146,37 +162,37 @@ class QuestView:
         if hasattr(self, 'placeholder_label'):
             self.placeholder_label.destroy()
 
+    STATUS_STYLES = {
+        "Active": {"order": 1, "color": "#3B8ED0"},
+        "Inactive": {"order": 2, "color": "gray50"},
+        "Completed": {"order": 3, "color": "#228B22"},
+        "Failed": {"order": 4, "color": "#D2691E"}
+    }
+
     def display_quest_list(self, quests_by_status, controller):
-        """Rebuilds the categorized and color-coded list of quest buttons."""
-        for widget in self.quest_list_scroll_frame.winfo_children():
-            widget.destroy()
-        self.quest_buttons.clear()
-        status_map = {
-            "Active": {"order": 1, "color": "#3B8ED0"},
-            "Inactive": {"order": 2, "color": "gray50"},
-            "Completed": {"order": 3, "color": "#228B22"},
-            "Failed": {"order": 4, "color": "#D2691E"}
-        }
-        sorted_statuses = sorted(quests_by_status.keys(), key=lambda s: status_map.get(s, {}).get("order", 99))
+        """Shows the quests grouped under a color-coded header per status."""
+        rows = []
+        sorted_statuses = sorted(quests_by_status.keys(), key=lambda s: self.STATUS_STYLES.get(s, {}).get("order", 99))
         for status in sorted_statuses:
             if not quests_by_status[status]: continue
-            header_color = status_map.get(status, {"color": "gray25"})["color"]
-            header_frame = ctk.CTkFrame(self.quest_list_scroll_frame, fg_color=header_color, corner_radius=5)
-            header_frame.pack(fill="x", pady=(8, 2))
-            ctk.CTkLabel(header_frame, text=status, font=ctk.CTkFont(size=14, weight="bold")).pack(padx=10, pady=5)
-            for quest in sorted(quests_by_status[status], key=lambda q: q['title'].lower()):
-                quest_row = ctk.CTkButton(self.quest_list_scroll_frame, text=quest["title"], anchor="w", fg_color="gray25",
-                                         command=lambda q=quest: controller.select_quest(q))
-                quest_row.pack(fill="x", pady=0, padx=10)
-                self.quest_buttons[quest['id']] = quest_row
+            rows.append({"header": status, "color": self.STATUS_STYLES.get(status, {"color": "gray25"})["color"]})
+            rows.extend(sorted(quests_by_status[status], key=lambda q: q['title'].lower()))
+        self.quest_list.set_items(rows)
+
+    @staticmethod
+    def _quest_row_text(row):
+        return row["header"] if "header" in row else row["title"]
+
+    def _quest_row_style(self, row):
+        # Rows are reused for headers and quests, so each style sets every option the other changes
+        if "header" in row:
+            return {"fg_color": row["color"], "hover_color": row["color"], "font": self.header_font, "anchor": "center", "border_width": 0}
+        return {"fg_color": "gray25", "hover_color": ctk.ThemeManager.theme["CTkButton"]["hover_color"],
+                "font": self.quest_font, "anchor": "w", "border_width": 0}
 
     def highlight_selected_quest(self, selected_quest_id=None):
-        """Updates the border of the selected quest button."""
-        for quest_id, button in self.quest_buttons.items():
-            if quest_id == selected_quest_id:
-                button.configure(border_width=2, border_color="#FFFFFF")
-            else:
-                button.configure(border_width=0)
+        """Outlines the selected quest's row."""
+        self.quest_list.select_key(selected_quest_id)
 
     def redraw_objectives(self, objectives, controller):
         for widget in self.objectives_frame.winfo_children():
@@ -193,11 +209,12 @@ class QuestView:
             entry.pack(side="left", fill="x", expand=True, padx=5)
             ctk.CTkButton(obj_row, text="-", width=30, fg_color="gray50", command=lambda idx=i: controller.remove_objective(idx)).pack(side="right")
 
-    def redraw_links(self, linked_npcs, linked_items, all_npcs, all_items, controller):
+    def redraw_links(self, linked_npcs, linked_items, npcs, item_catalog, controller):
+        npcs_by_id = {npc['id']: npc for npc in npcs}
         for widget in self.linked_npcs_frame.winfo_children():
             widget.destroy()
         for npc_id in linked_npcs:
-            npc = next((n for n in all_npcs if n['id'] == npc_id), None)
+            npc = npcs_by_id.get(npc_id)
             if npc:
                 link_row = ctk.CTkFrame(self.linked_npcs_frame, fg_color="transparent")
                 link_row.pack(fill="x", pady=2)
@@ -206,7 +223,7 @@ class QuestView:
         for widget in self.linked_items_frame.winfo_children():
             widget.destroy()
         for item_id in linked_items:
-            item = next((i for i in all_items if i['id'] == item_id), None)
+            item = item_catalog.get(item_id)
             if item:
                 link_row = ctk.CTkFrame(self.linked_items_frame, fg_color="transparent")
                 link_row.pack(fill="x", pady=2)
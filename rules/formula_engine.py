@@ -0,0 +1,224 @@
+import ast
+import math
+import operator
+import re
+
+# Functions a formula may call, e.g. "floor((Dexterity - 10) / 2)"
+FORMULA_FUNCTIONS = {"min": min, "max": max, "abs": abs, "floor": math.floor, "ceil": math.ceil, "round": round}
+MAX_FORMULA_LENGTH = 500
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+    ast.Div: operator.truediv, ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod,
+}
+_UNARY_OPERATORS = {ast.USub: operator.neg, ast.UAdd: operator.pos}
+_NUMBER_TYPES = (int, float)
+
+# Compiled engines keyed by the ruleset content they were built from
+_ENGINES = {}
+
+
+class FormulaError(ValueError):
+    """A formula that does not parse, uses anything but arithmetic on stats, or is circular."""
+
+
+class CompiledFormula:
+    """One derived stat's formula, compiled to nested closures over the stats it reads."""
+    __slots__ = ("name", "source", "inputs", "_evaluate")
+
+    def __init__(self, name, source, inputs, evaluate):
+        self.name = name
+        self.source = source
+        self.inputs = inputs
+        self._evaluate = evaluate
+
+    def __call__(self, stats, derived):
+        """The formula's value, or None if an input is missing or not a number."""
+        try:
+            result = self._evaluate(stats, derived)
+        except (TypeError, ValueError, ZeroDivisionError, OverflowError):
+            return None
+        if isinstance(result, float) and result.is_integer():
+            return int(result)
+        return result
+
+
+def compile_formula(name, source, stat_names, derived_names):
+    """
+    Parses `source` once and compiles it. Stat names may contain spaces ("Hit Points"),
+    so known names are swapped for placeholder identifiers before parsing; any other
+    identifier, and any syntax beyond numbers, arithmetic and FORMULA_FUNCTIONS, is rejected.
+    """
+    if len(source) > MAX_FORMULA_LENGTH:
+        raise FormulaError(f"Formula for '{name}' is longer than {MAX_FORMULA_LENGTH} characters.")
+    placeholders = {}
+    known = sorted(set(stat_names) | set(derived_names), key=len, reverse=True)
+    if known:
+        pattern = re.compile(r"(?<![\w])(" + "|".join(re.escape(stat) for stat in known) + r")(?![\w])")
+
+        def to_placeholder(match):
+            placeholder = f"_stat{len(placeholders)}"
+            placeholders[placeholder] = match.group(1)
+            return placeholder
+        source_to_parse = pattern.sub(to_placeholder, source)
+    else:
+        source_to_parse = source
+    try:
+        tree = ast.parse(source_to_parse.strip(), mode="eval")
+    except SyntaxError:
+        raise FormulaError(f"Formula for '{name}' is not a valid expression: {source}") from None
+    inputs = set()
+    evaluate = _compile_node(tree.body, name, placeholders, set(derived_names), inputs)
+    return CompiledFormula(name, source, frozenset(inputs), evaluate)
+
+
+def _compile_node(node, name, placeholders, derived_names, inputs):
+    compile_child = lambda child: _compile_node(child, name, placeholders, derived_names, inputs)
+
+    if isinstance(node, ast.Constant) and type(node.value) in _NUMBER_TYPES:
+        value = node.value
+        return lambda stats, derived: value
+
+    if isinstance(node, ast.Name):
+        stat = placeholders.get(node.id)
+        if stat is None:
+            raise FormulaError(f"Unknown stat '{node.id}' in formula for '{name}'.")
+        inputs.add(stat)
+        is_derived = stat in derived_names
+
+        def lookup(stats, derived):
+            value = derived.get(stat) if is_derived else stats.get(stat)
+            if type(value) not in _NUMBER_TYPES:
+                raise TypeError(stat)
+            return value
+        return lookup
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        apply = _BINARY_OPERATORS[type(node.op)]
+        left, right = compile_child(node.left), compile_child(node.right)
+        return lambda stats, derived: apply(left(stats, derived), right(stats, derived))
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+        apply = _UNARY_OPERATORS[type(node.op)]
+        operand = compile_child(node.operand)
+        return lambda stats, derived: apply(operand(stats, derived))
+
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+            and node.func.id in FORMULA_FUNCTIONS and not node.keywords and node.args):
+        function = FORMULA_FUNCTIONS[node.func.id]
+        args = [compile_child(arg) for arg in node.args]
+        return lambda stats, derived: function(*[arg(stats, derived) for arg in args])
+
+    text = ast.unparse(node)
+    for placeholder, stat in placeholders.items():
+        text = re.sub(rf"\b{placeholder}\b", stat, text)
+    raise FormulaError(f"'{text}' is not allowed in the formula for '{name}'.")
+
+
+class FormulaEngine:
+    """
+    The compiled `formulas` of one ruleset plus their dependency graph. Derived stats are
+    evaluated in dependency order from any mapping with a `get` (a StatBlock, EffectiveStats
+    or dict); `recompute` only re-evaluates those downstream of the stats that changed.
+    Formulas that fail to compile or form a cycle are left out and listed in `errors`.
+    """
+    def __init__(self, rule_set):
+        self.rule_set_name = rule_set.get('name')
+        stat_names = list(rule_set.get('attributes', [])) + list(rule_set.get('skills', {}))
+        sources = rule_set.get('formulas', {}) or {}
+        self.errors = {}
+        compiled = {}
+        for name, source in sources.items():
+            try:
+                compiled[name] = compile_formula(name, source, stat_names, sources.keys())
+            except FormulaError as e:
+                self.errors[name] = str(e)
+        self.order = self._dependency_order(compiled)
+        self.formulas = {name: compiled[name] for name in self.order}
+        # stat or derived stat -> derived stats whose formula reads it directly
+        self.dependents = {}
+        for formula in self.formulas.values():
+            for stat in formula.inputs:
+                self.dependents.setdefault(stat, []).append(formula.name)
+
+    def _dependency_order(self, compiled):
+        """Topological order of the derived stats; those on (or behind) a cycle are dropped."""
+        pending = {name: {stat for stat in formula.inputs if stat in compiled} for name, formula in compiled.items()}
+        order = []
+        ready = [name for name, needs in pending.items() if not needs]
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            del pending[name]
+            for other, needs in pending.items():
+                if name in needs:
+                    needs.discard(name)
+                    if not needs and other not in ready:
+                        ready.append(other)
+        for name in pending:
+            self.errors[name] = f"Formula for '{name}' depends on itself (circular reference)."
+        return order
+
+    def evaluate(self, stats, bonuses=None):
+        """
+        Returns {derived stat: value} for one entity's stats. `bonuses` ({derived stat: amount},
+        e.g. item modifiers) are added to a stat's value as soon as it is computed, so the
+        formulas that read it see the modified value.
+        """
+        derived = {}
+        for name in self.order:
+            derived[name] = self._value(name, stats, derived, bonuses)
+        return derived
+
+    def _value(self, name, stats, derived, bonuses):
+        value = self.formulas[name](stats, derived)
+        if bonuses and value is not None:
+            value += bonuses.get(name, 0)
+        return value
+
+    def evaluate_many(self, stat_maps):
+        """Evaluates every entity of a ruleset in one pass, returning one derived dict per stat map."""
+        steps = [(name, self.formulas[name]) for name in self.order]
+        results = []
+        for stats in stat_maps:
+            derived = {}
+            for name, formula in steps:
+                derived[name] = formula(stats, derived)
+            results.append(derived)
+        return results
+
+    def affected_by(self, changed_stats):
+        """The derived stats that (transitively) read any of `changed_stats`, in evaluation order."""
+        affected = set()
+        pending = list(changed_stats)
+        while pending:
+            for name in self.dependents.get(pending.pop(), ()):
+                if name not in affected:
+                    affected.add(name)
+                    pending.append(name)
+        return [name for name in self.order if name in affected]
+
+    def recompute(self, stats, derived, changed_stats, bonuses=None):
+        """
+        Updates `derived` in place for a change to `changed_stats` (which may include derived
+        stats whose bonus changed); returns the names recomputed.
+        """
+        affected = set(self.affected_by(changed_stats)).union(stat for stat in changed_stats if stat in self.formulas)
+        names = [name for name in self.order if name in affected]
+        for name in names:
+            derived[name] = self._value(name, stats, derived, bonuses)
+        return names
+
+
+def get_formula_engine(rule_set):
+    """The compiled engine for a ruleset, built once per distinct ruleset content."""
+    key = (
+        rule_set.get('name'), tuple(rule_set.get('attributes', [])),
+        tuple(rule_set.get('skills', {})), tuple((rule_set.get('formulas') or {}).items())
+    )
+    engine = _ENGINES.get(key)
+    if engine is None:
+        engine = _ENGINES.setdefault(key, FormulaEngine(rule_set))
+        for name, error in engine.errors.items():
+            print(f"  - [WARNING] Ignoring formula '{name}' of ruleset '{engine.rule_set_name}': {error}")
+    return engine
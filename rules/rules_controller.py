@@ -1,5 +1,6 @@
 from custom_dialogs import MessageBox
 from .rules_model import RulesModel
+from .formula_engine import FormulaEngine
 
 class RulesController:
     """
@@ -33,5 +34,11 @@ class RulesController:
         formulas_raw = self.view.rules_formulas_text.get("1.0", "end").strip().split('\n')
         formulas = {f.split(':')[0].strip(): f.split(':')[1].strip() for f in formulas_raw if ':' in f}
 
+        # Reject formulas the engine would have to ignore, e.g. typos in stat names
+        errors = FormulaEngine({'name': name, 'attributes': attrs, 'skills': skills, 'formulas': formulas}).errors
+        if errors:
+            MessageBox.showerror("Invalid Formula", "\n".join(errors.values()), parent=self.view)
+            return
+
         self.model.save_rule_set(name, attrs, skills, formulas)
         MessageBox.showinfo("Success", f"Rule set '{name}' saved.", parent=self.view)
\ No newline at end of file
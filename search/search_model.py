@@ -0,0 +1,114 @@
+import re
+from database import Database
+
+# Entity types stored in the search index
+SEARCH_TYPES = ("character", "npc", "item", "quest")
+
+# bm25 column weights: a hit in the name counts far more than one in notes or descriptions
+NAME_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+
+def character_document(data):
+    """Returns the (name, body) text indexed for a character."""
+    return data.get('name', ""), ""
+
+
+def npc_document(data):
+    """Returns the (name, body) text indexed for an NPC."""
+    return data.get('name', ""), data.get('gm_notes', "")
+
+
+def item_document(item_data):
+    """Returns the (name, body) text indexed for an item."""
+    return item_data.get('name', ""), f"{item_data.get('type', '')} {item_data.get('description', '')}"
+
+
+def quest_document(quest_data):
+    """Returns the (name, body) text indexed for a quest, including its objectives."""
+    objectives = " ".join(obj.get('text', "") for obj in quest_data.get('objectives', []))
+    return quest_data.get('title', ""), f"{quest_data.get('description', '')} {objectives}"
+
+
+def index_documents(db, entity_type, documents):
+    """
+    (Runs inside the caller's transaction) Adds or replaces search documents.
+    `documents` is an iterable of (entity_id, name, body) tuples.
+    """
+    if not db.has_search_index():
+        return
+    for entity_id, name, body in documents:
+        row = db.fetchone(
+            "SELECT doc_id FROM search_docs WHERE entity_type = ? AND entity_id = ?", (entity_type, entity_id)
+        )
+        if row:
+            doc_id = row['doc_id']
+            db.execute("DELETE FROM search_index WHERE rowid = ?", (doc_id,))
+        else:
+            doc_id = db.execute(
+                "INSERT INTO search_docs (entity_type, entity_id) VALUES (?, ?)", (entity_type, entity_id)
+            ).lastrowid
+        db.execute("INSERT INTO search_index (rowid, name, body) VALUES (?, ?, ?)", (doc_id, name or "", body or ""))
+
+
+def remove_documents(db, entity_type, entity_ids):
+    """(Runs inside the caller's transaction) Removes entities from the search index."""
+    if not db.has_search_index():
+        return
+    for entity_id in entity_ids:
+        row = db.fetchone(
+            "SELECT doc_id FROM search_docs WHERE entity_type = ? AND entity_id = ?", (entity_type, entity_id)
+        )
+        if row:
+            db.execute("DELETE FROM search_index WHERE rowid = ?", (row['doc_id'],))
+            db.execute("DELETE FROM search_docs WHERE doc_id = ?", (row['doc_id'],))
+
+
+class SearchModel:
+    """Campaign-wide full-text search over characters, NPCs, items and quests."""
+    def __init__(self, campaign_path):
+        self.db = Database(campaign_path)
+
+    @staticmethod
+    def build_match_query(text):
+        """
+        Turns user input into an FTS5 query where every word must match as a prefix,
+        so "gob ki" finds "Goblin King". Returns None if there is nothing to search for.
+        """
+        words = re.findall(r"\w+", text.lower())
+        if not words:
+            return None
+        return " ".join(f'"{word}"*' for word in words)
+
+    def search(self, query, types=None, limit=20):
+        """
+        Returns up to `limit` matches ordered by BM25 relevance, best first, as dicts with
+        'type', 'id', 'name' and 'rank'. `types` optionally restricts the entity types.
+        """
+        match_query = self.build_match_query(query)
+        if not match_query:
+            return []
+        self.db.connect()
+        try:
+            if not self.db.has_search_index():
+                return []
+            sql = f"""
+                SELECT search_docs.entity_type, search_docs.entity_id, search_index.name,
+                       bm25(search_index, {NAME_WEIGHT}, {BODY_WEIGHT}) AS rank
+                FROM search_index
+                JOIN search_docs ON search_docs.doc_id = search_index.rowid
+                WHERE search_index MATCH ?
+            """
+            params = [match_query]
+            if types:
+                sql += f" AND search_docs.entity_type IN ({', '.join('?' for _ in types)})"
+                params.extend(types)
+            sql += " ORDER BY rank LIMIT ?"
+            params.append(limit)
+            rows = self.db.fetchall(sql, params)
+        finally:
+            self.db.close()
+        return [
+            {'type': row['entity_type'], 'id': row['entity_id'], 'name': row['name'], 'rank': row['rank']}
+            for row in rows
+        ]
@@ -0,0 +1,168 @@
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from database import Database
+from rules.rules_model import RulesModel
+
+# Values for "serializer" in campaign.json; existing rows keep the format they were written in.
+SERIALIZER_FORMATS = ("json", "binary")
+DEFAULT_SERIALIZER_FORMAT = "json"
+
+# Keys every entity document uses, independent of the ruleset
+_COMMON_KEYS = [
+    "name", "rule_set", "attributes", "skills", "inventory", "current_hp", "gm_notes",
+    "item_id", "quantity", "equipped", "id", "type", "description", "modifiers", "stat", "value",
+    "title", "status", "objectives", "text", "completed", "linked_npcs", "linked_items",
+]
+
+_serializers = {}
+_serializers_lock = threading.Lock()
+
+
+class JsonCodec:
+    """The original encoding: a JSON text document per row."""
+    tag = "json"
+
+    def encode(self, data):
+        return json.dumps(data)
+
+    def decode(self, payload):
+        return json.loads(payload)
+
+
+class BinaryCodec:
+    """
+    Compact JSON compressed as a raw deflate stream primed with a preset dictionary of the
+    campaign ruleset's attribute and skill names. Repeated keys turn into short back-references
+    into that dictionary, so a typical NPC shrinks to a fraction of its JSON size while both
+    directions still run in C (zlib and the json module).
+    """
+    def __init__(self, dict_id, dictionary):
+        self.tag = f"binary:{dict_id}"
+        self.dictionary = dictionary
+
+    def encode(self, data):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15, zdict=self.dictionary)
+        text = json.dumps(data, separators=(',', ':')).encode('utf-8')
+        return compressor.compress(text) + compressor.flush()
+
+    def decode(self, payload):
+        decompressor = zlib.decompressobj(-15, zdict=self.dictionary)
+        return json.loads(decompressor.decompress(payload) + decompressor.flush())
+
+
+def build_dictionary(rule_set):
+    """
+    Builds the preset dictionary for a ruleset. zlib favours matches near the end of the
+    dictionary, so the ruleset's own keys, which appear in every character and NPC, go last.
+    """
+    keys = list(_COMMON_KEYS)
+    if rule_set:
+        keys.extend(rule_set.get('attributes', []))
+        keys.extend(rule_set.get('skills', {}).keys())
+    fragments = ['"equipped":false', '"equipped":true', '"quantity":1']
+    fragments.extend(f'"{key}":' for key in keys)
+    return ",".join(fragments).encode('utf-8')
+
+
+class EntitySerializer:
+    """
+    Encodes entity dicts for one campaign with its configured codec and decodes any row
+    according to the format tag stored next to it.
+    """
+    def __init__(self, campaign_path, write_codec, codecs):
+        self.campaign_path = campaign_path
+        self.write_codec = write_codec
+        self._codecs = codecs
+
+    def dumps(self, data):
+        """Returns the (format, payload) pair to store for an entity dict."""
+        return self.write_codec.tag, self.write_codec.encode(data)
+
+    def loads(self, tag, payload):
+        codec = self._codecs.get(tag)
+        if codec is None:
+            # Written with a dictionary created by another connection since we loaded ours
+            codec = self._load_codec(tag)
+        return codec.decode(payload)
+
+    def load_row(self, row):
+        """Decodes a row selected with its `format` and `data` columns."""
+        return self.loads(row['format'], row['data'])
+
+    def _load_codec(self, tag):
+        db = Database(self.campaign_path)
+        db.connect()
+        try:
+            self._codecs.update(_load_dictionary_codecs(db))
+        finally:
+            db.close()
+        return self._codecs[tag]
+
+
+def _read_campaign_metadata(campaign_path):
+    metadata_path = os.path.join(campaign_path, "campaign.json")
+    if not os.path.exists(metadata_path):
+        return {}
+    with open(metadata_path, 'r') as f:
+        return json.load(f)
+
+
+def _load_dictionary_codecs(db):
+    rows = db.fetchall("SELECT dict_id, content FROM codec_dictionaries")
+    codecs = {}
+    for row in rows:
+        codec = BinaryCodec(row['dict_id'], bytes(row['content']))
+        codecs[codec.tag] = codec
+    return codecs
+
+
+def get_serializer(db):
+    """
+    Returns the serializer for the campaign `db` is connected to, creating it (and, for the
+    binary format, storing the ruleset's dictionary) on first use.
+    """
+    key = os.path.abspath(db.campaign_path)
+    serializer = _serializers.get(key)
+    if serializer:
+        return serializer
+    with _serializers_lock:
+        serializer = _serializers.get(key)
+        if serializer:
+            return serializer
+        json_codec = JsonCodec()
+        codecs = {json_codec.tag: json_codec}
+        codecs.update(_load_dictionary_codecs(db))
+        write_codec = json_codec
+
+        metadata = _read_campaign_metadata(db.campaign_path)
+        if metadata.get("serializer", DEFAULT_SERIALIZER_FORMAT) == "binary":
+            rule_set = RulesModel().load_rule_set(metadata["ruleset"]) if metadata.get("ruleset") else None
+            dictionary = build_dictionary(rule_set)
+            write_codec = next((codec for codec in codecs.values()
+                                if isinstance(codec, BinaryCodec) and codec.dictionary == dictionary), None)
+            if write_codec is None:
+                try:
+                    dict_id = db.execute(
+                        "INSERT INTO codec_dictionaries (content) VALUES (?)", (dictionary,)
+                    ).lastrowid
+                except sqlite3.OperationalError:
+                    # Read-only session: nothing will be written anyway
+                    write_codec = json_codec
+                else:
+                    write_codec = BinaryCodec(dict_id, dictionary)
+                    codecs[write_codec.tag] = write_codec
+
+        serializer = EntitySerializer(db.campaign_path, write_codec, codecs)
+        # A dictionary inserted inside the caller's transaction only exists if that commits
+        if not db.conn.in_transaction:
+            _serializers[key] = serializer
+        return serializer
+
+
+def forget_serializer(campaign_path):
+    """Drops the cached serializer, e.g. after the campaign's "serializer" setting changed."""
+    with _serializers_lock:
+        _serializers.pop(os.path.abspath(campaign_path), None)
@@ -0,0 +1,97 @@
+import weakref
+from utils import as_int_or_none
+
+
+class EffectiveStats:
+    """
+    An entity's attributes and skills with the modifiers of its equipped items applied,
+    plus the ruleset's derived stats (formulas) computed from them. Modifiers on derived
+    stats are summed in `bonuses` and added once the formula is evaluated.
+    """
+    __slots__ = ("attributes", "skills", "derived", "bonuses", "key")
+
+    def __init__(self, attributes, skills, key):
+        self.attributes = attributes
+        self.skills = skills
+        self.derived = {}
+        self.bonuses = {}
+        self.key = key
+
+    def get(self, stat, default=None):
+        """Looks a stat up among the attributes, then the skills, then the derived stats."""
+        if stat in self.attributes:
+            return self.attributes[stat]
+        if stat in self.skills:
+            return self.skills[stat]
+        return self.derived.get(stat, default)
+
+
+class StatEngine:
+    """
+    Computes effective stats once per (entity revision, item catalog revision) and caches
+    them per entity instance. Equipping or unequipping one item patches the cached stats
+    with that item's modifiers instead of walking the whole inventory again, and only the
+    derived stats that read a modified stat are re-evaluated.
+    """
+    def __init__(self):
+        self._cache = weakref.WeakKeyDictionary()
+
+    def effective_stats(self, entity, items_by_id, catalog_revision, formulas=None):
+        key = (entity.revision, catalog_revision, formulas)
+        stats = self._cache.get(entity)
+        if stats is None or stats.key != key:
+            stats = EffectiveStats(entity.attributes.copy(), entity.skills.copy(), key)
+            for inv_entry in entity.inventory:
+                if inv_entry.get("equipped", False):
+                    item = items_by_id.get(inv_entry["item_id"])
+                    if item:
+                        self._apply_modifiers(stats, item, 1)
+            if formulas:
+                stats.derived = formulas.evaluate(stats, stats.bonuses)
+            self._cache[entity] = stats
+        return stats
+
+    def set_equipped(self, entity, inv_entry, equipped, items_by_id, catalog_revision, formulas=None):
+        """Sets an inventory entry's equipped flag, updating cached stats by that item alone."""
+        was_equipped = inv_entry.get("equipped", False)
+        inv_entry["equipped"] = equipped
+        stats = self._cache.get(entity)
+        is_current = stats is not None and stats.key == (entity.revision, catalog_revision, formulas)
+        entity.touch()
+        if not is_current:
+            return
+        item = items_by_id.get(inv_entry["item_id"])
+        if item and was_equipped != equipped:
+            changed = self._apply_modifiers(stats, item, 1 if equipped else -1)
+            if formulas and changed:
+                formulas.recompute(stats, stats.derived, changed, stats.bonuses)
+        stats.key = (entity.revision, catalog_revision, formulas)
+
+    def forget(self, entity):
+        self._cache.pop(entity, None)
+
+    @staticmethod
+    def _apply_modifiers(stats, item, sign):
+        """Adds (sign=1) or removes (sign=-1) an item's modifiers; returns the stats it changed."""
+        changed = []
+        for modifier in item.get("modifiers", []):
+            stat = modifier["stat"]
+            if stat in stats.attributes:
+                block = stats.attributes
+            elif stat in stats.skills:
+                block = stats.skills
+            else:
+                # Any other stat is taken to be derived: its bonus applies on top of the formula
+                bonus = stats.bonuses.get(stat, 0) + sign * modifier["value"]
+                if bonus:
+                    stats.bonuses[stat] = bonus
+                else:
+                    stats.bonuses.pop(stat, None)
+                changed.append(stat)
+                continue
+            # Stats kept as text like "+2" still count; non-numeric ones (e.g. "1d6") are left as they are
+            current_value = as_int_or_none(block.get(stat))
+            if current_value is not None:
+                block[stat] = current_value + sign * modifier["value"]
+                changed.append(stat)
+        return changed
@@ -0,0 +1,190 @@
+from collections import ChainMap
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from character.character_model import CharacterModel
+from npc.npc_model import NpcModel
+from rules.formula_engine import get_formula_engine
+
+KIND_MODELS = {"character": CharacterModel, "npc": NpcModel}
+CURRENT_HP_COLUMN = "Current HP"
+QUERY_OPERATORS = (">=", ">", "<=", "<", "==", "!=")
+AGGREGATES = ("count", "mean", "min", "max", "sum")
+_INITIAL_CAPACITY = 256
+
+
+def stat_columns(rule_set):
+    """The queryable columns for a ruleset: attributes, skills, derived stats and current HP."""
+    formula_order = get_formula_engine(rule_set).order
+    return list(rule_set['attributes']) + list(rule_set['skills']) + list(formula_order) + [CURRENT_HP_COLUMN]
+
+
+def _as_number(value):
+    """Column value for a stat: the number, or NaN for missing and non-numeric stats like "1d6"."""
+    return value if type(value) in (int, float) else np.nan
+
+
+class StatTable:
+    """
+    Column store of the numeric stats of every character and NPC of one ruleset: one
+    float64 NumPy array per attribute, skill, derived stat (formula) and current HP,
+    with an (kind, id) -> row index. Filters, sorting and aggregates are vectorized,
+    so they stay instant over thousands of NPCs. Stats are the base values (no items).
+    Rows are kept in sync with the change log through `sync`.
+    """
+    def __init__(self, campaign_path, rule_set):
+        self.campaign_path = campaign_path
+        self.rule_set_name = rule_set['name']
+        self.formula_engine = get_formula_engine(rule_set)
+        self.stat_names = stat_columns(rule_set)
+        self.columns = {stat: np.full(_INITIAL_CAPACITY, np.nan) for stat in self.stat_names}
+        self.kinds = []
+        self.ids = []
+        self.names = []
+        self._row_of = {}
+        self.size = 0
+        self.revision = 0
+
+    @classmethod
+    def build(cls, campaign_path, rule_set, revision):
+        """Fills a table from every character and NPC of the ruleset (`revision` is the change-log position read at)."""
+        table = cls(campaign_path, rule_set)
+        for kind, model_class in KIND_MODELS.items():
+            models = model_class.get_all_for_ruleset(campaign_path, table.rule_set_name)
+            # The table holds stored values: shared instances with unsaved edits are read again from their rows
+            dirty_ids = [model.get_id() for model in models if model.is_dirty]
+            if dirty_ids:
+                stored = model_class.load_stored_many(campaign_path, dirty_ids)
+                models = [model for model in models if not model.is_dirty] + stored
+            table.upsert_many(kind, models)
+        table.revision = revision
+        return table
+
+    def upsert_many(self, kind, models):
+        """Writes (or overwrites) the rows of the given models; derived stats are evaluated as one batch."""
+        derived = self.formula_engine.evaluate_many([ChainMap(model.attributes, model.skills) for model in models])
+        for model, derived_stats in zip(models, derived):
+            key = (kind, model.get_id())
+            row = self._row_of.get(key)
+            if row is None:
+                row = self._append_row(key, model.name)
+            self.names[row] = model.name
+            for stat in self.stat_names:
+                if stat == CURRENT_HP_COLUMN:
+                    value = model.current_hp
+                elif stat in derived_stats:
+                    value = derived_stats[stat]
+                else:
+                    value = model.attributes.get(stat, model.skills.get(stat))
+                self.columns[stat][row] = _as_number(value)
+
+    def remove(self, kind, entity_id):
+        """Drops a row by moving the last row into its place."""
+        row = self._row_of.pop((kind, entity_id), None)
+        if row is None:
+            return
+        last = self.size - 1
+        if row != last:
+            for column in self.columns.values():
+                column[row] = column[last]
+            self.kinds[row], self.ids[row], self.names[row] = self.kinds[last], self.ids[last], self.names[last]
+            self._row_of[(self.kinds[row], self.ids[row])] = row
+        del self.kinds[last], self.ids[last], self.names[last]
+        self.size = last
+
+    def sync(self):
+        """Applies the characters/NPCs written or deleted since the table's revision. Returns True if any were."""
+        revisions = []
+        changed_any = False
+        for kind, model_class in KIND_MODELS.items():
+            changed_ids, handles, revision = model_class.get_handle_changes_since(
+                self.campaign_path, self.rule_set_name, self.revision
+            )
+            revisions.append(revision)
+            present = {handle.id for handle in handles}
+            for entity_id in changed_ids:
+                if entity_id not in present:
+                    self.remove(kind, entity_id)
+            # One query for all changed rows, from stored data rather than possibly edited shared instances
+            self.upsert_many(kind, model_class.load_stored_many(self.campaign_path, present))
+            changed_any = changed_any or bool(changed_ids)
+        # A write between the two reads is simply applied again next time
+        self.revision = min(revisions)
+        return changed_any
+
+    def _append_row(self, key, name):
+        capacity = next(iter(self.columns.values())).shape[0]
+        if self.size == capacity:
+            for stat, column in self.columns.items():
+                grown = np.full(capacity * 2, np.nan)
+                grown[:self.size] = column[:self.size]
+                self.columns[stat] = grown
+        row = self.size
+        self.kinds.append(key[0])
+        self.ids.append(key[1])
+        self.names.append(name)
+        self._row_of[key] = row
+        self.size += 1
+        return row
+
+    def column(self, stat):
+        """The live values of one stat (a view, NaN where the stat is missing or not a number)."""
+        return self.columns[stat][:self.size]
+
+    def mask(self, conditions=(), kind=None):
+        """Boolean row mask for (stat, operator, value) conditions, e.g. ("Stealth", ">=", 15)."""
+        selected = np.ones(self.size, dtype=bool)
+        if kind:
+            selected &= np.array([row_kind == kind for row_kind in self.kinds], dtype=bool)
+        for stat, op, value in conditions:
+            column = self.column(stat)
+            if op == ">=": selected &= column >= value
+            elif op == ">": selected &= column > value
+            elif op == "<=": selected &= column <= value
+            elif op == "<": selected &= column < value
+            elif op == "==": selected &= column == value
+            elif op == "!=": selected &= column != value
+            else: raise ValueError(f"Unknown operator '{op}'")
+        return selected
+
+    def query(self, conditions=(), sort_by=None, descending=True, limit=None, kind=None):
+        """
+        Rows matching all conditions as [(kind, id, name)], optionally sorted by a stat
+        (rows without a value for it go last) and cut to the first `limit`.
+        """
+        rows = np.flatnonzero(self.mask(conditions, kind))
+        if sort_by is not None and len(rows):
+            values = self.column(sort_by)[rows]
+            keys = np.where(np.isnan(values), np.inf, -values if descending else values)
+            if limit is not None and limit < len(rows):
+                # Partial selection first, so "top 20" does not sort everything
+                nearest = np.argpartition(keys, limit - 1)[:limit]
+                rows = rows[nearest[np.argsort(keys[nearest], kind="stable")]]
+            else:
+                rows = rows[np.argsort(keys, kind="stable")]
+        elif limit is not None:
+            rows = rows[:limit]
+        return [(self.kinds[row], self.ids[row], self.names[row]) for row in rows]
+
+    def aggregate(self, stat, how="mean", conditions=(), group_by_kind=False):
+        """
+        count/mean/min/max/sum of a stat over the matching rows (ignoring missing values);
+        with group_by_kind, a {kind: value} dict instead of a single value.
+        """
+        selected = self.mask(conditions)
+        if group_by_kind:
+            return {kind: self._aggregate(stat, how, selected & self.mask(kind=kind)) for kind in KIND_MODELS}
+        return self._aggregate(stat, how, selected)
+
+    def _aggregate(self, stat, how, selected):
+        values = self.column(stat)[selected]
+        values = values[~np.isnan(values)]
+        if how == "count":
+            return int(values.size)
+        if how not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate '{how}'")
+        if values.size == 0:
+            return None
+        return float(getattr(np, how)(values))
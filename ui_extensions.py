@@ -30,4 +30,299 @@ class AutoWidthComboBox(ctk.CTkComboBox):
                     corner_radius=0,         # Make options look like a standard menu
                     border_width=1,
                     border_color="gray40"
-                )
\ No newline at end of file
+                )
+
+class TypeAheadComboBox(AutoWidthComboBox):
+    """
+    An editable AutoWidthComboBox for picking one name out of thousands. The dropdown never
+    holds the full list: the typed text is passed to `search(text, limit)` (usually backed
+    by a PrefixIndex) and only the best `max_matches` names become menu entries.
+    Return completes the text to the best match and runs `command`, like picking it.
+    """
+    def __init__(self, master, search=None, max_matches=20, placeholder="-", **kwargs):
+        super().__init__(master, values=[placeholder], **kwargs)
+        self.search = search
+        self.max_matches = max_matches
+        self.placeholder = placeholder
+        self._entry.bind("<KeyRelease>", self._on_key_release, add="+")
+        self._entry.bind("<Return>", self._on_return, add="+")
+        self._entry.bind("<FocusIn>", self._on_focus_in, add="+")
+
+    def _open_dropdown_menu(self):
+        # Materialize the current matches only when the menu is actually shown
+        self.refresh_matches()
+        super()._open_dropdown_menu()
+
+    def refresh_matches(self):
+        text = self.get()
+        if text == self.placeholder:
+            text = ""
+        matches = self.search(text, self.max_matches) if self.search else []
+        self.configure(values=matches or [self.placeholder])
+        return matches
+
+    def reset(self):
+        """Clears the selection back to the placeholder."""
+        self.configure(values=[self.placeholder])
+        self.set(self.placeholder)
+
+    def _on_focus_in(self, event):
+        if self.get() == self.placeholder:
+            self._entry.select_range(0, 'end')
+
+    def _on_key_release(self, event):
+        if event.keysym not in ("Return", "KP_Enter", "Tab", "Escape"):
+            self.refresh_matches()
+
+    def _on_return(self, event):
+        matches = self.refresh_matches()
+        if matches:
+            self.set(matches[0])
+            if self._command:
+                self._command(matches[0])
+
+
+class SearchEntry(ctk.CTkEntry):
+    """
+    An entry that calls `on_search(text)` once typing pauses for `delay_ms`, instead of on
+    every keystroke; Return searches right away. Keys that do not change the text are ignored.
+    """
+    DEFAULT_DELAY_MS = 150
+
+    def __init__(self, master, on_search, delay_ms=DEFAULT_DELAY_MS, **kwargs):
+        super().__init__(master, **kwargs)
+        self.on_search = on_search
+        self.delay_ms = delay_ms
+        self._pending = None
+        self._last_text = ""
+        self.bind("<KeyRelease>", self._on_key_release)
+        self.bind("<Return>", lambda event: self.search_now())
+
+    def _on_key_release(self, event):
+        if self.get() == self._last_text:
+            return
+        self._cancel_pending()
+        self._pending = self.after(self.delay_ms, self.search_now)
+
+    def search_now(self):
+        self._cancel_pending()
+        self._last_text = self.get()
+        self.on_search(self._last_text)
+
+    def _cancel_pending(self):
+        if self._pending is not None:
+            self.after_cancel(self._pending)
+            self._pending = None
+
+    def destroy(self):
+        self._cancel_pending()
+        super().destroy()
+
+
+class VirtualList(ctk.CTkFrame):
+    """
+    A scrolling list of buttons for large collections. Only the rows in view exist as
+    widgets; they are placed by hand and reused with new content while scrolling, so a
+    list of thousands builds as fast as a list of twenty.
+
+    Rows show `text(item)`. Clicking a row, or moving with Up/Down/PageUp/PageDown/Home/End,
+    selects it and calls `on_select(item)`; double-click or Return calls `on_activate(item)`.
+    `row_style(item)` adds per-row button options (colors, fonts), `can_select(item)` makes
+    rows such as group headers inert, and `key(item)` identifies items so the selection
+    survives `set_items`.
+    """
+    ROW_STYLE = {"fg_color": "transparent", "anchor": "w", "border_width": 1, "border_color": "gray50"}
+    SELECTED_STYLE = {"fg_color": "#3B8ED0", "border_color": "#3B8ED0"}
+    ROW_GAP = 4
+    WHEEL_ROWS = 3
+
+    def __init__(self, master, text=str, on_select=None, on_activate=None, row_height=32, row_style=None,
+                 can_select=None, key=None, selected_style=None, empty_text="", label_text=None, **kwargs):
+        kwargs.setdefault("fg_color", "transparent")
+        super().__init__(master, **kwargs)
+        self.text = text
+        self.on_select = on_select
+        self.on_activate = on_activate
+        self.row_height = row_height
+        self.row_style = row_style
+        self.can_select = can_select
+        self.key = key or (lambda item: item)
+        self.selected_style = self.SELECTED_STYLE if selected_style is None else selected_style
+        self._items = []
+        self._selected = None
+        self._top = 0
+        # Reusable row buttons, and what each currently shows: (item index, selected)
+        self._rows = []
+        self._row_states = []
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+        if label_text:
+            ctk.CTkLabel(self, text=label_text).grid(row=0, column=0, columnspan=2, pady=(0, 5))
+        self.viewport = ctk.CTkFrame(self, fg_color="transparent")
+        self.viewport.grid(row=1, column=0, sticky="nsew")
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row=1, column=1, sticky="ns")
+        self.empty_label = ctk.CTkLabel(self.viewport, text=empty_text)
+
+        self.viewport.bind("<Configure>", lambda event: self._render())
+        self._bind_wheel(self.viewport)
+        # CTkFrame draws on an internal canvas; that canvas takes the keyboard focus
+        keys = self.viewport._canvas
+        keys.bind("<Up>", lambda event: self._move(-1))
+        keys.bind("<Down>", lambda event: self._move(1))
+        keys.bind("<Prior>", lambda event: self._move(-self._visible_rows()))
+        keys.bind("<Next>", lambda event: self._move(self._visible_rows()))
+        keys.bind("<Home>", lambda event: self._move(-len(self._items)))
+        keys.bind("<End>", lambda event: self._move(len(self._items)))
+        keys.bind("<Return>", lambda event: self._activate(self._selected))
+
+    @property
+    def items(self):
+        return self._items
+
+    @property
+    def selected_item(self):
+        return self._items[self._selected] if self._selected is not None else None
+
+    def set_items(self, items):
+        """Shows a new list, keeping the selected item (by key) and the scroll position when possible."""
+        selected_key = self.key(self.selected_item) if self._selected is not None else None
+        self._items = list(items)
+        self._selected = None
+        if selected_key is not None:
+            for index, item in enumerate(self._items):
+                if self.key(item) == selected_key:
+                    self._selected = index
+                    break
+        self._row_states = [None] * len(self._rows)
+        self._render()
+
+    def select(self, index, notify=True):
+        """Selects the row at `index` (None clears the selection) and scrolls it into view."""
+        if index is not None and not self._selectable(index):
+            return
+        self._selected = index
+        if index is not None:
+            self.see(index)
+        self._render()
+        if notify and index is not None and self.on_select:
+            self.on_select(self._items[index])
+
+    def select_key(self, key, notify=False):
+        """Selects the item with this key, if it is in the list."""
+        for index, item in enumerate(self._items):
+            if self.key(item) == key:
+                self.select(index, notify)
+                return
+        self.select(None)
+
+    def see(self, index):
+        height = self._viewport_height()
+        row_top = index * self.row_height
+        if row_top < self._top:
+            self._top = row_top
+        elif row_top + self.row_height > self._top + height:
+            self._top = row_top + self.row_height - height
+        self._render()
+
+    def _selectable(self, index):
+        return 0 <= index < len(self._items) and (self.can_select is None or self.can_select(self._items[index]))
+
+    def _viewport_height(self):
+        """The viewport height in unscaled units (the ones place() and the constructor take)."""
+        return self.viewport.winfo_height() / self.viewport._get_widget_scaling()
+
+    def _visible_rows(self):
+        return max(1, int(self._viewport_height() // self.row_height))
+
+    def _render(self):
+        height = self._viewport_height()
+        if height <= 1:
+            return
+        total = len(self._items) * self.row_height
+        self._top = max(0, min(self._top, total - height))
+        first = int(self._top // self.row_height)
+        count = min(len(self._items) - first, int(height // self.row_height) + 2)
+        while len(self._rows) < count:
+            self._add_row()
+
+        for slot, row in enumerate(self._rows):
+            index = first + slot
+            if slot >= count:
+                if self._row_states[slot] is not None:
+                    row.place_forget()
+                    self._row_states[slot] = None
+                continue
+            state = (index, index == self._selected)
+            if self._row_states[slot] != state:
+                item = self._items[index]
+                options = dict(self.ROW_STYLE)
+                if self.row_style:
+                    options.update(self.row_style(item))
+                if state[1]:
+                    options.update(self.selected_style)
+                row.configure(text=self.text(item), **options)
+                self._row_states[slot] = state
+            row.place(x=0, y=index * self.row_height - self._top, relwidth=1)
+
+        if self._items:
+            self.empty_label.place_forget()
+        else:
+            self.empty_label.place(relx=0.5, y=10, anchor="n")
+        if total > height:
+            self.scrollbar.set(self._top / total, (self._top + height) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _add_row(self):
+        slot = len(self._rows)
+        row = ctk.CTkButton(self.viewport, height=self.row_height - self.ROW_GAP, command=lambda: self._on_row_click(slot))
+        row.bind("<Double-Button-1>", lambda event: self._activate(self._slot_index(slot)))
+        self._bind_wheel(row)
+        self._rows.append(row)
+        self._row_states.append(None)
+
+    def _slot_index(self, slot):
+        state = self._row_states[slot]
+        return state[0] if state else None
+
+    def _on_row_click(self, slot):
+        self.viewport._canvas.focus_set()
+        index = self._slot_index(slot)
+        if index is not None:
+            self.select(index)
+
+    def _activate(self, index):
+        if index is not None and self._selectable(index) and self.on_activate:
+            self.on_activate(self._items[index])
+
+    def _move(self, delta):
+        """Keyboard navigation: moves the selection, skipping rows that cannot be selected."""
+        if not self._items:
+            return
+        step = 1 if delta > 0 else -1
+        start = self._selected if self._selected is not None else (-1 if step > 0 else len(self._items))
+        index = max(0, min(len(self._items) - 1, start + delta))
+        while 0 <= index < len(self._items) and not self._selectable(index):
+            index += step
+        if 0 <= index < len(self._items):
+            self.select(index)
+
+    def _scroll_to(self, top):
+        self._top = top
+        self._render()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        total = len(self._items) * self.row_height
+        if action == "moveto":
+            self._scroll_to(float(value) * total)
+        elif unit == "pages":
+            self._scroll_to(self._top + int(value) * self._visible_rows() * self.row_height)
+        else:
+            self._scroll_to(self._top + int(value) * self.row_height)
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", lambda event: self._scroll_to(self._top + (-1 if event.delta > 0 else 1) * self.WHEEL_ROWS * self.row_height))
+        widget.bind("<Button-4>", lambda event: self._scroll_to(self._top - self.WHEEL_ROWS * self.row_height))
+        widget.bind("<Button-5>", lambda event: self._scroll_to(self._top + self.WHEEL_ROWS * self.row_height))
@@ -13,4 +13,12 @@ def resource_path(relative_path):
         # If not bundled, the base path is the directory of the main script
         base_path = os.path.abspath(".")
 
-    return os.path.join(base_path, relative_path)
\ No newline at end of file
+    return os.path.join(base_path, relative_path)
+
+
+def as_int_or_none(value):
+    """Converts a stat value such as "12" to an int, returning None if it is not a whole number."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None